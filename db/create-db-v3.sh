@@ -13,6 +13,7 @@ psql -v ON_ERROR_STOP=1 -U "$POSTGRES_USER" <<-EOSQL
 	\c nms
 	create extension if not exists "ltree";
 	create extension if not exists "uuid-ossp";
+	create extension if not exists "pg_trgm";
 	-- admin
 	create role admin login password 'admin';
 	create database admin owner admin;
@@ -0,0 +1,82 @@
+-- name: up#
+create table rf_trace
+(
+	guid uuid not null,
+	timestamp timestamp with time zone not null,
+	start_freq_hz bigint not null,
+	stop_freq_hz bigint not null,
+	step_freq_hz bigint not null,
+	noise double precision not null,
+	numpoints integer not null,
+	y_val_dbm bytea not null,
+	lat double precision,
+	lng double precision,
+	create_dt timestamp with time zone default now() not null
+);
+
+comment on table rf_trace is 'спектрограммы';
+
+comment on column rf_trace.guid is 'идентификатор спектрограммы';
+
+comment on column rf_trace.timestamp is 'время получения спектрограммы';
+
+comment on column rf_trace.start_freq_hz is 'начальная частота, Гц';
+
+comment on column rf_trace.stop_freq_hz is 'конечная частота, Гц';
+
+comment on column rf_trace.step_freq_hz is 'шаг по частоте, Гц';
+
+comment on column rf_trace.noise is 'уровень шума, дБм';
+
+comment on column rf_trace.numpoints is 'количество точек';
+
+comment on column rf_trace.y_val_dbm is 'мощность в точках спектрограммы: int16 (little-endian), сотые доли дБм';
+
+comment on column rf_trace.lat is 'широта места получения спектрограммы';
+
+comment on column rf_trace.lng is 'долгота места получения спектрограммы';
+
+comment on column rf_trace.create_dt is 'время записи в хранилище';
+
+create index rf_trace_timestamp_index
+	on rf_trace (timestamp);
+
+create index rf_trace_guid_index
+	on rf_trace (guid);
+
+create table rf_signal
+(
+	guid uuid not null,
+	trace_guid uuid not null,
+	timestamp timestamp with time zone not null,
+	start_freq_hz bigint not null,
+	stop_freq_hz bigint not null,
+	f0_freq_hz bigint not null,
+	create_dt timestamp with time zone default now() not null
+);
+
+comment on table rf_signal is 'сигналы спектрограмм';
+
+comment on column rf_signal.guid is 'идентификатор сигнала';
+
+comment on column rf_signal.trace_guid is 'идентификатор спектрограммы';
+
+comment on column rf_signal.timestamp is 'время получения спектрограммы (время получения сигнала, если сигнал передан отдельно от спектрограммы)';
+
+comment on column rf_signal.start_freq_hz is 'начальная частота, Гц';
+
+comment on column rf_signal.stop_freq_hz is 'конечная частота, Гц';
+
+comment on column rf_signal.f0_freq_hz is 'центральная частота, Гц';
+
+comment on column rf_signal.create_dt is 'время записи в хранилище';
+
+create index rf_signal_timestamp_index
+	on rf_signal (timestamp);
+
+create index rf_signal_trace_guid_index
+	on rf_signal (trace_guid);
+
+-- name: down#
+drop table if exists rf_signal;
+drop table if exists rf_trace;
@@ -0,0 +1,197 @@
+-- name: up#
+-- секционирование спектрограмм и сигналов по времени (timestamp), по суткам (UTC)
+alter table rf_trace rename to rf_trace_rev_1;
+alter table rf_signal rename to rf_signal_rev_1;
+drop index rf_trace_timestamp_index;
+drop index rf_trace_guid_index;
+drop index rf_signal_timestamp_index;
+drop index rf_signal_trace_guid_index;
+
+create table rf_trace
+(
+	guid uuid not null,
+	timestamp timestamp with time zone not null,
+	start_freq_hz bigint not null,
+	stop_freq_hz bigint not null,
+	step_freq_hz bigint not null,
+	noise double precision not null,
+	numpoints integer not null,
+	y_val_dbm bytea not null,
+	lat double precision,
+	lng double precision,
+	create_dt timestamp with time zone default now() not null
+) partition by range (timestamp);
+
+comment on table rf_trace is 'спектрограммы (секционирована по timestamp, секция - сутки UTC)';
+
+comment on column rf_trace.guid is 'идентификатор спектрограммы';
+
+comment on column rf_trace.timestamp is 'время получения спектрограммы';
+
+comment on column rf_trace.start_freq_hz is 'начальная частота, Гц';
+
+comment on column rf_trace.stop_freq_hz is 'конечная частота, Гц';
+
+comment on column rf_trace.step_freq_hz is 'шаг по частоте, Гц';
+
+comment on column rf_trace.noise is 'уровень шума, дБм';
+
+comment on column rf_trace.numpoints is 'количество точек';
+
+comment on column rf_trace.y_val_dbm is 'мощность в точках спектрограммы: int16 (little-endian), сотые доли дБм';
+
+comment on column rf_trace.lat is 'широта места получения спектрограммы';
+
+comment on column rf_trace.lng is 'долгота места получения спектрограммы';
+
+comment on column rf_trace.create_dt is 'время записи в хранилище';
+
+create index rf_trace_timestamp_index
+	on rf_trace (timestamp);
+
+create index rf_trace_guid_index
+	on rf_trace (guid);
+
+create table rf_trace_default partition of rf_trace default;
+
+create table rf_signal
+(
+	guid uuid not null,
+	trace_guid uuid not null,
+	timestamp timestamp with time zone not null,
+	start_freq_hz bigint not null,
+	stop_freq_hz bigint not null,
+	f0_freq_hz bigint not null,
+	create_dt timestamp with time zone default now() not null
+) partition by range (timestamp);
+
+comment on table rf_signal is 'сигналы спектрограмм (секционирована по timestamp, секция - сутки UTC)';
+
+comment on column rf_signal.guid is 'идентификатор сигнала';
+
+comment on column rf_signal.trace_guid is 'идентификатор спектрограммы';
+
+comment on column rf_signal.timestamp is 'время получения спектрограммы (время получения сигнала, если сигнал передан отдельно от спектрограммы)';
+
+comment on column rf_signal.start_freq_hz is 'начальная частота, Гц';
+
+comment on column rf_signal.stop_freq_hz is 'конечная частота, Гц';
+
+comment on column rf_signal.f0_freq_hz is 'центральная частота, Гц';
+
+comment on column rf_signal.create_dt is 'время записи в хранилище';
+
+create index rf_signal_timestamp_index
+	on rf_signal (timestamp);
+
+create index rf_signal_trace_guid_index
+	on rf_signal (trace_guid);
+
+create table rf_signal_default partition of rf_signal default;
+
+insert into rf_trace select * from rf_trace_rev_1;
+insert into rf_signal select * from rf_signal_rev_1;
+drop table rf_trace_rev_1;
+drop table rf_signal_rev_1;
+
+create or replace function create_daily_partitions(p_table text, p_from date, p_days integer) returns integer
+    language plpgsql
+as
+$$
+DECLARE
+    day       date;
+    partition text;
+    created   integer := 0;
+begin
+    -- одновременное создание секций несколькими экземплярами сервиса
+    perform pg_advisory_xact_lock(hashtext('create_daily_partitions'), hashtext(p_table));
+    for i in 0 .. p_days - 1 loop
+        day = p_from + i;
+        partition = p_table || '_p' || to_char(day, 'YYYYMMDD');
+        if to_regclass(partition) is not null then
+            continue;
+        end if;
+        -- строки за эти сутки, попавшие в секцию по умолчанию, переносятся в новую секцию.
+        -- Добавление строк в секцию по умолчанию блокируется до завершения транзакции (чтение - нет):
+        -- строка за эти сутки, добавленная после переноса, не позволила бы подключить секцию
+        execute format('lock table %I in exclusive mode', p_table || '_default');
+        execute format('create table %I (like %I including defaults)', partition, p_table);
+        execute format(
+            'with moved as (delete from %I where timestamp >= $1 and timestamp < $2 returning *) '
+            'insert into %I select * from moved',
+            p_table || '_default', partition)
+            using day::timestamp at time zone 'UTC', (day + 1)::timestamp at time zone 'UTC';
+        execute format(
+            'alter table %I attach partition %I for values from (%L) to (%L)',
+            p_table, partition, day::timestamp at time zone 'UTC', (day + 1)::timestamp at time zone 'UTC');
+        created = created + 1;
+    end loop;
+    return created;
+END;
+$$;
+
+comment on function create_daily_partitions(text, date, integer) is 'создание секций таблицы p_table за p_days суток начиная с p_from (UTC)';
+
+create or replace function drop_daily_partitions(p_table text, p_before date) returns integer
+    language plpgsql
+as
+$$
+DECLARE
+    partition text;
+    dropped   integer := 0;
+begin
+    perform pg_advisory_xact_lock(hashtext('create_daily_partitions'), hashtext(p_table));
+    for partition in
+        select c.relname
+        from pg_inherits i
+                 join pg_class c on c.oid = i.inhrelid
+        where i.inhparent = p_table::regclass
+          and case
+                  when c.relname ~ ('^' || p_table || '_p[0-9]{8}$')
+                      then to_date(right(c.relname, 8), 'YYYYMMDD') < p_before
+                  else false
+            end
+        order by c.relname
+    loop
+        execute format('alter table %I detach partition %I', p_table, partition);
+        execute format('drop table %I', partition);
+        dropped = dropped + 1;
+    end loop;
+    execute format('delete from %I where timestamp < $1', p_table || '_default')
+        using p_before::timestamp at time zone 'UTC';
+    return dropped;
+END;
+$$;
+
+comment on function drop_daily_partitions(text, date) is 'удаление секций таблицы p_table за сутки ранее p_before (UTC)';
+
+
+-- name: down#
+drop function if exists drop_daily_partitions(text, date);
+drop function if exists create_daily_partitions(text, date, integer);
+
+alter table rf_trace rename to rf_trace_rev_2;
+alter table rf_signal rename to rf_signal_rev_2;
+drop index rf_trace_timestamp_index;
+drop index rf_trace_guid_index;
+drop index rf_signal_timestamp_index;
+drop index rf_signal_trace_guid_index;
+
+create table rf_trace (like rf_trace_rev_2 including defaults);
+create table rf_signal (like rf_signal_rev_2 including defaults);
+insert into rf_trace select * from rf_trace_rev_2;
+insert into rf_signal select * from rf_signal_rev_2;
+drop table rf_trace_rev_2;
+drop table rf_signal_rev_2;
+
+create index rf_trace_timestamp_index
+	on rf_trace (timestamp);
+
+create index rf_trace_guid_index
+	on rf_trace (guid);
+
+create index rf_signal_timestamp_index
+	on rf_signal (timestamp);
+
+create index rf_signal_trace_guid_index
+	on rf_signal (trace_guid);
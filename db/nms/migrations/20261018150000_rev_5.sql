@@ -0,0 +1,44 @@
+-- name: up#
+-- уведомления об изменении таблиц каталогов (кэш каталогов сервисов, см. nms.common.api.catalog_cache):
+-- канал nms_catalog_changed, payload - имя таблицы; уведомления отправляются при фиксации транзакции,
+-- одинаковые уведомления одной транзакции объединяются
+create or replace function notify_catalog_changed() returns trigger
+    language plpgsql
+as
+$$
+begin
+    perform pg_notify('nms_catalog_changed', TG_TABLE_NAME);
+    return null;
+end;
+$$;
+
+create trigger equipment_notify_tgr
+	after insert or update or delete or truncate
+	on equipment
+	for each statement
+	execute procedure notify_catalog_changed();
+
+create trigger commands_toc_notify_tgr
+	after insert or update or delete or truncate
+	on commands_toc
+	for each statement
+	execute procedure notify_catalog_changed();
+
+create trigger commands_notify_tgr
+	after insert or update or delete or truncate
+	on commands
+	for each statement
+	execute procedure notify_catalog_changed();
+
+create trigger telemetry_notify_tgr
+	after insert or update or delete or truncate
+	on telemetry
+	for each statement
+	execute procedure notify_catalog_changed();
+
+-- name: down#
+drop trigger if exists equipment_notify_tgr on equipment;
+drop trigger if exists commands_toc_notify_tgr on commands_toc;
+drop trigger if exists commands_notify_tgr on commands;
+drop trigger if exists telemetry_notify_tgr on telemetry;
+drop function if exists notify_catalog_changed();
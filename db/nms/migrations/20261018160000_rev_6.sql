@@ -0,0 +1,57 @@
+-- name: up#
+-- версии таблиц каталогов для условных запросов HTTP (ETag, Last-Modified): увеличиваются триггерами
+-- изменения таблиц (notify_catalog_changed) в той же транзакции, что и изменение
+create table catalog_version
+(
+	table_name varchar(63) not null
+		constraint catalog_version_pk
+			primary key,
+	version bigint default 0 not null,
+	update_dt timestamp with time zone default now() not null
+);
+
+comment on table catalog_version is 'версии таблиц каталогов';
+
+comment on column catalog_version.table_name is 'имя таблицы';
+
+comment on column catalog_version.version is 'номер версии, увеличивается при каждом изменении таблицы';
+
+comment on column catalog_version.update_dt is 'время последнего изменения таблицы';
+
+insert into catalog_version (table_name, update_dt)
+select t.table_name, coalesce(t.update_dt, now())
+from (select 'equipment' as table_name, (select max(update_dt) from equipment) as update_dt
+      union all
+      select 'commands_toc', (select max(update_dt) from commands_toc)
+      union all
+      select 'commands', (select max(update_dt) from commands)
+      union all
+      select 'telemetry', (select max(update_dt) from telemetry)) t;
+
+create or replace function notify_catalog_changed() returns trigger
+    language plpgsql
+as
+$$
+begin
+    -- блокировка строки версии упорядочивает изменения таблицы: версия и время не уменьшаются
+    update catalog_version
+    set version   = version + 1,
+        update_dt = greatest(update_dt, clock_timestamp())
+    where table_name = TG_TABLE_NAME;
+    perform pg_notify('nms_catalog_changed', TG_TABLE_NAME);
+    return null;
+end;
+$$;
+
+-- name: down#
+create or replace function notify_catalog_changed() returns trigger
+    language plpgsql
+as
+$$
+begin
+    perform pg_notify('nms_catalog_changed', TG_TABLE_NAME);
+    return null;
+end;
+$$;
+
+drop table if exists catalog_version;
@@ -0,0 +1,52 @@
+-- name: up#
+-- поиск по обозначению без учета регистра (lower(name) = lower(:name), по началу обозначения - сравнение ~>=~ и ~<~)
+-- и по сходству (pg_trgm, операторы <% - word_similarity) для записей, кроме архивных:
+-- имена архивных записей получают суффикс со временем архивации и в поиске не участвуют
+create extension if not exists pg_trgm;
+
+create index equipment_name_lower_idx
+	on equipment (lower(name) text_pattern_ops) where not archive;
+
+create index equipment_name_trgm_idx
+	on equipment using gin (name gin_trgm_ops) where not archive;
+
+create index equipment_name_full_trgm_idx
+	on equipment using gin (name_full gin_trgm_ops) where not archive;
+
+create index commands_name_lower_idx
+	on commands (lower(name) text_pattern_ops) where not archive;
+
+create index commands_name_trgm_idx
+	on commands using gin (name gin_trgm_ops) where not archive;
+
+create index commands_name_full_trgm_idx
+	on commands using gin (name_full gin_trgm_ops) where not archive;
+
+create index commands_description_trgm_idx
+	on commands using gin (description gin_trgm_ops) where not archive;
+
+create index telemetry_name_lower_idx
+	on telemetry (lower(name) text_pattern_ops) where not archive;
+
+create index telemetry_name_trgm_idx
+	on telemetry using gin (name gin_trgm_ops) where not archive;
+
+create index telemetry_name_full_trgm_idx
+	on telemetry using gin (name_full gin_trgm_ops) where not archive;
+
+create index telemetry_description_trgm_idx
+	on telemetry using gin (description gin_trgm_ops) where not archive;
+
+-- name: down#
+-- расширение pg_trgm не удаляется: может использоваться другими объектами БД
+drop index if exists equipment_name_lower_idx;
+drop index if exists equipment_name_trgm_idx;
+drop index if exists equipment_name_full_trgm_idx;
+drop index if exists commands_name_lower_idx;
+drop index if exists commands_name_trgm_idx;
+drop index if exists commands_name_full_trgm_idx;
+drop index if exists commands_description_trgm_idx;
+drop index if exists telemetry_name_lower_idx;
+drop index if exists telemetry_name_trgm_idx;
+drop index if exists telemetry_name_full_trgm_idx;
+drop index if exists telemetry_description_trgm_idx;
@@ -0,0 +1,41 @@
+-- name: up#
+-- частичные индексы записей, кроме архивных (условие not archive есть во всех запросах nms/common/db/queries/nms):
+-- архивные записи не удаляются и со временем составляют большую часть таблиц.
+-- Поиск по id выполняется по первичному ключу, по обозначению - по индексам rev_7.
+-- Поддерево (parent_path || id::text <@ ...) - индекс GiST по тому же выражению: индекс по parent_path
+-- для такого условия не используется
+
+create index equipment_active_parent_id_idx
+	on equipment (parent_id) where not archive;
+
+create index equipment_active_subtree_idx
+	on equipment using gist ((parent_path || id::text)) where not archive;
+
+create index commands_toc_active_parent_id_idx
+	on commands_toc (parent_id) where not archive;
+
+create index commands_toc_active_subtree_idx
+	on commands_toc using gist ((parent_path || id::text)) where not archive;
+
+create index commands_active_equipment_id_idx
+	on commands (equipment_id) where not archive;
+
+create index commands_active_toc_id_idx
+	on commands (toc_id) where not archive;
+
+-- порядок страниц каталога и страницы по курсору (name, id)
+create index commands_active_name_id_idx
+	on commands (name, id) where not archive;
+
+create index telemetry_active_name_id_idx
+	on telemetry (name, id) where not archive;
+
+-- name: down#
+drop index if exists equipment_active_parent_id_idx;
+drop index if exists equipment_active_subtree_idx;
+drop index if exists commands_toc_active_parent_id_idx;
+drop index if exists commands_toc_active_subtree_idx;
+drop index if exists commands_active_equipment_id_idx;
+drop index if exists commands_active_toc_id_idx;
+drop index if exists commands_active_name_id_idx;
+drop index if exists telemetry_active_name_id_idx;
@@ -1,20 +1,31 @@
 from typing import Any, List, Optional
 
-from fastapi import (APIRouter, Body, Depends, HTTPException, Query, Response,
-                     status)
+from fastapi import (APIRouter, Body, Depends, HTTPException, Query, Request,
+                     Response, status)
+from fastapi.responses import StreamingResponse
 
+from nms.cfg.config import CfgSettings, get_cfg_settings
+from nms.common.api.bulk import bulk_description, bulk_response, read_bulk_items
+from nms.common.api.catalog_cache import CatalogResponder
+from nms.common.api.conditional import conditional_response, entity_etag
+from nms.common.api.dependencies.catalog_cache import get_catalog_responder
 from nms.common.api.dependencies.command import (get_command_by_id,
                                                  get_commands_toc_by_id)
 from nms.common.api.dependencies.database import get_db_repository
+from nms.common.api.dependencies.export import get_export_limiter
+from nms.common.api.export import ExportLimiter, export_response
 from nms.common.db.errors import (ConflictWhenInsert, ConflictWhenUpdate)
 from nms.common.db.repositories.cfg.commands import CommandsRepository
+from nms.common.models.bulk import BulkImportResponse, BulkMode, CommandsTocInBulk
 from nms.common.models.commands import (CommandInCatalogResponse,
                                         CommandInCreate, CommandInDb,
                                         CommandInResponse, CommandInUpdate,
                                         CommandsTocInCreate, CommandsTocInDb,
                                         CommandsTocInResponse,
                                         CommandsTocInUpdate)
-from nms.common.models.response_pagination import ResponsePage
+from nms.common.models.export import ExportFormat
+from nms.common.models.response_pagination import ResponsePage, decode_cursor
+from nms.common.models.search import NameMatch
 
 router = APIRouter(tags=["commands"])
 
@@ -27,8 +38,11 @@ router = APIRouter(tags=["commands"])
 )
 async def get_commands_toc_catalog(
     repo: CommandsRepository = Depends(get_db_repository(CommandsRepository)),
+    catalog: CatalogResponder = Depends(get_catalog_responder),
 ):
-    return await repo.get_toc_catalog()
+    return await catalog.respond(
+        ("commands_toc",), ("commands_toc",), repo.get_toc_catalog, repo
+    )
 
 
 @router.get(
@@ -38,8 +52,15 @@ async def get_commands_toc_catalog(
     response_model=CommandsTocInResponse,
 )
 async def get_commands_toc(
+    request: Request,
+    response: Response,
     toc: CommandsTocInDb = Depends(get_commands_toc_by_id),
 ) -> CommandsTocInResponse:
+    not_modified = conditional_response(
+        request, response, entity_etag("commands_toc", toc), toc.update_dt
+    )
+    if not_modified is not None:
+        return not_modified
     return CommandsTocInResponse.from_orm(toc)
 
 
@@ -61,6 +82,33 @@ async def create_commands_toc(
     return CommandsTocInResponse.from_orm(toc)
 
 
+@router.post(
+    "/commands-toc/bulk",
+    name="cfg:import-commands-toc",
+    summary="пакетное добавление разделов каталога команд",
+    description=bulk_description(CommandsTocInBulk),
+    response_model=BulkImportResponse,
+)
+async def import_commands_toc(
+    request: Request,
+    mode: BulkMode = Query(
+        BulkMode.INSERT,
+        description="insert - только добавление (существующий раздел - ошибка), "
+        "upsert - существующий раздел не изменяется (unchanged)",
+    ),
+    settings: CfgSettings = Depends(get_cfg_settings),
+    repo: CommandsRepository = Depends(get_db_repository(CommandsRepository)),
+) -> BulkImportResponse:
+    items, rejected = await read_bulk_items(
+        request, CommandsTocInBulk, settings.cfg_bulk_max_items, settings.cfg_bulk_max_record_size
+    )
+    try:
+        results = await repo.import_toc(items, mode)
+    except ConflictWhenInsert as err:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(err))
+    return bulk_response(results, rejected)
+
+
 @router.patch(
     "/commands-toc/{toc_id}",
     name="cfg:update-commands-toc",
@@ -113,6 +161,18 @@ async def search_commands_catalog(
         max_length=10,
         description="фильтр: код (номер) команды (регистронезависимо)",
     ),
+    name_match: NameMatch = Query(
+        NameMatch.EXACT,
+        alias="name-match",
+        description="сравнение с фильтром name: exact - совпадение, prefix - начало обозначения",
+    ),
+    text: Optional[str] = Query(
+        None,
+        min_length=3,
+        max_length=100,
+        description="поиск по сходству с обозначением, наименованием или описанием, "
+        "записи упорядочены по убыванию сходства (без курсора страницы)",
+    ),
     toc_id: Optional[int] = Query(
         None,
         alias="toc-id",
@@ -128,15 +188,75 @@ async def search_commands_catalog(
         max_length=50,
         description="фильтр: по оборудованию, обозначение на схеме (регистронезависимо)",
     ),
+    count_limit: Optional[int] = Query(
+        None,
+        alias="count-limit",
+        ge=1,
+        description="подсчитать не более count-limit записей (оценка total для больших каталогов)",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="курсор страницы (next из предыдущего ответа), вместо page; "
+        "страницы по курсору не смещаются при одновременном изменении каталога",
+    ),
     repo: CommandsRepository = Depends(get_db_repository(CommandsRepository)),
+    catalog: CatalogResponder = Depends(get_catalog_responder),
 ) -> ResponsePage[CommandInCatalogResponse]:
-    return await repo.search_commands_catalog(
+    if cursor is not None and text:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor is not supported for text search",
+        )
+    try:
+        cursor_key = decode_cursor(cursor) if cursor is not None else None
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    params = dict(
         limit=limit,
         page=page,
         name=name,
+        name_match=name_match,
+        text=text,
         toc_id=toc_id,
         equipment_id=equipment_id,
         equipment_name=equipment_name,
+        count_limit=count_limit,
+        cursor=cursor_key,
+    )
+    return await catalog.respond(
+        ("commands", tuple(params.values())),
+        ("commands", "commands_toc", "equipment"),
+        lambda: repo.search_commands_catalog(**params),
+        repo,
+    )
+
+
+@router.get(
+    "/commands/export",
+    name="cfg:export-commands-catalog",
+    summary="выгрузка каталога команд потоком (NDJSON или CSV), упорядочена по обозначению",
+    description=(
+        "Записи читаются курсором БД и передаются по мере чтения, ответ сжимается при Accept-Encoding: gzip. "
+        "При превышении количества одновременных выгрузок (CFG_EXPORT_MAX_CONCURRENT) - ответ 503"
+    ),
+    response_class=StreamingResponse,
+)
+async def export_commands_catalog(
+    export_format: ExportFormat = Query(
+        ExportFormat.NDJSON,
+        alias="format",
+        description="ndjson - объект JSON записи в строке, csv - строка заголовка и строки записей",
+    ),
+    settings: CfgSettings = Depends(get_cfg_settings),
+    repo: CommandsRepository = Depends(get_db_repository(CommandsRepository)),
+    limiter: Optional[ExportLimiter] = Depends(get_export_limiter),
+) -> StreamingResponse:
+    return await export_response(
+        repo.export_commands_catalog(prefetch=settings.cfg_export_prefetch),
+        tuple(CommandInCatalogResponse.__fields__),
+        export_format,
+        "commands",
+        limiter,
     )
 
 
@@ -147,8 +267,15 @@ async def search_commands_catalog(
     response_model=CommandInResponse,
 )
 async def get_command(
+    request: Request,
+    response: Response,
     command: CommandInDb = Depends(get_command_by_id),
 ) -> CommandInResponse:
+    not_modified = conditional_response(
+        request, response, entity_etag("command", command), command.update_dt
+    )
+    if not_modified is not None:
+        return not_modified
     return CommandInResponse.from_orm(command)
 
 
@@ -170,6 +297,33 @@ async def create_command(
     return CommandInResponse.from_orm(command)
 
 
+@router.post(
+    "/commands/bulk",
+    name="cfg:import-commands",
+    summary="пакетное добавление (изменение) команд",
+    description=bulk_description(CommandInCreate),
+    response_model=BulkImportResponse,
+)
+async def import_commands(
+    request: Request,
+    mode: BulkMode = Query(
+        BulkMode.INSERT,
+        description="insert - только добавление (команда с существующим кодом - ошибка), "
+        "upsert - добавление или изменение существующих команд",
+    ),
+    settings: CfgSettings = Depends(get_cfg_settings),
+    repo: CommandsRepository = Depends(get_db_repository(CommandsRepository)),
+) -> BulkImportResponse:
+    items, rejected = await read_bulk_items(
+        request, CommandInCreate, settings.cfg_bulk_max_items, settings.cfg_bulk_max_record_size
+    )
+    try:
+        results = await repo.import_commands(items, mode)
+    except ConflictWhenInsert as err:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(err))
+    return bulk_response(results, rejected)
+
+
 @router.patch(
     "/commands/{command_id}",
     name="cfg:update-command",
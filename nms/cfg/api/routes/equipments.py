@@ -1,16 +1,23 @@
 from typing import Optional
 
-from fastapi import (APIRouter, Body, Depends, HTTPException, Query, Response,
-                     status)
+from fastapi import (APIRouter, Body, Depends, HTTPException, Query, Request,
+                     Response, status)
 
+from nms.cfg.config import CfgSettings, get_cfg_settings
+from nms.common.api.bulk import bulk_description, bulk_response, read_bulk_items
+from nms.common.api.catalog_cache import CatalogResponder
+from nms.common.api.conditional import conditional_response, entity_etag
+from nms.common.api.dependencies.catalog_cache import get_catalog_responder
 from nms.common.api.dependencies.database import get_db_repository
 from nms.common.api.dependencies.equipment import get_equipment_by_id
 from nms.common.db.errors import (ConflictWhenInsert, ConflictWhenUpdate,
                                   EntityDoesNotExist)
 from nms.common.db.repositories.cfg.equipments import EquipmentsRepository
+from nms.common.models.bulk import BulkImportResponse, BulkMode, EquipmentInBulk
 from nms.common.models.equipments import (EquipmentInCreate, EquipmentInDb,
                                           EquipmentInResponse,
                                           EquipmentInUpdate)
+from nms.common.models.search import NameMatch
 
 router = APIRouter(tags=["equipments"])
 
@@ -31,6 +38,21 @@ async def search_equipments_catalog(
         max_length=50,
         description="обозначение на схеме (регистронезависимо)",
     ),
+    name_match: NameMatch = Query(
+        NameMatch.EXACT,
+        alias="name-match",
+        description="сравнение с name: exact - совпадение, prefix - начало обозначения (список, не более limit записей)",
+    ),
+    text: Optional[str] = Query(
+        None,
+        min_length=3,
+        max_length=100,
+        description="поиск по сходству с обозначением или наименованием, "
+        "записи упорядочены по убыванию сходства (список, не более limit записей)",
+    ),
+    limit: int = Query(
+        default=100, ge=1, le=1000, description="количество записей для name-match=prefix и text"
+    ),
     root_id: Optional[int] = Query(
         None,
         alias="root-id",
@@ -44,22 +66,33 @@ async def search_equipments_catalog(
         description="формировать каталог с объекта: обозначение (регистронезависимо)",
     ),
     repo: EquipmentsRepository = Depends(get_db_repository(EquipmentsRepository)),
+    catalog: CatalogResponder = Depends(get_catalog_responder),
 ) -> list:
+    def equipments_catalog(root_item_id: Optional[int] = None):
+        return catalog.respond(
+            ("equipment", root_item_id),
+            ("equipment",),
+            lambda: repo.get_equipments_catalog(root_item_id),
+            repo,
+        )
+
     try:
         if equipment_id:
             equipment = await repo.get_equipment(equipment_id)
             return [EquipmentInResponse.from_orm(equipment)]
-        elif name:
-            equipment = await repo.get_equipment_by_name(name)
-            return [EquipmentInResponse.from_orm(equipment)]
+        elif name or text:
+            equipments = await repo.search_equipments(
+                name=name, name_match=name_match, text=text, limit=limit
+            )
+            return [EquipmentInResponse.from_orm(equipment) for equipment in equipments]
         elif root_id:
-            return await repo.get_equipments_catalog(root_id)
+            return await equipments_catalog(root_id)
         elif root_name:
             parent = await repo.get_equipment_by_name(root_name)
-            return await repo.get_equipments_catalog(parent.id)
+            return await equipments_catalog(parent.id)
     except EntityDoesNotExist:
         return list()
-    return await repo.get_equipments_catalog()
+    return await equipments_catalog()
 
 
 @router.get(
@@ -69,8 +102,15 @@ async def search_equipments_catalog(
     response_model=EquipmentInResponse,
 )
 async def get_equipment(
+    request: Request,
+    response: Response,
     equipment: EquipmentInDb = Depends(get_equipment_by_id),
 ) -> EquipmentInResponse:
+    not_modified = conditional_response(
+        request, response, entity_etag("equipment", equipment), equipment.update_dt
+    )
+    if not_modified is not None:
+        return not_modified
     return EquipmentInResponse.from_orm(equipment)
 
 
@@ -92,6 +132,33 @@ async def create_equipment(
     return EquipmentInResponse.from_orm(equipment)
 
 
+@router.post(
+    "/equipments/bulk",
+    name="cfg:import-equipments",
+    summary="пакетное добавление (изменение) оборудования",
+    description=bulk_description(EquipmentInBulk),
+    response_model=BulkImportResponse,
+)
+async def import_equipments(
+    request: Request,
+    mode: BulkMode = Query(
+        BulkMode.INSERT,
+        description="insert - только добавление (оборудование с существующим обозначением - ошибка), "
+        "upsert - добавление или изменение существующего оборудования",
+    ),
+    settings: CfgSettings = Depends(get_cfg_settings),
+    repo: EquipmentsRepository = Depends(get_db_repository(EquipmentsRepository)),
+) -> BulkImportResponse:
+    items, rejected = await read_bulk_items(
+        request, EquipmentInBulk, settings.cfg_bulk_max_items, settings.cfg_bulk_max_record_size
+    )
+    try:
+        results = await repo.import_equipments(items, mode)
+    except ConflictWhenInsert as err:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(err))
+    return bulk_response(results, rejected)
+
+
 @router.patch(
     "/equipments/{equipment_id}",
     name="cfg:update-equipment",
@@ -1,17 +1,28 @@
 from typing import Optional
 
-from fastapi import (APIRouter, Body, Depends, HTTPException, Query, Response,
-                     status)
+from fastapi import (APIRouter, Body, Depends, HTTPException, Query, Request,
+                     Response, status)
+from fastapi.responses import StreamingResponse
 
+from nms.cfg.config import CfgSettings, get_cfg_settings
+from nms.common.api.bulk import bulk_description, bulk_response, read_bulk_items
+from nms.common.api.catalog_cache import CatalogResponder
+from nms.common.api.conditional import conditional_response, entity_etag
+from nms.common.api.dependencies.catalog_cache import get_catalog_responder
 from nms.common.api.dependencies.database import get_db_repository
+from nms.common.api.dependencies.export import get_export_limiter
+from nms.common.api.export import ExportLimiter, export_response
 from nms.common.api.dependencies.telemetry import get_tm_parameter_by_id
 from nms.common.db.errors import (ConflictWhenInsert, ConflictWhenUpdate,
                                   EntityDoesNotExist)
 from nms.common.db.repositories.cfg.telemetry import TmRepository
+from nms.common.models.bulk import BulkImportResponse, BulkMode
+from nms.common.models.export import ExportFormat
 from nms.common.models.telemetry import (TmParameterInCreate, TmParameterInDb,
                                          TmParameterInResponse,
                                          TmParameterInUpdate)
-from nms.common.models.response_pagination import ResponsePage
+from nms.common.models.response_pagination import ResponsePage, decode_cursor
+from nms.common.models.search import NameMatch
 
 
 router = APIRouter(tags=["telemetry"])
@@ -34,12 +45,84 @@ async def search_telemetry_catalog(
         max_length=80,
         description="фильтр: обозначение ТМ-параметра (индекс)",
     ),
+    name_match: NameMatch = Query(
+        NameMatch.EXACT,
+        alias="name-match",
+        description="сравнение с фильтром name: exact - совпадение, prefix - начало обозначения",
+    ),
+    text: Optional[str] = Query(
+        None,
+        min_length=3,
+        max_length=100,
+        description="поиск по сходству с обозначением, наименованием или описанием, "
+        "записи упорядочены по убыванию сходства (без курсора страницы)",
+    ),
+    count_limit: Optional[int] = Query(
+        None,
+        alias="count-limit",
+        ge=1,
+        description="подсчитать не более count-limit записей (оценка total для больших каталогов)",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="курсор страницы (next из предыдущего ответа), вместо page; "
+        "страницы по курсору не смещаются при одновременном изменении каталога",
+    ),
     repo: TmRepository = Depends(get_db_repository(TmRepository)),
+    catalog: CatalogResponder = Depends(get_catalog_responder),
 ) -> ResponsePage[TmParameterInResponse]:
-    return await repo.search_telemetry_catalog(
+    if cursor is not None and text:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor is not supported for text search",
+        )
+    try:
+        cursor_key = decode_cursor(cursor) if cursor is not None else None
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    params = dict(
         limit=limit,
         page=page,
-        name=name
+        name=name,
+        name_match=name_match,
+        text=text,
+        count_limit=count_limit,
+        cursor=cursor_key,
+    )
+    return await catalog.respond(
+        ("telemetry", tuple(params.values())),
+        ("telemetry",),
+        lambda: repo.search_telemetry_catalog(**params),
+        repo,
+    )
+
+
+@router.get(
+    "/telemetry/export",
+    name="cfg:export-telemetry-catalog",
+    summary="выгрузка каталога ТМ-параметров потоком (NDJSON или CSV), упорядочена по обозначению",
+    description=(
+        "Записи читаются курсором БД и передаются по мере чтения, ответ сжимается при Accept-Encoding: gzip. "
+        "При превышении количества одновременных выгрузок (CFG_EXPORT_MAX_CONCURRENT) - ответ 503"
+    ),
+    response_class=StreamingResponse,
+)
+async def export_telemetry_catalog(
+    export_format: ExportFormat = Query(
+        ExportFormat.NDJSON,
+        alias="format",
+        description="ndjson - объект JSON записи в строке, csv - строка заголовка и строки записей",
+    ),
+    settings: CfgSettings = Depends(get_cfg_settings),
+    repo: TmRepository = Depends(get_db_repository(TmRepository)),
+    limiter: Optional[ExportLimiter] = Depends(get_export_limiter),
+) -> StreamingResponse:
+    return await export_response(
+        repo.export_telemetry_catalog(prefetch=settings.cfg_export_prefetch),
+        tuple(TmParameterInResponse.__fields__),
+        export_format,
+        "telemetry",
+        limiter,
     )
 
 
@@ -50,8 +133,15 @@ async def search_telemetry_catalog(
     response_model=TmParameterInResponse,
 )
 async def get_tm_parameter(
+    request: Request,
+    response: Response,
     tm_parameter: TmParameterInDb = Depends(get_tm_parameter_by_id),
 ) -> TmParameterInResponse:
+    not_modified = conditional_response(
+        request, response, entity_etag("telemetry", tm_parameter), tm_parameter.update_dt
+    )
+    if not_modified is not None:
+        return not_modified
     return TmParameterInResponse.from_orm(tm_parameter)
 
 
@@ -73,6 +163,33 @@ async def create_tm_parameter(
     return TmParameterInResponse.from_orm(parameter)
 
 
+@router.post(
+    "/telemetry/bulk",
+    name="cfg:import-tm-parameters",
+    summary="пакетное добавление (изменение) ТМ-параметров",
+    description=bulk_description(TmParameterInCreate),
+    response_model=BulkImportResponse,
+)
+async def import_tm_parameters(
+    request: Request,
+    mode: BulkMode = Query(
+        BulkMode.INSERT,
+        description="insert - только добавление (параметр с существующим обозначением - ошибка), "
+        "upsert - добавление или изменение существующих параметров",
+    ),
+    settings: CfgSettings = Depends(get_cfg_settings),
+    repo: TmRepository = Depends(get_db_repository(TmRepository)),
+) -> BulkImportResponse:
+    items, rejected = await read_bulk_items(
+        request, TmParameterInCreate, settings.cfg_bulk_max_items, settings.cfg_bulk_max_record_size
+    )
+    try:
+        results = await repo.import_tm_parameters(items, mode)
+    except ConflictWhenInsert as err:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(err))
+    return bulk_response(results, rejected)
+
+
 @router.patch(
     "/telemetry/{parameter_id}",
     name="cfg:update-tm-parameter",
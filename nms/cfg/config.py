@@ -0,0 +1,24 @@
+from functools import lru_cache
+
+from nms.common.config import Settings
+
+
+class CfgSettings(Settings):
+    # кэш каталогов (см. nms.common.api.catalog_cache): максимальное количество записей,
+    # интервал повторного подключения для получения уведомлений об изменениях, сек.
+    cfg_catalog_cache_enabled: bool = True
+    cfg_catalog_cache_max_entries: int = 256
+    cfg_catalog_listen_retry_interval: float = 5.0
+    # пакетное добавление записей каталогов: максимальное количество элементов пакета,
+    # максимальный размер одного элемента (строки) NDJSON, байт
+    cfg_bulk_max_items: int = 100000
+    cfg_bulk_max_record_size: int = 64 * 1024
+    # выгрузка каталогов: количество записей, получаемых из курсора БД за одно обращение,
+    # максимальное количество одновременных выгрузок процесса (каждая занимает соединение пула БД), 0 - без ограничения
+    cfg_export_prefetch: int = 1000
+    cfg_export_max_concurrent: int = 4
+
+
+@lru_cache()
+def get_cfg_settings() -> CfgSettings:
+    return CfgSettings()
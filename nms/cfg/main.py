@@ -1,11 +1,16 @@
 import logging
 
 from nms.common.api.app import create_application
-from nms.common.config import DSNType, get_settings
-from nms.common.db.events import connect_to_db
+from nms.common.api.catalog_cache import CATALOG_CHANGED_CHANNEL, CatalogCache
+from nms.common.api.export import ExportLimiter
+from nms.common.config import DSNType
+from nms.common.db.events import connect_to_db, connect_to_replicas
+from nms.common.db.listener import NotificationListener
+from nms.common.db.queries.nms import queries_nms
 
 from . import version
 from .api.routes import commands, equipments, telemetry
+from .config import get_cfg_settings
 
 log = logging.getLogger("app")
 api_prefix = "/api/v1/cfg"
@@ -29,16 +34,39 @@ app.include_router(telemetry.router, prefix=api_prefix)
 async def startup_event():
     log.debug("Starting up...")
 
-    settings = get_settings()
+    settings = get_cfg_settings()
     log.debug(f"Connecting to {settings.db_nms_dsn}")
-    pool = await connect_to_db(repr(settings.db_nms_dsn))
+    pool = await connect_to_db(
+        repr(settings.db_nms_dsn),
+        settings.get_pool_settings(DSNType.NMS),
+        queries=queries_nms,
+    )
     app.state.core.register_connection_pool(DSNType.NMS, pool)
+    replicas = await connect_to_replicas(settings, DSNType.NMS, queries=queries_nms)
+    if replicas is not None:
+        app.state.core.register_replica_pools(DSNType.NMS, replicas)
     log.debug("Connection established")
+    app.state.export_limiter = ExportLimiter(settings.cfg_export_max_concurrent)
+
+    if settings.cfg_catalog_cache_enabled:
+        # кэш используется, пока получены уведомления об изменениях каталогов (основной сервер БД)
+        cache = CatalogCache(max_entries=settings.cfg_catalog_cache_max_entries)
+        app.state.catalog_cache = cache
+        app.state.catalog_listener = NotificationListener(
+            repr(settings.db_nms_dsn),
+            CATALOG_CHANGED_CHANNEL,
+            on_notify=cache.invalidate,
+            on_state=cache.set_enabled,
+            retry_interval=settings.cfg_catalog_listen_retry_interval,
+        )
+        app.state.catalog_listener.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     log.debug("Shutting down...")
+    if getattr(app.state, "catalog_listener", None) is not None:
+        await app.state.catalog_listener.stop()
     log.debug("Closing connections to database")
     await app.state.core.close_all_pools()
     log.debug("Connection closed")
@@ -0,0 +1,106 @@
+"""
+Тело запроса пакетного добавления записей: массив JSON или NDJSON (Content-Type: application/x-ndjson),
+элементы проверяются по отдельности, ошибки элементов возвращаются в результатах
+"""
+import json
+from typing import List, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+from nms.common.api.ndjson import NDJSON_MEDIA_TYPE, iter_ndjson_lines
+from nms.common.models.bulk import BulkImportResponse, BulkItemResult, BulkItemStatus
+
+ModelType = TypeVar("ModelType", bound=BaseModel)
+
+
+def bulk_description(model: Type[BaseModel]) -> str:
+    """Описание обработчика пакетного запроса (OpenAPI)"""
+    return (
+        f"Тело запроса: массив JSON или NDJSON ({NDJSON_MEDIA_TYPE}) элементов {model.__name__}. "
+        "Элементы проверяются по отдельности, принятые элементы добавляются в одной транзакции, "
+        "результат (или ошибки) возвращается для каждого элемента (line - номер элемента, начиная с 1)"
+    )
+
+
+def _validation_errors(line: int, err: ValidationError) -> List[dict]:
+    # ctx не возвращается: для ошибок разбора JSON он содержит всю строку
+    return [{"loc": ["body", line, *e["loc"]], "msg": e["msg"], "type": e["type"]} for e in err.errors()]
+
+
+def _too_many_items(max_items: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Bulk request must contain at most {max_items} items",
+    )
+
+
+async def read_bulk_items(
+    request: Request,
+    model: Type[ModelType],
+    max_items: int,
+    max_record_size: int,
+) -> Tuple[List[Tuple[int, ModelType]], List[BulkItemResult]]:
+    """
+    Элементы пакета из тела запроса
+    :param model: модель элемента
+    :param max_items: максимальное количество элементов (иначе - ответ 413)
+    :param max_record_size: максимальный размер строки NDJSON, байт
+    :return: принятые элементы (номер начиная с 1, элемент) и результаты отклоненных элементов
+    """
+    items = list()
+    rejected = list()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == NDJSON_MEDIA_TYPE:
+        count = 0
+        async for line_no, line in iter_ndjson_lines(request.stream(), max_record_size):
+            count += 1
+            if count > max_items:
+                raise _too_many_items(max_items)
+            if line is None:
+                errors = [{"loc": ["body", line_no], "msg": f"Record exceeds {max_record_size} bytes",
+                           "type": "value_error.record_size"}]
+                rejected.append(BulkItemResult(line=line_no, errors=errors))
+                continue
+            try:
+                items.append((line_no, model.parse_raw(line)))
+            except ValidationError as err:
+                rejected.append(BulkItemResult(line=line_no, errors=_validation_errors(line_no, err)))
+        return items, rejected
+
+    try:
+        values = json.loads(await request.body())
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON: {str(err)}")
+    if not isinstance(values, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Request body must be a JSON array or NDJSON ({NDJSON_MEDIA_TYPE})",
+        )
+    if len(values) > max_items:
+        raise _too_many_items(max_items)
+    for line_no, value in enumerate(values, start=1):
+        try:
+            items.append((line_no, model.parse_obj(value)))
+        except ValidationError as err:
+            rejected.append(BulkItemResult(line=line_no, errors=_validation_errors(line_no, err)))
+    return items, rejected
+
+
+def bulk_response(results: List[BulkItemResult], rejected: List[BulkItemResult]) -> BulkImportResponse:
+    """
+    Ответ на пакетный запрос
+    :param results: результаты принятых элементов (репозиторий)
+    :param rejected: результаты элементов, отклоненных при проверке (read_bulk_items)
+    """
+    response = BulkImportResponse(results=sorted(results + rejected, key=lambda r: r.line))
+    for result in response.results:
+        if result.status == BulkItemStatus.CREATED:
+            response.created += 1
+        elif result.status == BulkItemStatus.UPDATED:
+            response.updated += 1
+        elif result.status == BulkItemStatus.UNCHANGED:
+            response.unchanged += 1
+        else:
+            response.rejected += 1
+    return response
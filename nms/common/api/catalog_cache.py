@@ -0,0 +1,259 @@
+"""
+Кэш каталогов (оборудование, разделы и команды управления, ТМ-параметры) в памяти процесса сервиса.
+Изменения таблиц каталогов передаются триггерами БД NMS (pg_notify, канал CATALOG_CHANGED_CHANNEL),
+каждый процесс сервиса получает уведомления (NotificationListener) и не использует устаревшие записи
+"""
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from nms.common.api.conditional import is_not_modified, make_etag, validator_headers
+from nms.common.db.repositories.base import BaseRepository
+from nms.common.db.repositories.cfg.catalog import CatalogVersionsRepository
+
+# канал уведомлений об изменении таблиц каталогов, payload - имя таблицы
+CATALOG_CHANGED_CHANNEL = "nms_catalog_changed"
+
+
+class CatalogEntry:
+    __slots__ = ("value", "body", "generations", "etag", "last_modified")
+
+    def __init__(
+        self,
+        value: Any,
+        body: bytes,
+        generations: tuple,
+        etag: Optional[str] = None,
+        last_modified: Optional[datetime] = None,
+    ):
+        self.value = value
+        # JSON ответа, как при сериализации value обработчиком FastAPI
+        self.body = body
+        self.generations = generations
+        # валидаторы ответа: версии таблиц каталога, прочитанные до построения
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def response(self, request: Optional[Request] = None) -> Response:
+        """
+        :param request: запрос с If-None-Match / If-Modified-Since - ответ 304, если представление клиента актуально
+        """
+        if self.etag is None:
+            return Response(content=self.body, media_type=JSONResponse.media_type)
+        headers = validator_headers(self.etag, self.last_modified)
+        if request is not None and is_not_modified(request, self.etag, self.last_modified):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=self.body, media_type=JSONResponse.media_type, headers=headers)
+
+
+def catalog_entry(
+    value: Any,
+    generations: tuple = (),
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+) -> CatalogEntry:
+    return CatalogEntry(value, JSONResponse(jsonable_encoder(value)).body, generations, etag, last_modified)
+
+
+class CatalogCache:
+    """
+    Построенные каталоги и их JSON по ключу (LRU, не более max_entries записей).
+    Запись связана с таблицами (tags): уведомление об изменении таблицы увеличивает ее поколение,
+    записи, построенные для прежнего поколения, не используются. Одновременные запросы отсутствующей
+    записи ожидают одного построения.
+    Кэш используется, только пока получение уведомлений включено (set_enabled), иначе каталог
+    строится для каждого запроса
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._enabled = False
+        # при включении и выключении кэша все записи устаревают
+        self._epoch = 0
+        self._generations: Dict[str, int] = dict()
+        self._entries: OrderedDict[Hashable, CatalogEntry] = OrderedDict()
+        self._building: Dict[Tuple[Hashable, tuple], asyncio.Future] = dict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        self._enabled = enabled
+        self._epoch += 1
+        self._entries.clear()
+
+    def invalidate(self, tag: str) -> None:
+        self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def current(self, tags: Tuple[str, ...]) -> tuple:
+        """Поколения таблиц tags"""
+        return (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def peek(self, key: Hashable, tags: Tuple[str, ...]) -> Optional[CatalogEntry]:
+        """
+        Каталог из кэша без построения
+        :return: None - каталога нет в кэше или он устарел
+        """
+        if not self._enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry.generations != self.current(tags):
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    async def get(
+        self,
+        key: Hashable,
+        tags: Tuple[str, ...],
+        build: Callable[[], Awaitable[Any]],
+        generations: Optional[tuple] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[datetime] = None,
+    ) -> CatalogEntry:
+        """
+        Каталог из кэша или построенный build()
+        :param key: ключ каталога (включает параметры построения)
+        :param tags: таблицы, из которых строится каталог
+        :param build: построение каталога
+        :param generations: поколения таблиц (current) до чтения etag и last_modified: каталог не сохраняется,
+                            если таблицы изменились после их чтения
+        :param etag: ETag построенного каталога
+        :param last_modified: Last-Modified построенного каталога
+        :return: каталог и его JSON
+        """
+        if generations is None:
+            generations = self.current(tags)
+        if not self._enabled:
+            return catalog_entry(await build(), generations, etag, last_modified)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.generations == generations:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        building_key = (key, generations)
+        future = self._building.get(building_key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._build(key, tags, generations, build, etag, last_modified)
+            )
+            self._building[building_key] = future
+            future.add_done_callback(lambda f: self._build_done(building_key, f))
+        # построение продолжается для других запросов при отмене текущего
+        return await asyncio.shield(future)
+
+    async def _build(
+        self,
+        key: Hashable,
+        tags: Tuple[str, ...],
+        generations: tuple,
+        build: Callable[[], Awaitable[Any]],
+        etag: Optional[str],
+        last_modified: Optional[datetime],
+    ) -> CatalogEntry:
+        entry = catalog_entry(await build(), generations, etag, last_modified)
+        # таблицы могли измениться во время построения
+        if self._enabled and generations == self.current(tags):
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _build_done(self, building_key: tuple, future: asyncio.Future) -> None:
+        self._building.pop(building_key, None)
+        if not future.cancelled():
+            # ошибка передается ожидающим запросам, здесь - только отметка о получении
+            future.exception()
+
+
+class CatalogResponder:
+    """
+    Ответы с JSON каталогов для запроса: каталог из кэша или построенный, с валидаторами ETag
+    (ключ каталога и версии таблиц catalog_version) и Last-Modified (время последнего изменения таблиц).
+    Актуальному представлению клиента (If-None-Match / If-Modified-Since) соответствует ответ 304:
+    для каталога в кэше - без обращения к БД, иначе - после чтения версий таблиц, до построения каталога.
+    Каталог для кэша строится на основном сервере БД, без кэша - в соединении репозитория (может быть реплика)
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        cache: Optional[CatalogCache],
+        versions: CatalogVersionsRepository,
+    ):
+        """
+        :param cache: кэш каталогов, None - каталог строится без кэша
+        :param versions: репозиторий версий таблиц каталогов
+        """
+        self._request = request
+        self._cache = cache
+        self._versions = versions
+
+    async def respond(
+        self,
+        key: Hashable,
+        tags: Tuple[str, ...],
+        build: Callable[[], Awaitable[Any]],
+        repo: BaseRepository,
+    ) -> Response:
+        """
+        Ответ с каталогом (см. CatalogCache.get)
+        :param repo: репозиторий, используемый build()
+        """
+        cache = self._cache
+        if cache is None or not cache.enabled:
+            # без кэша каталог может быть прочитан с реплики: версии таблиц (ETag) и каталог читаются
+            # в одной транзакции только для чтения (один снимок данных), ETag соответствует каталогу
+            async with repo.transaction(read_only=True):
+                versions = CatalogVersionsRepository(repo.connection)
+                etag, last_modified = await self._validators(key, tags, versions)
+                if is_not_modified(self._request, etag, last_modified):
+                    return self._not_modified(etag, last_modified)
+                entry = catalog_entry(await build(), etag=etag, last_modified=last_modified)
+            return entry.response()
+
+        entry = cache.peek(key, tags)
+        if entry is not None:
+            return entry.response(self._request)
+        generations = cache.current(tags)
+
+        # кэш заполняется с основного сервера БД: каталог, построенный на реплике, может быть старше
+        # версий (ETag) или уведомления об изменении
+        self._versions.use_primary()
+        etag, last_modified = await self._validators(key, tags, self._versions)
+        if is_not_modified(self._request, etag, last_modified):
+            return self._not_modified(etag, last_modified)
+
+        repo.use_primary()
+        entry = await cache.get(key, tags, build, generations, etag, last_modified)
+        return entry.response()
+
+    @staticmethod
+    async def _validators(
+        key: Hashable, tags: Tuple[str, ...], versions: CatalogVersionsRepository
+    ) -> Tuple[str, Optional[datetime]]:
+        """:return: ETag и Last-Modified каталога по версиям таблиц"""
+        rows = await versions.get_catalog_versions(tags)
+        etag = make_etag(key, tuple((row["table_name"], row["version"]) for row in rows))
+        last_modified = max((row["update_dt"] for row in rows), default=None)
+        return etag, last_modified
+
+    @staticmethod
+    def _not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=validator_headers(etag, last_modified),
+        )
@@ -0,0 +1,85 @@
+"""
+Условные запросы HTTP (RFC 7232): валидаторы ETag и Last-Modified ответа,
+ответ 304 Not Modified на If-None-Match / If-Modified-Since
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """
+    Слабый ETag (W/"..."): хэш repr() частей, из которых получено представление
+    (вид и идентификатор записи, update_dt, версии таблиц каталога)
+    """
+    return 'W/"{}"'.format(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def entity_etag(kind: str, entity) -> str:
+    """ETag записи (id, update_dt)"""
+    return make_etag(kind, entity.id, entity.update_dt.astimezone(timezone.utc).isoformat())
+
+
+def http_date(dt: datetime) -> str:
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _etag_value(etag: str) -> str:
+    # слабое сравнение (RFC 7232, 2.3.2): признак W/ не учитывается
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Представление клиента актуально: If-None-Match содержит etag (или *),
+    либо, при отсутствии If-None-Match, last_modified не позже If-Modified-Since
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        value = _etag_value(etag)
+        return any(_etag_value(tag) == value for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        # некорректная дата не учитывается
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # точность даты HTTP - секунда
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """
+    Заголовки ETag, Last-Modified и Cache-Control: no-cache для ответа обработчика
+    :param response: ответ обработчика (параметр Response обработчика FastAPI)
+    :return: ответ 304 - представление клиента актуально, None - обработчик формирует ответ
+    """
+    headers = validator_headers(etag, last_modified)
+    if request.method in ("GET", "HEAD") and is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    for name, value in headers.items():
+        response.headers[name] = value
+    return None
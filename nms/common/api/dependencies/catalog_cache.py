@@ -0,0 +1,29 @@
+from typing import Optional
+
+from fastapi import Depends, Request
+
+from nms.common.api.catalog_cache import CatalogCache, CatalogResponder
+from nms.common.api.dependencies.database import (get_db_repository,
+                                                  is_read_only_request)
+from nms.common.db.repositories.cfg.catalog import CatalogVersionsRepository
+
+
+async def get_catalog_cache(request: Request) -> Optional[CatalogCache]:
+    """
+    Кэш каталогов сервиса (app.state.catalog_cache).
+    None - кэш не настроен или запрос читает свои изменения (см. is_read_only_request)
+    """
+    cache = getattr(request.app.state, "catalog_cache", None)
+    if cache is None or not is_read_only_request(request):
+        return None
+    return cache
+
+
+async def get_catalog_responder(
+    request: Request,
+    cache: Optional[CatalogCache] = Depends(get_catalog_cache),
+    versions: CatalogVersionsRepository = Depends(
+        get_db_repository(CatalogVersionsRepository)
+    ),
+) -> CatalogResponder:
+    return CatalogResponder(request, cache, versions)
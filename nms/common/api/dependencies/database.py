@@ -1,37 +1,56 @@
-from typing import TYPE_CHECKING, AsyncGenerator, Callable, Type
+from typing import TYPE_CHECKING, Callable, Type
 
 if TYPE_CHECKING:
     from nms.common.service import CoreService
 
-from asyncpg.connection import Connection as PgConnection
-from asyncpg.pool import Pool as PgPool
 from fastapi import Depends, Request, WebSocket
 
-from nms.common.config import DSNType
+from nms.common.config import DSNType, get_settings
+from nms.common.db.pool import RepositoryConnections
 from nms.common.db.repositories.base import BaseRepository
 
+# запросы, обработчики которых только читают данные: выполняются на репликах БД (если заданы)
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+
+def is_read_only_request(request: Request) -> bool:
+    """
+    Запрос только читает данные и может быть выполнен на реплике БД.
+    Заголовок db_read_primary_header направляет чтение на основной сервер (чтение своих изменений)
+    """
+    return request.method in READ_ONLY_METHODS and not request.headers.get(
+        get_settings().db_read_primary_header
+    )
+
 
 class RepositoryConnectionRouter:
+    """
+    Источник соединений для репозиториев: соединение получается при вызове метода репозитория,
+    а не на время обработки запроса (см. BaseRepository)
+    """
+
     def __init__(self, repo_type: Type[BaseRepository]):
         self.dsn_type = repo_type.dsn_type()  # type: DSNType
 
     async def __call__(
         self, request: Request = None, websocket: WebSocket = None
-    ) -> AsyncGenerator[PgConnection, None]:
+    ) -> RepositoryConnections:
         core_service = (
             request.app.state.core if request else websocket.app.state.core
         )  # type: CoreService
-        pool = core_service.get_connection_pool(self.dsn_type)  # type: PgPool
-        async with pool.acquire() as conn:
-            yield conn
+        pool = core_service.get_connection_pool(self.dsn_type)
+        replicas = None
+        if request is not None and is_read_only_request(request):
+            replicas = core_service.get_replica_pools(self.dsn_type)
+        return RepositoryConnections(pool, replicas)
 
 
 def get_db_repository(
     repo_type: Type[BaseRepository],
-) -> Callable[[PgConnection], BaseRepository]:
+) -> Callable[[RepositoryConnections], BaseRepository]:
     def get_repo(
-        conn: PgConnection = Depends(RepositoryConnectionRouter(repo_type)),
+        connections: RepositoryConnections = Depends(RepositoryConnectionRouter(repo_type)),
     ) -> BaseRepository:
-        return repo_type(conn)
+        return repo_type(connections)
 
     return get_repo
@@ -0,0 +1,10 @@
+from typing import Optional
+
+from fastapi import Request
+
+from nms.common.api.export import ExportLimiter
+
+
+async def get_export_limiter(request: Request) -> Optional[ExportLimiter]:
+    """Ограничение количества одновременных выгрузок сервиса (app.state.export_limiter), None - не настроено"""
+    return getattr(request.app.state, "export_limiter", None)
@@ -4,4 +4,8 @@ from starlette.responses import JSONResponse
 
 
 async def http_error_handler(_: Request, exc: HTTPException) -> JSONResponse:
-    return JSONResponse({"errors": [exc.detail]}, status_code=exc.status_code)
+    return JSONResponse(
+        {"errors": [exc.detail]},
+        status_code=exc.status_code,
+        headers=getattr(exc, "headers", None),
+    )
@@ -0,0 +1,181 @@
+"""
+Выгрузка каталогов потоком (StreamingResponse): строки NDJSON или CSV формируются по мере чтения записей
+из курсора БД и передаются фрагментами, в памяти - не более одного фрагмента и prefetch записей курсора.
+Сжатие (Accept-Encoding: gzip) выполняет GZipMiddleware приложения для каждого фрагмента.
+Выгрузка занимает соединение с БД (транзакцию курсора) до завершения передачи ответа: количество одновременных
+выгрузок ограничено (ExportLimiter), курсор закрывается и при разрыве соединения клиентом
+"""
+import csv
+import io
+from typing import AsyncIterator, Mapping, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from nms.common.api.ndjson import NDJSON_MEDIA_TYPE
+from nms.common.db.codecs import json_encoder
+from nms.common.models.export import ExportFormat
+
+CSV_MEDIA_TYPE = "text/csv"
+
+# размер фрагмента ответа, символов
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class ExportLimiter:
+    """
+    Ограничение количества одновременных выгрузок: медленный клиент занимает соединение пула БД
+    на все время передачи ответа, выгрузки не должны занимать весь пул
+    """
+
+    def __init__(self, max_concurrent: int):
+        """
+        :param max_concurrent: максимальное количество одновременных выгрузок, 0 - без ограничения
+        """
+        self._max_concurrent = max_concurrent
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def acquire(self) -> None:
+        """
+        Начало выгрузки
+        :raise HTTPException: 503, выполняется максимальное количество выгрузок
+        """
+        if self._max_concurrent and self._active >= self._max_concurrent:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent exports",
+                headers={"Retry-After": "5"},
+            )
+        self._active += 1
+
+    def release(self) -> None:
+        """Завершение выгрузки"""
+        self._active -= 1
+
+
+class _ExportResponse(StreamingResponse):
+    """
+    StreamingResponse закрывает генератор фрагментов (курсор и соединение с БД) и завершает выгрузку (ExportLimiter)
+    по окончании передачи, в том числе при разрыве соединения клиентом: starlette не закрывает генератор,
+    остановленный на передаче фрагмента
+    """
+
+    def __init__(self, content: AsyncIterator[bytes], limiter: Optional[ExportLimiter], **kwargs):
+        super().__init__(content, **kwargs)
+        self._limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                if self._limiter is not None:
+                    self._limiter.release()
+
+
+async def _aclose(iterator: AsyncIterator) -> None:
+    # async for не закрывает итератор: асинхронный генератор записей (курсор и соединение) закрывается явно
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+def _csv_value(value):
+    # объекты и массивы (jsonb) - текст JSON, None - пустое значение
+    if isinstance(value, (dict, list)):
+        return json_encoder(value)
+    return value
+
+
+async def iter_export(
+    rows: AsyncIterator[Mapping],
+    columns: Tuple[str, ...],
+    export_format: ExportFormat,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Фрагменты выгрузки
+    :param rows: записи (курсор БД)
+    :param columns: поля записей в выгрузке
+    :param export_format: ndjson - строка на запись, csv - строка заголовка и строка на запись
+    :param chunk_size: размер фрагмента, символов
+    """
+    buffer = io.StringIO()
+    writer = None
+    if export_format == ExportFormat.CSV:
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+    try:
+        async for row in rows:
+            if writer is not None:
+                writer.writerow([_csv_value(row[column]) for column in columns])
+            else:
+                buffer.write(json_encoder({column: row[column] for column in columns}))
+                buffer.write("\n")
+            if buffer.tell() >= chunk_size:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    finally:
+        await _aclose(rows)
+
+
+async def export_response(
+    rows: AsyncIterator[Mapping],
+    columns: Tuple[str, ...],
+    export_format: ExportFormat,
+    filename: str,
+    limiter: Optional[ExportLimiter] = None,
+) -> StreamingResponse:
+    """
+    Ответ с выгрузкой (Content-Disposition: attachment)
+    :param rows: записи (асинхронный генератор, закрывается по завершении или разрыве передачи ответа)
+    :param filename: имя файла выгрузки без расширения
+    :param limiter: ограничение количества одновременных выгрузок
+    :raise HTTPException: 503, выполняется максимальное количество выгрузок
+    """
+    if limiter is not None:
+        try:
+            limiter.acquire()
+        except HTTPException:
+            # генератор не начат: соединение с БД не получено
+            await _aclose(rows)
+            raise
+    chunks = iter_export(rows, columns, export_format)
+    # первый фрагмент читается до ответа: ошибка получения соединения или выполнения запроса
+    # возвращается статусом ответа, а не обрывом переданного ответа
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except BaseException:
+        await chunks.aclose()
+        if limiter is not None:
+            limiter.release()
+        raise
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            if first:
+                yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    media_type = CSV_MEDIA_TYPE if export_format == ExportFormat.CSV else NDJSON_MEDIA_TYPE
+    return _ExportResponse(
+        body(),
+        limiter,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
@@ -1,17 +1,164 @@
-import gzip
-from typing import Callable
+import zlib
+from typing import AsyncIterator, Callable, Optional
 
-from fastapi import Request, Response
+from fastapi import HTTPException, Request, Response, status
 from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from nms.common.config import get_settings
+
+try:
+    import zstandard
+except ImportError:  # поддержка zstd - опционально
+    zstandard = None
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int):
+        self._wbits = wbits
+        self._decompressor = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        result = self._decompressor.decompress(data, max_length)
+        # gzip допускает несколько последовательных блоков (members) в одном потоке
+        while self._decompressor.eof and self._decompressor.unused_data and len(result) < max_length:
+            data = self._decompressor.unused_data
+            self._decompressor = zlib.decompressobj(self._wbits)
+            result += self._decompressor.decompress(data, max_length - len(result))
+        return result
+
+    def flush(self) -> bytes:
+        if not self._decompressor.eof:
+            raise zlib.error("Incomplete compressed data")
+        return self._decompressor.flush()
+
+
+class _LimitExceeded(Exception):
+    pass
+
+
+class _BoundedOutput:
+    """Приемник распакованных данных zstd: прерывает распаковку, как только получено max_length байт"""
+
+    def __init__(self):
+        self.max_length = 0
+        self._chunks = list()
+        self._size = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        if self._size >= self.max_length:
+            raise _LimitExceeded()
+        return len(data)
+
+    def take(self) -> bytes:
+        result = b"".join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        return result
+
+
+class _ZstdDecoder:
+    def __init__(self):
+        # stream_writer передает распакованные данные приемнику фрагментами (не более write_size),
+        # decompressobj распаковал бы входной фрагмент полностью, без ограничения размера результата
+        self._output = _BoundedOutput()
+        self._writer = zstandard.ZstdDecompressor().stream_writer(self._output)
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        self._output.max_length = max_length
+        try:
+            self._writer.write(data)
+        except _LimitExceeded:
+            pass
+        return self._output.take()
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _get_decoder(encoding: str):
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _ZlibDecoder(zlib.MAX_WBITS)
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Unsupported Content-Encoding: {encoding}",
+    )
 
 
 class GzipRequest(Request):
+    @property
+    def content_encoding(self) -> Optional[str]:
+        encodings = [
+            encoding.strip().lower()
+            for value in self.headers.getlist("Content-Encoding")
+            for encoding in value.split(",")
+            if encoding.strip() and encoding.strip().lower() != "identity"
+        ]
+        if len(encodings) > 1:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Multiple Content-Encoding values are not supported",
+            )
+        return encodings[0] if encodings else None
+
+    async def stream_decoded(self) -> AsyncIterator[bytes]:
+        """
+        Тело запроса по частям, по мере поступления от клиента, с распаковкой (gzip, deflate, zstd).
+        Размер тела после распаковки ограничен настройкой request_max_body_size,
+        распаковка больших запросов (request_decompress_offload_size по Content-Length или, для передачи
+        без Content-Length, по объему уже полученных сжатых данных) выполняется в отдельном потоке
+        """
+        if hasattr(self, "_body"):
+            yield self._body
+            return
+
+        settings = get_settings()
+        encoding = self.content_encoding
+        decoder = _get_decoder(encoding) if encoding else None
+        offload = (
+            decoder is not None
+            and int(self.headers.get("Content-Length") or 0)
+            >= settings.request_decompress_offload_size
+        )
+
+        size = received = 0
+        try:
+            async for chunk in self.stream():
+                if decoder is not None and chunk:
+                    received += len(chunk)
+                    offload = offload or received >= settings.request_decompress_offload_size
+                    max_length = settings.request_max_body_size - size + 1
+                    if offload:
+                        chunk = await run_in_threadpool(decoder.decompress, chunk, max_length)
+                    else:
+                        chunk = decoder.decompress(chunk, max_length)
+                size += len(chunk)
+                if size > settings.request_max_body_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Request body exceeds {settings.request_max_body_size} bytes",
+                    )
+                if chunk:
+                    yield chunk
+            if decoder is not None:
+                chunk = decoder.flush()
+                if chunk:
+                    yield chunk
+        except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)) as err:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid {encoding} compressed body: {str(err)}",
+            )
+
     async def body(self) -> bytes:
         if not hasattr(self, "_body"):
-            body = await super().body()
-            if "gzip" in self.headers.getlist("Content-Encoding"):
-                body = gzip.decompress(body)
-            self._body = body
+            self._body = b"".join([chunk async for chunk in self.stream_decoded()])
         return self._body
 
 
@@ -21,6 +168,11 @@ class GzipRoute(APIRoute):
 
         async def custom_route_handler(request: Request) -> Response:
             request = GzipRequest(request.scope, request.receive)
+            if self.body_field is not None:
+                # тело читается до разбора параметров: FastAPI заменяет любую ошибку чтения тела
+                # ответом 400 "There was an error parsing the body", ответы 413, 415 и 400 распаковки
+                # передаются клиенту отсюда
+                await request.body()
             return await original_route_handler(request)
 
         return custom_route_handler
@@ -0,0 +1,46 @@
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterable[bytes], max_line_size: int
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Строки NDJSON из потока фрагментов тела запроса, по мере их поступления.
+    В памяти хранится не более одной строки; пустые строки пропускаются
+    :param chunks: фрагменты тела запроса
+    :param max_line_size: максимальная длина строки, байт
+    :return: пары (номер строки начиная с 1, содержимое строки или None, если строка длиннее max_line_size)
+    """
+    buffer = bytearray()
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_size:
+                        # остаток слишком длинной строки пропускается до ближайшего перевода строки
+                        oversized = True
+                        buffer.clear()
+                break
+            line_no += 1
+            if oversized:
+                yield line_no, None
+            else:
+                buffer += chunk[start:end]
+                line = bytes(buffer).strip()
+                if len(buffer) > max_line_size:
+                    yield line_no, None
+                elif line:
+                    yield line_no, line
+            buffer.clear()
+            oversized = False
+            start = end + 1
+    if oversized or buffer.strip():
+        line_no += 1
+        yield line_no, None if oversized else bytes(buffer).strip()
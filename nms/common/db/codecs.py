@@ -0,0 +1,93 @@
+"""
+Кодеки типов PostgreSQL для соединений asyncpg (см. init_connection)
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson - опционально, без него используется json
+    orjson = None
+
+# начало отсчета timestamptz в PostgreSQL
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# смещение местного часового пояса определяется один раз для каждых суток (UTC):
+# PG_EPOCH в местном часовом поясе по номеру суток, None - в течение суток смещение меняется
+_LOCAL_TZ_DAY_US = 86400 * 1000000
+_local_pg_epochs: Dict[int, Optional[datetime]] = dict()
+
+
+def _local_pg_epoch(day: int) -> Optional[datetime]:
+    """
+    PG_EPOCH в местном часовом поясе, действующем на протяжении суток day
+    :return: None - в течение суток смещение местного часового пояса меняется
+    """
+    start = PG_EPOCH + timedelta(microseconds=day * _LOCAL_TZ_DAY_US)
+    end = start + timedelta(microseconds=_LOCAL_TZ_DAY_US - 1)
+    tz, end_tz = start.astimezone().tzinfo, end.astimezone().tzinfo
+    # timezone.__eq__ сравнивает только смещение
+    if (end_tz.utcoffset(None), end_tz.tzname(None)) != (tz.utcoffset(None), tz.tzname(None)):
+        local_epoch = None
+    else:
+        local_epoch = PG_EPOCH.astimezone(tz)
+    _local_pg_epochs[day] = local_epoch
+    return local_epoch
+
+
+def tstz_encoder(tstz: datetime) -> tuple:
+    """
+    timestamptz: микросекунды от PG_EPOCH (naive datetime - в местном времени)
+    """
+    if tstz.tzinfo is None:
+        tstz = tstz.astimezone()
+    return ((tstz - PG_EPOCH) // _MICROSECOND,)
+
+
+def tstz_decoder(tup: tuple) -> datetime:
+    """
+    timestamptz: datetime в местном часовом поясе (как datetime.astimezone())
+    """
+    microseconds = tup[0]
+    day = microseconds // _LOCAL_TZ_DAY_US
+    try:
+        local_epoch = _local_pg_epochs[day]
+    except KeyError:
+        local_epoch = _local_pg_epoch(day)
+    if local_epoch is None:
+        return (PG_EPOCH + timedelta(microseconds=microseconds)).astimezone()
+    return local_epoch + timedelta(microseconds=microseconds)
+
+
+# целые числа, которые orjson не может представить точно (более 64 бит), разбираются json:
+# цифры документа заменяются нулями и выполняется поиск последовательности из 20 цифр
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"000000000")
+_LONG_NUMBER = b"0" * 20
+
+
+def json_encoder(value) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                value,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS,
+            ).decode()
+        except TypeError:
+            # типы, которые orjson не сериализует так же, как json (или вовсе)
+            pass
+    return json.dumps(value)
+
+
+def json_decoder(data: str):
+    if orjson is not None:
+        try:
+            encoded = data.encode()
+            if _LONG_NUMBER not in encoded.translate(_DIGITS_TO_ZERO):
+                return orjson.loads(encoded)
+        except ValueError:
+            pass
+    return json.loads(data)
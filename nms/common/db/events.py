@@ -1,24 +1,37 @@
-import json
-from datetime import datetime, timedelta, timezone
+import logging
+import re
+from typing import Iterable, List, Optional
 
 import asyncpg
-from asyncpg.pool import Pool
+from aiosql.types import SQLOperationType
+from asyncpg import PostgresError
 
+from nms.common.config import DSNType, PoolSettings, Settings
+from nms.common.db.codecs import (json_decoder, json_encoder, tstz_decoder,
+                                  tstz_encoder)
+from nms.common.db.pool import ObservedPool, ReplicaPools
+
+log = logging.getLogger("app")
+
+# запросы, подготавливаемые при открытии соединения: частые выборки записей по ключу
+# (параметры null не соответствуют ни одной записи), не более нескольких процентов statement_cache_size
+PREPARED_QUERIES = (
+    "get_catalog_versions",
+    "get_equipment_by_id",
+    "get_equipment_by_name",
+    "get_commands_toc_by_id",
+    "get_command_by_id",
+    "get_command_by_name",
+    "get_tm_parameter_by_id",
+    "get_tm_parameter_by_name",
+)
+
+_TEMP_TABLE_RE = re.compile(r"create\s+(?:temporary|temp)\s+table\s+(?:if\s+not\s+exists\s+)?(\w+)", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+_PARAM_RE = re.compile(r"\$(\d+)")
 
-async def init_connection(conn):
-    def tstz_encoder(tstz):
-        return [
-            (
-                tstz.astimezone() - datetime(2000, 1, 1, tzinfo=timezone.utc)
-            ).total_seconds()
-            * 1000000
-        ]
-
-    def tstz_decoder(tup):
-        return (
-            datetime(2000, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=tup[0])
-        ).astimezone()
 
+async def init_connection(conn):
     # https://github.com/MagicStack/asyncpg/issues/140
     # https://github.com/MagicStack/asyncpg/issues/221
     await conn.set_type_codec(
@@ -29,15 +42,124 @@ async def init_connection(conn):
         schema="pg_catalog",
     )
     await conn.set_type_codec(
-        "jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        "jsonb", encoder=json_encoder, decoder=json_decoder, schema="pg_catalog"
     )
     await conn.set_type_codec(
-        "json", encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        "json", encoder=json_encoder, decoder=json_decoder, schema="pg_catalog"
     )
 
 
-async def connect_to_db(dsn: str) -> Pool:
+def queries_statements(queries, names: Iterable[str] = PREPARED_QUERIES) -> List[str]:
+    """
+    Тексты запросов aiosql, подготавливаемых при открытии соединения (без повторов).
+    Сценарии (#) и запросы к временным таблицам (create temporary table в запросах aiosql) не подготавливаются
+    :param queries: запросы aiosql (aiosql.from_path, aiosql.from_str)
+    :param names: имена запросов выборки по ключу (выполняются с параметрами null, см. prepare_statements)
+    :return: тексты запросов
+    """
+    temp_tables = {
+        table.lower()
+        for name in queries.available_queries
+        for table in _TEMP_TABLE_RE.findall(getattr(getattr(queries, name, None), "sql", None) or "")
+    }
+    statements = dict()
+    for name in names:
+        query = getattr(queries, name, None)
+        sql = getattr(query, "sql", None)
+        # тип операции запроса сохраняется aiosql начиная с 3.3, в предыдущих версиях сценарии
+        # bulk.sql (create temporary table, analyze) исключаются проверкой временных таблиц
+        if not sql or getattr(query, "operation", None) == SQLOperationType.SCRIPT:
+            log.warning(f"Query {name} is not found or can not be prepared")
+            continue
+        if temp_tables.intersection(word.lower() for word in _WORD_RE.findall(sql)):
+            log.warning(f"Query {name} uses temporary tables and can not be prepared")
+            continue
+        statements.setdefault(sql.strip(), None)
+    return list(statements)
+
+
+async def prepare_statements(conn, statements: List[str]) -> None:
+    """
+    Подготовка запросов в кэше соединения, используемом fetch/execute (Connection.prepare кэш не использует,
+    кэш заполняется выполнением запроса): запрос выполняется с параметрами null и не возвращает записей
+    """
+    for sql in statements:
+        params = max((int(n) for n in _PARAM_RE.findall(sql)), default=0)
+        try:
+            await conn.fetch(sql, *([None] * params))
+        except PostgresError as err:
+            log.warning(f"Failed to prepare statement: {str(err)}\n{sql}")
+
+
+async def connect_to_db(
+    dsn: str, pool_settings: Optional[PoolSettings] = None, queries=None
+) -> ObservedPool:
+    """
+    Пул соединений с БД
+    :param dsn: строка подключения
+    :param pool_settings: параметры пула
+    :param queries: запросы aiosql, PREPARED_QUERIES подготавливаются при открытии соединения
+                    (если pool_settings.prepare_statements)
+    :return: пул соединений со статистикой использования
+    """
+    pool_settings = pool_settings or PoolSettings()
+    statements = list()
+    if queries is not None and pool_settings.prepare_statements:
+        statements = queries_statements(queries)
+
+    async def init(conn):
+        await init_connection(conn)
+        await prepare_statements(conn, statements)
+
     connection_pool = await asyncpg.create_pool(
-        dsn, min_size=10, max_size=10, init=init_connection
+        dsn,
+        min_size=pool_settings.min_size,
+        max_size=pool_settings.max_size,
+        max_queries=pool_settings.max_queries,
+        max_inactive_connection_lifetime=pool_settings.max_inactive_connection_lifetime,
+        statement_cache_size=pool_settings.statement_cache_size,
+        command_timeout=pool_settings.command_timeout,
+        init=init,
+    )
+    return ObservedPool(connection_pool, pool_settings)
+
+
+async def connect_to_replicas(
+    settings: Settings, dsn_type: DSNType, queries=None
+) -> Optional[ReplicaPools]:
+    """
+    Пулы соединений с репликами БД (settings.get_replica_dsns).
+    Для реплики, недоступной при старте сервиса, создается пул без открытых соединений,
+    реплика исключается из выбора на db_replica_retry_interval
+    :param settings: настройки сервиса
+    :param dsn_type: тип БД
+    :param queries: запросы aiosql, подготавливаемые при открытии соединения
+    :return: None - реплики не заданы
+    """
+    dsns = settings.get_replica_dsns(dsn_type)
+    if not dsns:
+        return None
+
+    pool_settings = settings.get_pool_settings(dsn_type)
+    pools = list()
+    failed = list()
+    for dsn in dsns:
+        log.debug(f"Connecting to replica {dsn}")
+        try:
+            pool = await connect_to_db(repr(dsn), pool_settings, queries=queries)
+        except (OSError, PostgresError) as err:
+            pool = await connect_to_db(
+                repr(dsn), pool_settings.copy(update={"min_size": 0}), queries=queries
+            )
+            failed.append((pool, err))
+        pools.append(pool)
+
+    replicas = ReplicaPools(
+        pools,
+        selection=settings.db_replica_selection,
+        acquire_timeout=settings.db_replica_acquire_timeout,
+        retry_interval=settings.db_replica_retry_interval,
     )
-    return connection_pool
+    for pool, err in failed:
+        replicas.mark_failed(pool, err)
+    return replicas
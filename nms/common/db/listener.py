@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+import asyncpg
+from asyncpg import PostgresError
+
+log = logging.getLogger("app")
+
+
+class NotificationListener:
+    """
+    Получение уведомлений PostgreSQL (LISTEN channel) в отдельном соединении, вне пула.
+    Соединение проверяется каждые keepalive_interval секунд, при разрыве - повторное подключение
+    через retry_interval секунд. on_state(True) вызывается после подписки на уведомления,
+    on_state(False) - при разрыве соединения (уведомления могут быть пропущены)
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        on_notify: Callable[[str], None],
+        on_state: Callable[[bool], None],
+        retry_interval: float = 5.0,
+        keepalive_interval: float = 30.0,
+    ):
+        self._dsn = dsn
+        self._channel = channel
+        self._on_notify = on_notify
+        self._on_state = on_state
+        self._retry_interval = retry_interval
+        self._keepalive_interval = keepalive_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _notify(self, conn, pid: int, channel: str, payload: str) -> None:
+        self._on_notify(payload)
+
+    async def _listen(self) -> None:
+        conn = await asyncpg.connect(self._dsn)
+        try:
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _: closed.set())
+            await conn.add_listener(self._channel, self._notify)
+            log.debug(f"Listening to {self._channel}")
+            self._on_state(True)
+            while not closed.is_set():
+                try:
+                    await asyncio.wait_for(closed.wait(), timeout=self._keepalive_interval)
+                except asyncio.TimeoutError:
+                    await conn.fetchval("select 1", timeout=self._keepalive_interval)
+        finally:
+            self._on_state(False)
+            if not conn.is_closed():
+                conn.terminate()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError, PostgresError, asyncpg.InterfaceError) as err:
+                log.warning(f"Listening to {self._channel} failed: {err.__class__.__name__}: {str(err)}")
+            except Exception:
+                log.exception(f"Listening to {self._channel} failed")
+            await asyncio.sleep(self._retry_interval)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from asyncpg import InterfaceError, PostgresError
+from asyncpg.connection import Connection
+from asyncpg.pool import Pool
+
+from nms.common.config import DSNType, PoolSettings, ReplicaSelection
+from nms.common.models.service import PoolStats
+
+log = logging.getLogger("app")
+
+# верхние границы интервалов гистограммы времени ожидания соединения, мс
+ACQUIRE_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class _ObservedAcquire:
+    def __init__(self, pool: "ObservedPool", timeout):
+        self._pool = pool
+        self._timeout = timeout
+        self._conn = None
+
+    async def __aenter__(self) -> Connection:
+        pool = self._pool
+        started = time.perf_counter()
+        pool.waiters += 1
+        try:
+            self._conn = await pool.pool.acquire(timeout=self._timeout)
+        finally:
+            pool.waiters -= 1
+        pool.register_acquire((time.perf_counter() - started) * 1000)
+        return self._conn
+
+    async def __aexit__(self, *exc):
+        self._pool.in_use -= 1
+        await self._pool.pool.release(self._conn)
+
+
+class ObservedPool:
+    """
+    Пул соединений asyncpg со статистикой использования: количество выданных соединений,
+    ожидающих получения соединения и гистограмма времени ожидания (см. PoolStats)
+    """
+
+    def __init__(self, pool: Pool, settings: PoolSettings):
+        self.pool = pool
+        self.settings = settings
+        self.in_use = 0
+        self.waiters = 0
+        self.acquired = 0
+        self.acquire_wait_max_ms = 0.0
+        self._acquire_wait_hist = [0] * (len(ACQUIRE_WAIT_BUCKETS_MS) + 1)
+
+    def acquire(self, *, timeout=None) -> _ObservedAcquire:
+        return _ObservedAcquire(self, timeout)
+
+    def register_acquire(self, wait_ms: float) -> None:
+        self.in_use += 1
+        self.acquired += 1
+        self._acquire_wait_hist[bisect_left(ACQUIRE_WAIT_BUCKETS_MS, wait_ms)] += 1
+        self.acquire_wait_max_ms = max(self.acquire_wait_max_ms, wait_ms)
+
+    def get_size(self) -> int:
+        if hasattr(self.pool, "get_size"):
+            return self.pool.get_size()
+        # asyncpg < 0.25
+        return sum(
+            1
+            for holder in self.pool._holders  # noqa
+            if holder._con is not None and not holder._con.is_closed()  # noqa
+        )
+
+    def load(self) -> float:
+        """Доля занятых соединений пула с учетом ожидающих получения соединения"""
+        return (self.in_use + self.waiters) / max(self.settings.max_size, 1)
+
+    def stats(self, dsn_type: DSNType, replica: bool = False) -> PoolStats:
+        size = self.get_size()
+        labels = [str(bucket) for bucket in ACQUIRE_WAIT_BUCKETS_MS] + ["inf"]
+        return PoolStats(
+            dsn_type=dsn_type.name,
+            replica=replica,
+            min_size=self.settings.min_size,
+            max_size=self.settings.max_size,
+            size=size,
+            in_use=self.in_use,
+            idle=max(size - self.in_use, 0),
+            waiters=self.waiters,
+            acquired=self.acquired,
+            acquire_wait_ms=dict(zip(labels, self._acquire_wait_hist)),
+            acquire_wait_max_ms=round(self.acquire_wait_max_ms, 3),
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+
+class ReplicaPools:
+    """
+    Пулы соединений реплик БД (только чтение): выбор реплики (см. ReplicaSelection)
+    и исключение недоступных реплик на retry_interval секунд.
+    Если доступных реплик нет, соединение получается из пула основного сервера (см. RepositoryConnectionRouter)
+    """
+
+    def __init__(
+        self,
+        pools: List[ObservedPool],
+        selection: ReplicaSelection,
+        acquire_timeout: float,
+        retry_interval: float,
+    ):
+        self.pools = pools
+        self._selection = selection
+        self._acquire_timeout = acquire_timeout
+        self._retry_interval = retry_interval
+        self._next = 0
+        self._failed_until = [0.0] * len(pools)
+
+    def select(self) -> Optional[ObservedPool]:
+        now = time.monotonic()
+        healthy = [
+            pool
+            for pool, failed_until in zip(self.pools, self._failed_until)
+            if failed_until <= now
+        ]
+        if not healthy:
+            return None
+        # очередь сдвигается при каждом выборе: при равной загрузке реплики выбираются по очереди
+        start = self._next % len(healthy)
+        self._next += 1
+        healthy = healthy[start:] + healthy[:start]
+        if self._selection == ReplicaSelection.ROUND_ROBIN:
+            return healthy[0]
+        return min(healthy, key=ObservedPool.load)
+
+    def mark_failed(self, pool: ObservedPool, err: Exception) -> None:
+        index = self.pools.index(pool)
+        self._failed_until[index] = time.monotonic() + self._retry_interval
+        log.warning(
+            f"Replica #{index} is unavailable for {self._retry_interval} s: {err.__class__.__name__}: {str(err)}"
+        )
+
+    async def acquire(self, stack: AsyncExitStack) -> Optional[Connection]:
+        """
+        Соединение с репликой, освобождается при закрытии stack
+        :return: None - нет доступных реплик или соединение не получено за acquire_timeout
+        """
+        pool = self.select()
+        if pool is None:
+            return None
+        try:
+            return await stack.enter_async_context(pool.acquire(timeout=self._acquire_timeout))
+        except asyncio.TimeoutError:
+            # реплика доступна, но все соединения заняты
+            return None
+        except (OSError, PostgresError, InterfaceError) as err:
+            self.mark_failed(pool, err)
+            return None
+
+    def stats(self, dsn_type: DSNType) -> List[PoolStats]:
+        return [pool.stats(dsn_type, replica=True) for pool in self.pools]
+
+    async def close(self) -> None:
+        for pool in self.pools:
+            await pool.close()
+
+
+class RepositoryConnections:
+    """
+    Источник соединений репозитория (см. BaseRepository): пул основного сервера и,
+    если разрешено чтение с реплик, пулы реплик.
+    После первого вызова, изменяющего данные, чтение также выполняется на основном сервере
+    """
+
+    def __init__(self, pool: ObservedPool, replicas: Optional[ReplicaPools] = None):
+        self._pool = pool
+        self._replicas = replicas
+
+    def use_primary(self) -> None:
+        """Все следующие соединения - из пула основного сервера"""
+        self._replicas = None
+
+    @asynccontextmanager
+    async def acquire(self, read_only: bool) -> AsyncIterator[Connection]:
+        if not read_only:
+            self._replicas = None
+        async with AsyncExitStack() as stack:
+            conn = None
+            if self._replicas is not None:
+                conn = await self._replicas.acquire(stack)
+            if conn is None:
+                conn = await stack.enter_async_context(self._pool.acquire())
+            yield conn
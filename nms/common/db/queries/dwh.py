@@ -0,0 +1,8 @@
+from pathlib import Path
+
+import aiosql
+
+queries_dwh = aiosql.from_path(
+    sql_path=Path(__file__).parent / "dwh",
+    driver_adapter="asyncpg",
+)
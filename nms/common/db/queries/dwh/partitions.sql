@@ -0,0 +1,6 @@
+-- name: create_daily_partitions$
+select create_daily_partitions(:table_name, :from_date, :days);
+
+
+-- name: drop_daily_partitions$
+select drop_daily_partitions(:table_name, :before_date);
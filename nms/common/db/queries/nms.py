@@ -1,4 +1,6 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import Tuple
 
 import aiosql
 
@@ -24,23 +26,74 @@ queries_nms = aiosql.from_path(
 )
 
 
-def build_queries_search_commands_catalog(filters: list[str]):
+# поиск по началу обозначения: диапазон значений индекса lower(name) text_pattern_ops (побайтовое сравнение),
+# в отличие от like с параметром, используется и в общем плане подготовленного запроса
+NAME_PREFIX_FILTER = "lower({name}) ~>=~ lower(:name_prefix) and lower({name}) ~<~ (lower(:name_prefix) || chr(1114111))"
+
+
+def text_filter(fields: Tuple[str, ...]) -> str:
+    """Условие поиска по сходству (pg_trgm, индексы gin_trgm_ops): :text похоже на слово (фрагмент) одного из полей"""
+    return "({})".format(" or ".join(f":text <% {field}" for field in fields))
+
+
+def text_rank(fields: Tuple[str, ...]) -> str:
+    """Сходство записи с :text - наибольшее по полям"""
+    return "greatest({})".format(", ".join(f"word_similarity(:text, {field})" for field in fields))
+
+
+COMMANDS_TEXT_FIELDS = ("c.name", "c.name_full", "c.description")
+
+# условия поиска по каталогу: значения передаются в запрос параметрами (:имя условия)
+COMMANDS_CATALOG_FILTERS = {
+    "name": "lower(c.name) = lower(:name)",
+    "name_prefix": NAME_PREFIX_FILTER.format(name="c.name"),
+    "text": text_filter(COMMANDS_TEXT_FIELDS),
+    "toc_id": """c.toc_id in (select t.id from commands_toc t where not t.archive
+                   and t.parent_path || t.id::text <@ (select parent_path || id::text from commands_toc
+                   where id = :toc_id and not archive))""",
+    "equipment_id": "c.equipment_id = :equipment_id",
+    "equipment_name": "lower(e.name) = lower(:equipment_name)",
+}
+
+TELEMETRY_TEXT_FIELDS = ("name", "name_full", "description")
+
+TELEMETRY_CATALOG_FILTERS = {
+    "name": "lower(name) = lower(:name)",
+    "name_prefix": NAME_PREFIX_FILTER.format(name="name"),
+    "text": text_filter(TELEMETRY_TEXT_FIELDS),
+}
+
+
+@lru_cache(maxsize=None)
+def build_queries_search_commands_catalog(filters: Tuple[str, ...]):
+    """
+    Запросы поиска по каталогу команд для набора условий (один раз для каждого набора условий,
+    текст запроса не зависит от значений условий - asyncpg переиспользует подготовленные запросы)
+    :param filters: ключи COMMANDS_CATALOG_FILTERS
+    :return: запросы search_commands_catalog (страница и общее количество записей total_count, с условием text -
+             по убыванию сходства text_rank),
+             get_commands_catalog_total (общее количество записей, если страница пуста),
+             search_commands_catalog_after (страница после курсора)
+    """
+    # страница и общее количество записей (count(*) over ()) - одним запросом;
+    # :count_limit ограничивает подсчет (null - без ограничения)
     sql_header_search = """
     -- name: search_commands_catalog
-    -- record_class: CommandInCatalogResponse
-    select c.id,
-           c.equipment_id,
-           e.name as equipment_name,
-           c.toc_id,
-           c.name,
-           c.name_full,
-           c.description,
-           c.undo_cmd_id,
-           u.name as undo_cmd_name"""
+    select *, count(*) over () as total_count
+    from (select c.id,
+                 c.equipment_id,
+                 e.name as equipment_name,
+                 c.toc_id,
+                 c.name,
+                 c.name_full,
+                 c.description,
+                 c.undo_cmd_id,
+                 u.name as undo_cmd_name"""
 
     sql_header_total = """
     -- name: get_commands_catalog_total$
-    select count(c.id) as total"""
+    select count(*) as total
+    from (select c.id"""
 
     sql_text = """
     from commands c
@@ -49,42 +102,79 @@ def build_queries_search_commands_catalog(filters: list[str]):
     where not c.archive and c.equipment_id = e.id and not e.archive
     """
     for _ in filters:
-        sql_text = f"{sql_text} and {_}"
+        sql_text = f"{sql_text} and {COMMANDS_CATALOG_FILTERS[_]}"
 
-    sql_text = f"""{sql_header_search}{sql_text} order by c.name limit :limit offset :offset;
-    {sql_header_total}{sql_text};"""
+    # поиск по сходству (text): записи упорядочены по убыванию сходства, страница - только по смещению
+    inner_order, outer_order = "c.name, c.id", "name, id"
+    if "text" in filters:
+        sql_header_search = f"{sql_header_search},\n                 {text_rank(COMMANDS_TEXT_FIELDS)} as text_rank"
+        inner_order, outer_order = f"text_rank desc, {inner_order}", f"text_rank desc, {outer_order}"
 
-    return aiosql.from_str(
-        sql=sql_text,
-        driver_adapter="asyncpg",
-        record_classes={"CommandInCatalogResponse": CommandInCatalogResponse},
-    )
+    # страница после курсора (keyset): записи с ключом (name, id) больше ключа последней записи предыдущей страницы
+    sql_header_after = """
+    -- name: search_commands_catalog_after
+    select c.id,
+           c.equipment_id,
+           e.name as equipment_name,
+           c.toc_id,
+           c.name,
+           c.name_full,
+           c.description,
+           c.undo_cmd_id,
+           u.name as undo_cmd_name"""
+
+    sql_text = f"""{sql_header_search}{sql_text} order by {inner_order} limit :count_limit) s
+    order by {outer_order} limit :limit offset :offset;
+    {sql_header_total}{sql_text} limit :count_limit) s;
+    {sql_header_after}{sql_text} and c.name >= :cursor_name and (c.name, c.id) > (:cursor_name, :cursor_id)
+    order by c.name, c.id limit :limit;"""
+
+    return aiosql.from_str(sql=sql_text, driver_adapter="asyncpg")
 
 
-def build_queries_search_telemetry_catalog(filters: list[str]):
+@lru_cache(maxsize=None)
+def build_queries_search_telemetry_catalog(filters: Tuple[str, ...]):
+    """
+    Запросы поиска по каталогу параметров телеметрии для набора условий (см. build_queries_search_commands_catalog)
+    :param filters: ключи TELEMETRY_CATALOG_FILTERS
+    :return: запросы search_telemetry_catalog, get_telemetry_catalog_total
+    """
     sql_header_search = """
     -- name: search_telemetry_catalog
-    -- record_class: TmParameterInResponse
-    select id,
-       name,
-       name_full,
-       description,
-       value_validator"""
+    select *, count(*) over () as total_count
+    from (select id,
+                 name,
+                 name_full,
+                 description,
+                 value_validator"""
 
     sql_header_total = """
     -- name: get_telemetry_catalog_total$
-    select count(id) as total"""
+    select count(*) as total
+    from (select id"""
 
     sql_text = """
     from telemetry where not archive"""
     for _ in filters:
-        sql_text = f"{sql_text} and {_}"
+        sql_text = f"{sql_text} and {TELEMETRY_CATALOG_FILTERS[_]}"
+
+    order = "name, id"
+    if "text" in filters:
+        sql_header_search = f"{sql_header_search},\n                 {text_rank(TELEMETRY_TEXT_FIELDS)} as text_rank"
+        order = f"text_rank desc, {order}"
+
+    sql_header_after = """
+    -- name: search_telemetry_catalog_after
+    select id,
+           name,
+           name_full,
+           description,
+           value_validator"""
 
-    sql_text = f"""{sql_header_search}{sql_text} order by name limit :limit offset :offset;
-    {sql_header_total}{sql_text};"""
+    sql_text = f"""{sql_header_search}{sql_text} order by {order} limit :count_limit) s
+    order by {order} limit :limit offset :offset;
+    {sql_header_total}{sql_text} limit :count_limit) s;
+    {sql_header_after}{sql_text} and name >= :cursor_name and (name, id) > (:cursor_name, :cursor_id)
+    order by name, id limit :limit;"""
 
-    return aiosql.from_str(
-        sql=sql_text,
-        driver_adapter="asyncpg",
-        record_classes={"TmParameterInResponse": TmParameterInResponse},
-    )
+    return aiosql.from_str(sql=sql_text, driver_adapter="asyncpg")
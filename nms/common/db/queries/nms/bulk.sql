@@ -0,0 +1,309 @@
+-- Пакетное добавление (изменение) записей каталогов: записи пакета копируются (COPY) во временную таблицу
+-- bulk_* (удаляется по завершении транзакции), затем добавляются в таблицу каталога одним запросом
+-- (оборудование и разделы каталога команд - одним запросом на уровень дерева пакета).
+-- status записи пакета: created, updated, unchanged - запись принята, exists - запись с тем же обозначением
+-- существует (пакет без изменения существующих записей), rejected - ссылки на отсутствующие записи,
+-- null - запись не добавлена (родительская запись пакета не принята).
+-- Статистика временной таблицы собирается после COPY (analyze_bulk_*): autovacuum не обрабатывает временные таблицы.
+-- Запросы insert_bulk_* с :upsert = true изменяют существующие записи, если значения полей отличаются
+
+
+-- name: create_bulk_equipment#
+create temporary table bulk_equipment
+(
+    line      integer     not null,
+    level     integer     not null,
+    ref       text,
+    parent_ref text,
+    parent_id bigint,
+    name      varchar(70) not null,
+    name_full varchar(150) not null,
+    id        bigint,
+    status    varchar(10)
+) on commit drop;
+
+
+-- name: analyze_bulk_equipment#
+analyze bulk_equipment;
+
+
+-- name: reject_bulk_equipment
+update bulk_equipment s
+set status = 'rejected'
+where s.parent_id is not null
+  and not exists(select e.id from equipment e where e.id = s.parent_id and not e.archive)
+returning s.line, 'Equipment with id=' || s.parent_id || ' does not exists' as reason;
+
+
+-- name: resolve_bulk_equipment_parents!
+update bulk_equipment s
+set parent_id = p.id
+from bulk_equipment p
+where s.level = :level
+  and p.ref = s.parent_ref
+  and p.status in ('created', 'updated', 'unchanged');
+
+
+-- name: insert_bulk_equipment!
+with imported as (
+    insert into equipment as e (parent_id, name, name_full)
+        select s.parent_id, s.name, s.name_full
+        from bulk_equipment s
+        where s.level = :level
+          and s.status is null
+          and (s.parent_ref is null or s.parent_id is not null)
+        order by s.line
+        on conflict (name) do update
+            set parent_id = excluded.parent_id,
+                name_full = excluded.name_full
+            where :upsert
+              and (e.parent_id, e.name_full) is distinct from (excluded.parent_id, excluded.name_full)
+        returning e.id, e.name, e.xmax = 0 as created
+)
+update bulk_equipment s
+set id     = i.id,
+    status = case when i.created then 'created' else 'updated' end
+from imported i
+where s.level = :level
+  and s.status is null
+  and s.name = i.name;
+
+
+-- name: set_bulk_equipment_existing!
+update bulk_equipment s
+set id     = e.id,
+    status = case when :upsert then 'unchanged' else 'exists' end
+from equipment e
+where s.level = :level
+  and s.status is null
+  and (s.parent_ref is null or s.parent_id is not null)
+  and e.name = s.name
+  and not e.archive;
+
+
+-- name: get_bulk_equipment
+select line, id, status
+from bulk_equipment
+order by line;
+
+
+-- name: create_bulk_commands_toc#
+create temporary table bulk_commands_toc
+(
+    line       integer      not null,
+    level      integer      not null,
+    ref        text,
+    parent_ref text,
+    parent_id  bigint,
+    name       varchar(120) not null,
+    id         bigint,
+    status     varchar(10)
+) on commit drop;
+
+
+-- name: analyze_bulk_commands_toc#
+analyze bulk_commands_toc;
+
+
+-- name: reject_bulk_commands_toc
+update bulk_commands_toc s
+set status = 'rejected'
+where s.parent_id is not null
+  and not exists(select t.id from commands_toc t where t.id = s.parent_id and not t.archive)
+returning s.line, 'Command TOC with id=' || s.parent_id || ' does not exists' as reason;
+
+
+-- name: resolve_bulk_commands_toc_parents!
+update bulk_commands_toc s
+set parent_id = p.id
+from bulk_commands_toc p
+where s.level = :level
+  and p.ref = s.parent_ref
+  and p.status in ('created', 'updated', 'unchanged');
+
+
+-- name: insert_bulk_commands_toc!
+-- раздел определяется родительским разделом и названием, изменяемых полей нет: :upsert не используется
+with imported as (
+    insert into commands_toc as t (parent_id, name)
+        select s.parent_id, s.name
+        from bulk_commands_toc s
+        where s.level = :level
+          and s.status is null
+          and (s.parent_ref is null or s.parent_id is not null)
+        order by s.line
+        on conflict (parent_path, name) do nothing
+        returning t.id, t.parent_id, t.name
+)
+update bulk_commands_toc s
+set id     = i.id,
+    status = 'created'
+from imported i
+where s.level = :level
+  and s.status is null
+  and s.parent_id is not distinct from i.parent_id
+  and s.name = i.name;
+
+
+-- name: set_bulk_commands_toc_existing!
+update bulk_commands_toc s
+set id     = t.id,
+    status = case when :upsert then 'unchanged' else 'exists' end
+from commands_toc t
+where s.level = :level
+  and s.status is null
+  and (s.parent_ref is null or s.parent_id is not null)
+  and t.parent_id is not distinct from s.parent_id
+  and t.name = s.name
+  and not t.archive;
+
+
+-- name: get_bulk_commands_toc
+select line, id, status
+from bulk_commands_toc
+order by line;
+
+
+-- name: create_bulk_commands#
+create temporary table bulk_commands
+(
+    line         integer      not null,
+    equipment_id bigint       not null,
+    toc_id       bigint       not null,
+    name         varchar(30)  not null,
+    name_full    varchar(150) not null,
+    description  varchar(300) not null,
+    undo_cmd_id  bigint,
+    id           bigint,
+    status       varchar(10)
+) on commit drop;
+
+
+-- name: analyze_bulk_commands#
+analyze bulk_commands;
+
+
+-- name: reject_bulk_commands
+with invalid as (
+    select s.line,
+           concat_ws('; ',
+                     case when e.id is null then 'Equipment with id=' || s.equipment_id || ' does not exists' end,
+                     case when t.id is null then 'Command TOC with id=' || s.toc_id || ' does not exists' end,
+                     case
+                         when s.undo_cmd_id is not null and u.id is null
+                             then 'Command with id=' || s.undo_cmd_id || ' does not exists' end
+               ) as reason
+    from bulk_commands s
+             left join equipment e on e.id = s.equipment_id and not e.archive
+             left join commands_toc t on t.id = s.toc_id and not t.archive
+             left join commands u on u.id = s.undo_cmd_id and not u.archive
+    where e.id is null
+       or t.id is null
+       or (s.undo_cmd_id is not null and u.id is null)
+)
+update bulk_commands s
+set status = 'rejected'
+from invalid i
+where s.line = i.line
+returning s.line, i.reason;
+
+
+-- name: insert_bulk_commands!
+with imported as (
+    insert into commands as c (equipment_id, toc_id, name, name_full, description, undo_cmd_id)
+        select s.equipment_id, s.toc_id, s.name, s.name_full, s.description, s.undo_cmd_id
+        from bulk_commands s
+        where s.status is null
+        order by s.line
+        on conflict (name) do update
+            set equipment_id = excluded.equipment_id,
+                toc_id       = excluded.toc_id,
+                name_full    = excluded.name_full,
+                description  = excluded.description,
+                undo_cmd_id  = excluded.undo_cmd_id
+            where :upsert
+              and (c.equipment_id, c.toc_id, c.name_full, c.description, c.undo_cmd_id)
+                is distinct from
+                  (excluded.equipment_id, excluded.toc_id, excluded.name_full, excluded.description, excluded.undo_cmd_id)
+        returning c.id, c.name, c.xmax = 0 as created
+)
+update bulk_commands s
+set id     = i.id,
+    status = case when i.created then 'created' else 'updated' end
+from imported i
+where s.status is null
+  and s.name = i.name;
+
+
+-- name: set_bulk_commands_existing!
+update bulk_commands s
+set id     = c.id,
+    status = case when :upsert then 'unchanged' else 'exists' end
+from commands c
+where s.status is null
+  and c.name = s.name
+  and not c.archive;
+
+
+-- name: get_bulk_commands
+select line, id, status
+from bulk_commands
+order by line;
+
+
+-- name: create_bulk_telemetry#
+-- value_validator - текст JSON (кодек jsonb соединения - текстовый, COPY передает значения в двоичном формате)
+create temporary table bulk_telemetry
+(
+    line            integer      not null,
+    name            varchar(80)  not null,
+    name_full       varchar(200) not null,
+    description     varchar(300) not null,
+    value_validator text         not null,
+    id              bigint,
+    status          varchar(10)
+) on commit drop;
+
+
+-- name: analyze_bulk_telemetry#
+analyze bulk_telemetry;
+
+
+-- name: insert_bulk_telemetry!
+with imported as (
+    insert into telemetry as t (name, name_full, description, value_validator)
+        select s.name, s.name_full, s.description, s.value_validator::jsonb
+        from bulk_telemetry s
+        where s.status is null
+        order by s.line
+        on conflict (name) do update
+            set name_full       = excluded.name_full,
+                description     = excluded.description,
+                value_validator = excluded.value_validator
+            where :upsert
+              and (t.name_full, t.description, t.value_validator)
+                is distinct from (excluded.name_full, excluded.description, excluded.value_validator)
+        returning t.id, t.name, t.xmax = 0 as created
+)
+update bulk_telemetry s
+set id     = i.id,
+    status = case when i.created then 'created' else 'updated' end
+from imported i
+where s.status is null
+  and s.name = i.name;
+
+
+-- name: set_bulk_telemetry_existing!
+update bulk_telemetry s
+set id     = t.id,
+    status = case when :upsert then 'unchanged' else 'exists' end
+from telemetry t
+where s.status is null
+  and t.name = s.name
+  and not t.archive;
+
+
+-- name: get_bulk_telemetry
+select line, id, status
+from bulk_telemetry
+order by line;
@@ -0,0 +1,8 @@
+-- name: get_catalog_versions
+-- версии таблиц каталогов (изменяются триггерами notify_catalog_changed)
+select table_name,
+       version,
+       update_dt
+from catalog_version
+where table_name = any(:table_names)
+order by table_name;
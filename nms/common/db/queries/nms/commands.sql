@@ -108,3 +108,23 @@ update commands
 set archive = true
 where id in (select id from dst)
 returning id;
+
+
+-- name: export_commands_catalog
+-- выгрузка каталога команд (курсор), поля - как в search_commands_catalog
+select c.id,
+       c.equipment_id,
+       e.name as equipment_name,
+       c.toc_id,
+       c.name,
+       c.name_full,
+       c.description,
+       c.undo_cmd_id,
+       u.name as undo_cmd_name
+from commands c
+         left join commands u on c.undo_cmd_id = u.id and not u.archive,
+     equipment e
+where not c.archive
+  and c.equipment_id = e.id
+  and not e.archive
+order by c.name, c.id;
@@ -28,6 +28,43 @@ where lower(e.name) = lower(:name)
   and not e.archive;
 
 
+-- name: search_equipments_by_name_prefix
+-- record_class: EquipmentInDb
+-- обозначение начинается с :name (без учета регистра), см. NAME_PREFIX_FILTER
+select e.id,
+       e.parent_id,
+       e.parent_path,
+       e.parent_path_name,
+       e.name,
+       e.name_full,
+       e.create_dt,
+       e.update_dt
+from equipment e
+where lower(e.name) ~>=~ lower(:name)
+  and lower(e.name) ~<~ (lower(:name) || chr(1114111))
+  and not e.archive
+order by e.name, e.id
+limit :limit;
+
+
+-- name: search_equipments_by_text
+-- record_class: EquipmentInDb
+-- поиск по сходству (pg_trgm) с обозначением или наименованием, по убыванию сходства
+select e.id,
+       e.parent_id,
+       e.parent_path,
+       e.parent_path_name,
+       e.name,
+       e.name_full,
+       e.create_dt,
+       e.update_dt
+from equipment e
+where (:text <% e.name or :text <% e.name_full)
+  and not e.archive
+order by greatest(word_similarity(:text, e.name), word_similarity(:text, e.name_full)) desc, e.name, e.id
+limit :limit;
+
+
 -- name: get_equipments_all
 -- record_class: EquipmentInDb
 select e.id,
@@ -55,3 +55,15 @@ update telemetry
 set archive = true
 where id in (select id from dst)
 returning id;
+
+
+-- name: export_telemetry_catalog
+-- выгрузка каталога ТМ-параметров (курсор)
+select id,
+       name,
+       name_full,
+       description,
+       value_validator
+from telemetry
+where not archive
+order by name, id;
@@ -1,17 +1,122 @@
+import inspect
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import AsyncIterator, Optional, Union
+
 from asyncpg.connection import Connection
 
 from nms.common.config import DSNType
+from nms.common.db.pool import RepositoryConnections
+
+# параметры транзакции только для чтения: снимок данных на все время транзакции (например, для курсора)
+READ_ONLY_TRANSACTION = dict(isolation="repeatable_read", readonly=True)
+
+
+def read_only(method):
+    """
+    Метод репозитория только читает данные: соединение может быть получено из пула реплики
+    (см. RepositoryConnections.acquire)
+    """
+    method.read_only = True
+    return method
+
+
+def _with_connection(method):
+    is_read_only = getattr(method, "read_only", False)
+
+    @wraps(method)
+    async def wrapper(self: "BaseRepository", *args, **kwargs):
+        if self._current_connection() is not None:
+            # соединение задано при создании репозитория, закреплено транзакцией или внешним вызовом
+            return await method(self, *args, **kwargs)
+        async with self._connections.acquire(is_read_only) as conn:
+            token = self._call_connection.set(conn)
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self._call_connection.reset(token)
+
+    return wrapper
 
 
 class BaseRepository:
+    """
+    Репозиторий получает соединение из пула при вызове метода (async def, без "_" в начале имени)
+    и освобождает его по завершении вызова. Соединение вызова хранится в контекстной переменной (ContextVar)
+    репозитория: одновременные вызовы (например, asyncio.gather) выполняются в разных соединениях.
+    В transaction() все вызовы выполняются в одном соединении.
+    Репозиторий, созданный с соединением (Connection), использует только его
+    """
+
     _dsn_type = DSNType.UNKNOWN
 
-    def __init__(self, conn: Connection) -> None:
-        self._conn = conn
+    def __init__(self, conn: Union[Connection, RepositoryConnections]) -> None:
+        if isinstance(conn, RepositoryConnections):
+            self._connections = conn  # type: Optional[RepositoryConnections]
+            self._conn = None  # type: Optional[Connection]
+        else:
+            self._connections = None
+            self._conn = conn
+        self._call_connection = ContextVar(
+            f"{type(self).__name__}_connection", default=None
+        )  # type: ContextVar[Optional[Connection]]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, method in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, _with_connection(method))
+
+    def _current_connection(self) -> Optional[Connection]:
+        return self._conn if self._conn is not None else self._call_connection.get()
 
     @property
     def connection(self) -> Connection:
-        return self._conn
+        conn = self._current_connection()
+        if conn is None:
+            raise RuntimeError(
+                "Repository connection is available only within repository method calls or transaction()"
+            )
+        return conn
+
+    def use_primary(self) -> "BaseRepository":
+        """Следующие вызовы методов репозитория выполняются на основном сервере (не на репликах)"""
+        if self._connections is not None:
+            self._connections.use_primary()
+        return self
+
+    @asynccontextmanager
+    async def acquire(self, read_only: bool = False) -> AsyncIterator[Connection]:
+        """
+        Соединение, передаваемое явно (без закрепления за вызовами методов репозитория), например, для асинхронного
+        генератора, который может продолжаться в другой задаче: соединение текущего вызова (транзакции),
+        соединение репозитория или соединение из пула
+        :param read_only: соединение только для чтения (может быть получено из пула реплики)
+        """
+        conn = self._current_connection()
+        if conn is not None:
+            yield conn
+            return
+        async with self._connections.acquire(read_only) as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def transaction(self, read_only: bool = False) -> AsyncIterator["BaseRepository"]:
+        """
+        Транзакция: вызовы методов репозитория в том же контексте (задаче) выполняются в ее соединении
+        :param read_only: транзакция только читает данные (READ_ONLY_TRANSACTION),
+                          соединение может быть получено из пула реплики, иначе - основной сервер
+        """
+        async with self.acquire(read_only) as conn:
+            # вложенная транзакция (точка сохранения) использует параметры внешней
+            options = READ_ONLY_TRANSACTION if read_only and not conn.is_in_transaction() else dict()
+            token = self._call_connection.set(conn)
+            try:
+                async with conn.transaction(**options):
+                    yield self
+            finally:
+                self._call_connection.reset(token)
 
     @classmethod
     def dsn_type(cls) -> DSNType:
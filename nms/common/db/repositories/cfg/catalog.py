@@ -0,0 +1,14 @@
+from typing import List, Sequence
+
+from asyncpg import Record
+
+from nms.common.db.queries.nms import queries_nms
+from nms.common.db.repositories.base import BaseNmsRepository, read_only
+
+
+class CatalogVersionsRepository(BaseNmsRepository):
+    @read_only
+    async def get_catalog_versions(self, table_names: Sequence[str]) -> List[Record]:
+        return await queries_nms.get_catalog_versions(
+            self.connection, table_names=list(table_names)
+        )
@@ -1,7 +1,7 @@
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
-from asyncpg import PostgresError
+from asyncpg import PostgresError, Record
 
 from nms.common.db.errors import (
     ConflictWhenInsert,
@@ -9,7 +9,8 @@ from nms.common.db.errors import (
     EntityDoesNotExist,
 )
 from nms.common.db.queries.nms import build_queries_search_commands_catalog, queries_nms
-from nms.common.db.repositories.base import BaseNmsRepository
+from nms.common.db.repositories.base import READ_ONLY_TRANSACTION, BaseNmsRepository, read_only
+from nms.common.models.bulk import BulkItemResult, BulkMode, CommandsTocInBulk
 from nms.common.models.commands import (
     CommandInCatalogResponse,
     CommandInCreate,
@@ -19,20 +20,31 @@ from nms.common.models.commands import (
     CommandsTocInResponse,
 )
 from nms.common.models.response_pagination import ResponsePage
+from nms.common.models.search import NameMatch
 
-from .utils import build_catalog
-
-# from aiocache import cached
-
+from .utils import (
+    build_catalog,
+    bulk_duplicates,
+    bulk_levels,
+    bulk_results,
+    import_bulk,
+    search_page,
+)
 
 log = logging.getLogger("app")
 
+# столбцы временных таблиц bulk_commands_toc, bulk_commands в записях пакета
+COMMANDS_TOC_BULK_COLUMNS = ("line", "level", "ref", "parent_ref", "parent_id", "name")
+COMMANDS_BULK_COLUMNS = ("line", "equipment_id", "toc_id", "name", "name_full", "description", "undo_cmd_id")
+
 
 class CommandsRepository(BaseNmsRepository):
+    @read_only
     async def get_toc_catalog(self) -> list:
         toc = await queries_nms.get_commands_toc_all(self.connection)
         return build_catalog(toc, lambda c: CommandsTocInResponse.from_orm(c).dict())
 
+    @read_only
     async def get_toc(self, toc_id: int) -> CommandsTocInDb:
         toc = await queries_nms.get_commands_toc_by_id(self.connection, toc_id)
         if not toc:
@@ -50,6 +62,43 @@ class CommandsRepository(BaseNmsRepository):
             )
         return CommandsTocInDb(**toc)
 
+    async def import_toc(
+        self, items: List[Tuple[int, CommandsTocInBulk]], mode: BulkMode
+    ) -> List[BulkItemResult]:
+        """
+        Пакетное добавление разделов каталога команд в одной транзакции, родительские разделы
+        могут быть элементами того же пакета (parent_ref)
+        :param items: (номер, элемент пакета)
+        :param mode: insert - существующий раздел (родительский раздел и name) - ошибка,
+                     upsert - результат для существующего раздела - unchanged
+        :return: результаты элементов
+        """
+        errors = bulk_duplicates(items, lambda t: (t.parent_id, t.parent_ref, t.name))
+        levels = bulk_levels(items, errors)
+        records = [
+            (line, levels[line], t.ref, t.parent_ref, t.parent_id, t.name)
+            for line, t in items
+            if line not in errors
+        ]
+        rows = list()
+        if records:
+            try:
+                async with self.connection.transaction():
+                    rows, rejected = await import_bulk(
+                        self.connection,
+                        "commands_toc",
+                        COMMANDS_TOC_BULK_COLUMNS,
+                        records,
+                        upsert=mode == BulkMode.UPSERT,
+                        levels=max(levels.values()) + 1,
+                    )
+            except PostgresError as err:
+                raise ConflictWhenInsert(
+                    f"Insert new entity in database raising a unique violation or exclusion constraint violation error: {str(err)}"
+                )
+            errors.update(rejected)
+        return bulk_results(rows, errors)
+
     async def update_toc(
         self, *, toc: CommandsTocInDb, parent_id: Optional[int], name: Optional[str]
     ) -> CommandsTocInDb:
@@ -79,12 +128,14 @@ class CommandsRepository(BaseNmsRepository):
             )
         return
 
+    @read_only
     async def get_command(self, command_id: int) -> CommandInDb:
         command = await queries_nms.get_command_by_id(self.connection, command_id)
         if not command:
             raise EntityDoesNotExist(f"Command with id={command_id} does not exists")
         return command
 
+    @read_only
     async def get_command_by_name(self, name: str) -> CommandInDb:
         command = await queries_nms.get_command_by_name(self.connection, name)
         if not command:
@@ -108,6 +159,39 @@ class CommandsRepository(BaseNmsRepository):
             )
         return CommandInDb(**command)
 
+    async def import_commands(
+        self, items: List[Tuple[int, CommandInCreate]], mode: BulkMode
+    ) -> List[BulkItemResult]:
+        """
+        Пакетное добавление (изменение) команд в одной транзакции
+        :param items: (номер, элемент пакета)
+        :param mode: insert - существующая команда (по name) не изменяется, upsert - изменяется
+        :return: результаты элементов
+        """
+        errors = bulk_duplicates(items, lambda c: c.name)
+        records = [
+            (line, c.equipment_id, c.toc_id, c.name, c.name_full, c.description, c.undo_cmd_id)
+            for line, c in items
+            if line not in errors
+        ]
+        rows = list()
+        if records:
+            try:
+                async with self.connection.transaction():
+                    rows, rejected = await import_bulk(
+                        self.connection,
+                        "commands",
+                        COMMANDS_BULK_COLUMNS,
+                        records,
+                        upsert=mode == BulkMode.UPSERT,
+                    )
+            except PostgresError as err:
+                raise ConflictWhenInsert(
+                    f"Insert new entity in database raising a unique violation or exclusion constraint violation error: {str(err)}"
+                )
+            errors.update(rejected)
+        return bulk_results(rows, errors)
+
     async def update_command(
         self,
         *,
@@ -153,45 +237,70 @@ class CommandsRepository(BaseNmsRepository):
             raise ConflictWhenUpdate()
         return
 
-    # FIXME: @cached(noself=True) -- нет заметного прироста скорости, даже наооборот
-    # async def get_commands_catalog_total(self, queries):
-    #     log.debug("Execute non cached query get_commands_catalog_total")
-    #     return await queries.get_commands_catalog_total(self.connection)
-
+    @read_only
     async def search_commands_catalog(
         self,
         *,
         limit: int = 1500,
         page: int = 1,
         name: Optional[str] = None,
+        name_match: NameMatch = NameMatch.EXACT,
+        text: Optional[str] = None,
         toc_id: Optional[int] = None,
         equipment_id: Optional[int] = None,
         equipment_name: Optional[str] = None,
+        count_limit: Optional[int] = None,
+        cursor: Optional[Tuple[str, int]] = None,
     ) -> ResponsePage[CommandInCatalogResponse]:
         params = dict()
-        sql_filters = list()
+        filters = dict()
         if name:
             params["name"] = name
-            sql_filters.append(f"lower(c.name) = lower('{name}')")
+            if name_match == NameMatch.PREFIX:
+                params["name-match"] = name_match.value
+                filters["name_prefix"] = name
+            else:
+                filters["name"] = name
+        if text:
+            params["text"] = text
+            filters["text"] = text
         if toc_id:
             params["toc-id"] = toc_id
-            sql_filters.append(
-                f"""c.toc_id in (select t.id from commands_toc t where not t.archive
-                   and t.parent_path || t.id::text <@ (select parent_path || id::text from commands_toc
-                   where id = {toc_id} and not archive))"""
-            )
+            filters["toc_id"] = toc_id
         if equipment_id:
-            params["equipment-id"]: int = equipment_id
-            sql_filters.append(f"c.equipment_id = {equipment_id}")
+            params["equipment-id"] = equipment_id
+            filters["equipment_id"] = equipment_id
         if equipment_name:
             params["equipment-name"] = equipment_name
-            sql_filters.append(f"lower(e.name) = lower('{equipment_name}')")
+            filters["equipment_name"] = equipment_name
 
         offset = (page - 1) * limit
-        queries = build_queries_search_commands_catalog(sql_filters)
-        total = await queries.get_commands_catalog_total(self.connection)
-        commands = await queries.search_commands_catalog(self.connection, limit, offset)
+        queries = build_queries_search_commands_catalog(tuple(filters))
+        result = await search_page(
+            queries,
+            "search_commands_catalog",
+            self.connection,
+            CommandInCatalogResponse,
+            limit=limit,
+            offset=offset,
+            count_limit=count_limit,
+            cursor=cursor,
+            filters=filters,
+            ranked="text" in filters,
+        )
 
         return ResponsePage(
-            page=page, limit=limit, total=total, params=params, content=commands
+            page=None if cursor is not None else page, limit=limit, params=params, **result
         )
+
+    async def export_commands_catalog(self, prefetch: int = 1000) -> AsyncIterator[Record]:
+        """
+        Записи каталога команд (как в search_commands_catalog, по name, id) через курсор сервера
+        в транзакции только для чтения: в памяти - не более prefetch записей.
+        Асинхронный генератор (чтение может продолжаться в другой задаче): соединение передается явно,
+        без закрепления за вызовами методов репозитория, и освобождается по завершении (закрытии) генератора
+        """
+        async with self.acquire(read_only=True) as conn:
+            async with conn.transaction(**READ_ONLY_TRANSACTION):
+                async for row in conn.cursor(queries_nms.export_commands_catalog.sql, prefetch=prefetch):
+                    yield row
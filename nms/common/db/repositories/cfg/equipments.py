@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from asyncpg import PostgresError
 
@@ -8,17 +8,29 @@ from nms.common.db.errors import (
     EntityDoesNotExist,
 )
 from nms.common.db.queries.nms import queries_nms
-from nms.common.db.repositories.base import BaseNmsRepository
+from nms.common.db.repositories.base import BaseNmsRepository, read_only
+from nms.common.models.bulk import BulkItemResult, BulkMode, EquipmentInBulk
 from nms.common.models.equipments import (
     EquipmentInCreate,
     EquipmentInDb,
     EquipmentInResponse,
 )
+from nms.common.models.search import NameMatch
 
-from .utils import build_catalog
+from .utils import (
+    build_catalog,
+    bulk_duplicates,
+    bulk_levels,
+    bulk_results,
+    import_bulk,
+)
+
+# столбцы временной таблицы bulk_equipment в записях пакета
+EQUIPMENT_BULK_COLUMNS = ("line", "level", "ref", "parent_ref", "parent_id", "name", "name_full")
 
 
 class EquipmentsRepository(BaseNmsRepository):
+    @read_only
     async def get_equipments_catalog(self, root_item_id: Optional[int] = None) -> list:
         if root_item_id:
             equipments = await queries_nms.get_equipments_from(
@@ -30,6 +42,7 @@ class EquipmentsRepository(BaseNmsRepository):
             equipments, lambda e: EquipmentInResponse.from_orm(e).dict()
         )
 
+    @read_only
     async def get_equipment(self, equipment_id: int) -> EquipmentInDb:
         equipment = await queries_nms.get_equipment_by_id(self.connection, equipment_id)
         if not equipment:
@@ -38,12 +51,33 @@ class EquipmentsRepository(BaseNmsRepository):
             )
         return equipment
 
+    @read_only
     async def get_equipment_by_name(self, name: str) -> EquipmentInDb:
         equipment = await queries_nms.get_equipment_by_name(self.connection, name)
         if not equipment:
             raise EntityDoesNotExist(f"Equipment with name={name} does not exists")
         return equipment
 
+    @read_only
+    async def search_equipments(
+        self,
+        *,
+        name: Optional[str] = None,
+        name_match: NameMatch = NameMatch.PREFIX,
+        text: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[EquipmentInDb]:
+        if name and name_match == NameMatch.EXACT:
+            equipment = await queries_nms.get_equipment_by_name(self.connection, name)
+            return [equipment] if equipment else list()
+        if name:
+            return await queries_nms.search_equipments_by_name_prefix(
+                self.connection, name=name, limit=limit
+            )
+        return await queries_nms.search_equipments_by_text(
+            self.connection, text=text, limit=limit
+        )
+
     async def create_equipment(
         self, equipment_data: EquipmentInCreate
     ) -> EquipmentInDb:
@@ -60,6 +94,42 @@ class EquipmentsRepository(BaseNmsRepository):
             )
         return EquipmentInDb(**equipment)
 
+    async def import_equipments(
+        self, items: List[Tuple[int, EquipmentInBulk]], mode: BulkMode
+    ) -> List[BulkItemResult]:
+        """
+        Пакетное добавление (изменение) оборудования в одной транзакции, родительские объекты
+        могут быть элементами того же пакета (parent_ref)
+        :param items: (номер, элемент пакета)
+        :param mode: insert - существующее оборудование (по name) не изменяется, upsert - изменяется
+        :return: результаты элементов
+        """
+        errors = bulk_duplicates(items, lambda e: e.name)
+        levels = bulk_levels(items, errors)
+        records = [
+            (line, levels[line], e.ref, e.parent_ref, e.parent_id, e.name, e.name_full)
+            for line, e in items
+            if line not in errors
+        ]
+        rows = list()
+        if records:
+            try:
+                async with self.connection.transaction():
+                    rows, rejected = await import_bulk(
+                        self.connection,
+                        "equipment",
+                        EQUIPMENT_BULK_COLUMNS,
+                        records,
+                        upsert=mode == BulkMode.UPSERT,
+                        levels=max(levels.values()) + 1,
+                    )
+            except PostgresError as err:
+                raise ConflictWhenInsert(
+                    f"Insert new entity in database raising a unique violation or exclusion constraint violation error: {str(err)}"
+                )
+            errors.update(rejected)
+        return bulk_results(rows, errors)
+
     async def update_equipment(
         self,
         *,
@@ -1,7 +1,8 @@
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
-from asyncpg import PostgresError
+from asyncpg import PostgresError, Record
 
+from nms.common.db.codecs import json_encoder
 from nms.common.db.errors import (
     ConflictWhenInsert,
     ConflictWhenUpdate,
@@ -11,40 +12,77 @@ from nms.common.db.queries.nms import (
     build_queries_search_telemetry_catalog,
     queries_nms,
 )
-from nms.common.db.repositories.base import BaseNmsRepository
+from nms.common.db.repositories.base import READ_ONLY_TRANSACTION, BaseNmsRepository, read_only
+from nms.common.models.bulk import BulkItemResult, BulkMode
 from nms.common.models.telemetry import (
     TmParameterInCreate,
     TmParameterInDb,
     TmParameterInResponse,
 )
 from nms.common.models.response_pagination import ResponsePage
+from nms.common.models.search import NameMatch
+
+from .utils import bulk_duplicates, bulk_results, import_bulk, search_page
+
+# столбцы временной таблицы bulk_telemetry в записях пакета
+TELEMETRY_BULK_COLUMNS = ("line", "name", "name_full", "description", "value_validator")
 
 
 class TmRepository(BaseNmsRepository):
+    @read_only
     async def search_telemetry_catalog(
         self,
         *,
         limit: int = 100,
         page: int = 1,
         name: Optional[str] = None,
+        name_match: NameMatch = NameMatch.EXACT,
+        text: Optional[str] = None,
+        count_limit: Optional[int] = None,
+        cursor: Optional[Tuple[str, int]] = None,
     ) -> ResponsePage[TmParameterInResponse]:
         params = dict()
-        sql_filters = list()
+        filters = dict()
         if name:
             params["name"] = name
-            sql_filters.append(f"lower(name) = lower('{name}')")
+            if name_match == NameMatch.PREFIX:
+                params["name-match"] = name_match.value
+                filters["name_prefix"] = name
+            else:
+                filters["name"] = name
+        if text:
+            params["text"] = text
+            filters["text"] = text
 
         offset = (page - 1) * limit
-        queries = build_queries_search_telemetry_catalog(sql_filters)
-        total = await queries.get_telemetry_catalog_total(self.connection)
-        tm_params = await queries.search_telemetry_catalog(
-            self.connection, limit, offset
+        queries = build_queries_search_telemetry_catalog(tuple(filters))
+        result = await search_page(
+            queries,
+            "search_telemetry_catalog",
+            self.connection,
+            TmParameterInResponse,
+            limit=limit,
+            offset=offset,
+            count_limit=count_limit,
+            cursor=cursor,
+            filters=filters,
+            ranked="text" in filters,
         )
 
         return ResponsePage(
-            page=page, limit=limit, total=total, params=params, content=tm_params
+            page=None if cursor is not None else page, limit=limit, params=params, **result
         )
 
+    async def export_telemetry_catalog(self, prefetch: int = 1000) -> AsyncIterator[Record]:
+        """
+        Записи каталога ТМ-параметров (по name, id) через курсор сервера (см. CommandsRepository.export_commands_catalog)
+        """
+        async with self.acquire(read_only=True) as conn:
+            async with conn.transaction(**READ_ONLY_TRANSACTION):
+                async for row in conn.cursor(queries_nms.export_telemetry_catalog.sql, prefetch=prefetch):
+                    yield row
+
+    @read_only
     async def get_tm_parameter(self, parameter_id: int) -> TmParameterInDb:
         parameter = await queries_nms.get_tm_parameter_by_id(
             self.connection, parameter_id
@@ -55,6 +93,7 @@ class TmRepository(BaseNmsRepository):
             )
         return parameter
 
+    @read_only
     async def get_tm_parameter_by_name(self, name: str) -> TmParameterInDb:
         command = await queries_nms.get_tm_parameter_by_name(self.connection, name)
         if not command:
@@ -78,6 +117,39 @@ class TmRepository(BaseNmsRepository):
             )
         return TmParameterInDb(**parameter)
 
+    async def import_tm_parameters(
+        self, items: List[Tuple[int, TmParameterInCreate]], mode: BulkMode
+    ) -> List[BulkItemResult]:
+        """
+        Пакетное добавление (изменение) ТМ-параметров в одной транзакции
+        :param items: (номер, элемент пакета)
+        :param mode: insert - существующий параметр (по name) не изменяется, upsert - изменяется
+        :return: результаты элементов
+        """
+        errors = bulk_duplicates(items, lambda p: p.name)
+        records = [
+            (line, p.name, p.name_full, p.description, json_encoder(p.value_validator))
+            for line, p in items
+            if line not in errors
+        ]
+        rows = list()
+        if records:
+            try:
+                async with self.connection.transaction():
+                    rows, rejected = await import_bulk(
+                        self.connection,
+                        "telemetry",
+                        TELEMETRY_BULK_COLUMNS,
+                        records,
+                        upsert=mode == BulkMode.UPSERT,
+                    )
+            except PostgresError as err:
+                raise ConflictWhenInsert(
+                    f"Insert new entity in database raising a unique violation or exclusion constraint violation error: {str(err)}"
+                )
+            errors.update(rejected)
+        return bulk_results(rows, errors)
+
     async def update_tm_parameter(
         self,
         *,
@@ -1,32 +1,288 @@
-from typing import Optional
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Type
 
+from asyncpg.connection import Connection
+from pydantic import BaseModel
 
-def search_item_parent(tree, path) -> Optional[dict]:
-    nodes = path.split(".")
-    parent = dict(content=tree)
-    fl = False
-    for k in nodes[1:]:
-        if parent.get("content"):
-            for i in parent["content"]:
-                if i["id"] == int(k):
-                    parent = i
-                    fl = True
-                    break
-    return parent if fl else None
+from nms.common.db.queries.nms import queries_nms
+from nms.common.models.bulk import BulkItemResult, BulkItemStatus
+from nms.common.models.response_pagination import encode_cursor
 
 
 def build_catalog(items, func) -> list:
+    """
+    Дерево каталога из записей, упорядоченных по parent_path: вложенные записи - в списке content узла.
+    Запись добавляется в content ближайшего предка, найденного по parent_path (от корня, отсутствующие
+    уровни пропускаются), если предков нет - в корень дерева.
+    Узлы индексируются по (родительский узел, id); предок, найденный по всем меткам parent_path,
+    запоминается по (parent_path записи, id записи) - пути потомков без последней метки, поэтому
+    для упорядоченных записей поиск предка - O(1), без построения строк путей
+    :param items: записи с полями parent_id, parent_path
+    :param func: преобразование записи в узел дерева (dict с ключом id)
+    :return: узлы верхнего уровня
+    """
     result = list()
+    # (id() родительского узла, None - корень; id записи) -> узел (первый добавленный)
+    nodes = dict()
+    # родительские узлы (id(), None - корень) с непустым content
+    parents = set()
+    # (parent_path без последней метки, последняя метка) -> предок, найденный по всем меткам пути
+    # (не изменяется при добавлении узлов)
+    found_paths = dict()
+
+    def add(parent_key, content: list, node: dict) -> None:
+        content.append(node)
+        parents.add(parent_key)
+        nodes.setdefault((parent_key, node["id"]), node)
+        # content, заполненный func
+        if node.get("content"):
+            for child in node["content"]:
+                add(id(node), [], child)
+
+    def search_parent(path: str) -> Tuple[Optional[dict], bool]:
+        parent, parent_key, found = None, None, True
+        for label in path.split(".")[1:]:
+            node = nodes.get((parent_key, int(label))) if parent_key in parents else None
+            if node is None:
+                found = False
+            else:
+                parent, parent_key = node, id(node)
+        return parent, found
+
     for item in items:
+        path = item.parent_path
         if item.parent_id is None:
-            result.append(func(item))
+            parent, found = None, "." not in path
         else:
-            parent = search_item_parent(result, item.parent_path)
-            if parent:
-                content = parent.get("content")
-                if not content:
-                    content = parent["content"] = list()
-                content.append(func(item))
-            else:
-                result.append(func(item))
+            parent_path, separator, label = path.rpartition(".")
+            parent = found_paths.get((parent_path, label)) if separator else None
+            found = parent is not None
+            if not found:
+                parent, found = search_parent(path)
+                if found and parent is not None and separator:
+                    found_paths[(parent_path, label)] = parent
+
+        node = func(item)
+        if parent is None:
+            parent_key = None
+            add(parent_key, result, node)
+        else:
+            parent_key = id(parent)
+            content = parent.get("content")
+            if not content:
+                content = parent["content"] = list()
+            add(parent_key, content, node)
+        node_id = node["id"]
+        if found and type(node_id) is int:
+            # parent_path потомков узла: path записи и метка узла
+            child_key = (path, str(node_id))
+            if child_key not in found_paths:
+                found_paths[child_key] = nodes[(parent_key, node_id)]
     return result
+
+
+async def search_page(
+    queries,
+    search_query: str,
+    conn: Connection,
+    record_class: Type[BaseModel],
+    *,
+    limit: int,
+    offset: int,
+    count_limit: Optional[int],
+    cursor: Optional[Tuple[str, int]],
+    filters: dict,
+    ranked: bool = False,
+) -> dict:
+    """
+    Страница результатов поиска, упорядоченных по (name, id).
+    Без курсора - страница по смещению и общее количество записей одним запросом (count(*) over ()),
+    с курсором - страница после записи с ключом cursor (keyset), без подсчета общего количества записей
+    :param queries: запросы поиска (build_queries_search_*)
+    :param search_query: имя запроса страницы, дополнительно используются запросы
+                         get_<...>_total (search_ -> get_, + _total) и <search_query>_after
+    :param conn: соединение с БД
+    :param record_class: модель записи
+    :param limit: количество записей на странице
+    :param offset: смещение страницы (без курсора)
+    :param count_limit: подсчитать не более count_limit записей (оценка общего количества), None - точный подсчет
+    :param cursor: ключ (name, id) последней записи предыдущей страницы
+    :param filters: значения условий поиска
+    :param ranked: записи упорядочены по сходству (условие text): курсор следующей страницы не формируется
+    :return: поля ResponsePage: content, total, total_exact, next
+    """
+    if cursor is not None:
+        rows = await getattr(queries, f"{search_query}_after")(
+            conn, limit=limit, cursor_name=cursor[0], cursor_id=cursor[1], **filters
+        )
+        total, total_exact = None, False
+    else:
+        if count_limit is not None:
+            # записи запрошенной страницы подсчитываются всегда
+            count_limit = max(count_limit, offset + limit)
+        rows = await getattr(queries, search_query)(
+            conn, limit=limit, offset=offset, count_limit=count_limit, **filters
+        )
+        if rows:
+            total = rows[0]["total_count"]
+        elif offset:
+            total_query = f"get_{search_query[len('search_'):]}_total"
+            total = await getattr(queries, total_query)(conn, count_limit=count_limit, **filters)
+        else:
+            total = 0
+        total_exact = count_limit is None or total < count_limit
+
+    next_cursor = None
+    if len(rows) == limit and not ranked:
+        next_cursor = encode_cursor(rows[-1]["name"], rows[-1]["id"])
+    return dict(
+        content=[record_class(**dict(row)) for row in rows],
+        total=total,
+        total_exact=total_exact,
+        next=next_cursor,
+    )
+
+
+def bulk_error(line: int, msg: str, error_type: str = "value_error") -> dict:
+    """Ошибка элемента пакета (как ошибки проверки тела запроса FastAPI)"""
+    return {"loc": ["body", line], "msg": msg, "type": error_type}
+
+
+def bulk_duplicates(items: Sequence[Tuple[int, Any]], key: Callable[[Any], Hashable]) -> Dict[int, dict]:
+    """
+    Повторяющиеся элементы пакета: элемент с тем же ключом, что у одного из предыдущих
+    :param items: (номер, элемент)
+    :param key: ключ элемента (обозначение записи)
+    :return: ошибки по номерам элементов
+    """
+    seen = dict()
+    errors = dict()
+    for line, item in items:
+        item_key = key(item)
+        if item_key in seen:
+            errors[line] = bulk_error(line, f"Duplicate of item {seen[item_key]}", "value_error.duplicate")
+        else:
+            seen[item_key] = line
+    return errors
+
+
+def bulk_levels(items: Sequence[Tuple[int, Any]], errors: Dict[int, dict]) -> Dict[int, int]:
+    """
+    Уровни элементов пакета записей дерева: 0 - родительская запись не в пакете (parent_ref не задан),
+    иначе - уровень элемента с ключом ref = parent_ref + 1.
+    Элементы с повторяющимся ref, неизвестным parent_ref, циклическими ссылками и потомки этих элементов
+    отклоняются (ошибки добавляются в errors)
+    :param items: (номер, элемент с полями ref, parent_ref)
+    :param errors: ошибки по номерам элементов, элементы с ошибками не принимаются
+    :return: уровни по номерам принятых элементов
+    """
+    refs = dict()
+    for line, item in items:
+        if line in errors or item.ref is None:
+            continue
+        if item.ref in refs:
+            errors[line] = bulk_error(line, f"Duplicate ref {item.ref}", "value_error.duplicate")
+        else:
+            refs[item.ref] = (line, item)
+
+    levels = dict()
+    for line, item in items:
+        if line in errors or line in levels:
+            continue
+        # цепочка элементов от текущего до элемента без parent_ref или потомка элемента с известным уровнем
+        chain = list()
+        current_line, current = line, item
+        level, error = None, None
+        while level is None and error is None:
+            if current_line in levels:
+                level = levels[current_line]
+            elif current_line in errors:
+                error = "Parent item is rejected"
+            elif current_line in chain:
+                error = f"Cyclic parent_ref {current.ref}"
+            else:
+                chain.append(current_line)
+                if current.parent_ref is None:
+                    level = -1
+                elif current.parent_ref not in refs:
+                    error = f"Unknown parent_ref {current.parent_ref}"
+                else:
+                    current_line, current = refs[current.parent_ref]
+        if error is not None:
+            # ошибка - у последнего элемента цепочки, остальные - его потомки
+            errors[chain[-1]] = bulk_error(chain[-1], error, "value_error.parent")
+            for child_line in chain[:-1]:
+                errors[child_line] = bulk_error(child_line, "Parent item is rejected", "value_error.parent")
+            continue
+        for child_line in reversed(chain):
+            level += 1
+            levels[child_line] = level
+    return levels
+
+
+async def import_bulk(
+    conn: Connection,
+    table: str,
+    columns: Tuple[str, ...],
+    records: List[tuple],
+    *,
+    upsert: bool,
+    levels: Optional[int] = None,
+) -> Tuple[list, Dict[int, dict]]:
+    """
+    Пакетное добавление (изменение) записей каталога (выполняется в транзакции): записи копируются (COPY)
+    во временную таблицу bulk_<table>, затем добавляются запросами insert_bulk_<table> (см. bulk.sql)
+    :param conn: соединение с БД
+    :param table: таблица каталога
+    :param columns: столбцы bulk_<table> в записях
+    :param records: записи пакета, первый столбец - номер элемента (line)
+    :param upsert: изменять существующие записи
+    :param levels: количество уровней дерева пакета (записи дерева, столбец level), None - записи без иерархии
+    :return: записи bulk_<table> (line, id, status) и ошибки ссылок на отсутствующие записи по номерам
+    """
+    await getattr(queries_nms, f"create_bulk_{table}")(conn)
+    await conn.copy_records_to_table(f"bulk_{table}", records=records, columns=columns)
+    await getattr(queries_nms, f"analyze_bulk_{table}")(conn)
+
+    rejected = dict()
+    reject = getattr(queries_nms, f"reject_bulk_{table}", None)
+    if reject is not None:
+        for row in await reject(conn):
+            rejected[row["line"]] = bulk_error(row["line"], row["reason"], "value_error.not_found")
+
+    insert = getattr(queries_nms, f"insert_bulk_{table}")
+    set_existing = getattr(queries_nms, f"set_bulk_{table}_existing")
+    if levels is None:
+        await insert(conn, upsert=upsert)
+        await set_existing(conn, upsert=upsert)
+    else:
+        resolve_parents = getattr(queries_nms, f"resolve_bulk_{table}_parents")
+        for level in range(levels):
+            if level:
+                await resolve_parents(conn, level=level)
+            await insert(conn, level=level, upsert=upsert)
+            await set_existing(conn, level=level, upsert=upsert)
+    return await getattr(queries_nms, f"get_bulk_{table}")(conn), rejected
+
+
+def bulk_results(rows: list, errors: Dict[int, dict]) -> List[BulkItemResult]:
+    """
+    Результаты элементов пакета
+    :param rows: записи bulk_<table> (import_bulk)
+    :param errors: ошибки отклоненных элементов по номерам
+    :return: результаты, упорядоченные по номерам элементов
+    """
+    results = [BulkItemResult(line=line, errors=[error]) for line, error in errors.items()]
+    for row in rows:
+        line, status = row["line"], row["status"]
+        if line in errors:
+            continue
+        if status == "exists":
+            error = bulk_error(line, f"Record already exists (id={row['id']})", "value_error.conflict")
+            results.append(BulkItemResult(line=line, id=row["id"], errors=[error]))
+        elif status is None:
+            error = bulk_error(line, "Parent item is not imported", "value_error.parent")
+            results.append(BulkItemResult(line=line, errors=[error]))
+        else:
+            results.append(BulkItemResult(line=line, id=row["id"], status=BulkItemStatus(status)))
+    results.sort(key=lambda r: r.line)
+    return results
@@ -0,0 +1,34 @@
+from datetime import date
+
+from nms.common.db.queries.dwh import queries_dwh
+from nms.common.db.repositories.base import BaseDwhRepository
+
+# таблицы хранилища, секционированные по времени (секция - сутки UTC)
+PARTITIONED_TABLES = ("rf_trace", "rf_signal")
+
+
+class PartitionsRepository(BaseDwhRepository):
+    async def create_daily_partitions(
+        self, table_name: str, from_date: date, days: int
+    ) -> int:
+        """
+        Создание отсутствующих секций таблицы
+        :param table_name: секционированная таблица
+        :param from_date: первые сутки (UTC)
+        :param days: количество суток
+        :return: количество созданных секций
+        """
+        return await queries_dwh.create_daily_partitions(
+            self.connection, table_name=table_name, from_date=from_date, days=days
+        )
+
+    async def drop_daily_partitions(self, table_name: str, before_date: date) -> int:
+        """
+        Удаление секций таблицы (целиком) за сутки ранее before_date
+        :param table_name: секционированная таблица
+        :param before_date: первые сутки (UTC), данные за которые сохраняются
+        :return: количество удаленных секций
+        """
+        return await queries_dwh.drop_daily_partitions(
+            self.connection, table_name=table_name, before_date=before_date
+        )
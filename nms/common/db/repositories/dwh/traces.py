@@ -0,0 +1,44 @@
+from typing import Iterable, Tuple
+
+from nms.common.db.repositories.base import BaseDwhRepository
+
+TRACE_COLUMNS = (
+    "guid",
+    "timestamp",
+    "start_freq_hz",
+    "stop_freq_hz",
+    "step_freq_hz",
+    "noise",
+    "numpoints",
+    "y_val_dbm",
+    "lat",
+    "lng",
+)
+SIGNAL_COLUMNS = (
+    "guid",
+    "trace_guid",
+    "timestamp",
+    "start_freq_hz",
+    "stop_freq_hz",
+    "f0_freq_hz",
+)
+
+
+class TracesRepository(BaseDwhRepository):
+    async def copy_traces(self, records: Iterable[Tuple]) -> None:
+        """
+        Запись спектрограмм в хранилище (COPY)
+        :param records: кортежи значений в порядке TRACE_COLUMNS
+        """
+        await self.connection.copy_records_to_table(
+            "rf_trace", records=records, columns=TRACE_COLUMNS
+        )
+
+    async def copy_signals(self, records: Iterable[Tuple]) -> None:
+        """
+        Запись сигналов спектрограмм в хранилище (COPY)
+        :param records: кортежи значений в порядке SIGNAL_COLUMNS
+        """
+        await self.connection.copy_records_to_table(
+            "rf_signal", records=records, columns=SIGNAL_COLUMNS
+        )
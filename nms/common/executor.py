@@ -0,0 +1,211 @@
+"""
+Выполнение ресурсоемких операций над спектрограммами в пуле процессов
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from nms.common.models.rfspectrumtrace import (
+    RfSpectrumSignal,
+    RfSpectrumTrace,
+    RfTraceSignals,
+    dbm_array_from_bytes,
+)
+
+_TRACE_FIELDS = (
+    "guid",
+    "start_freq_hz",
+    "stop_freq_hz",
+    "step_freq_hz",
+    "noise",
+    "numpoints",
+)
+
+# спектрограмма, переданная в процесс пула: поля без y_val_dbm,
+# y_val_dbm (bytes) или имя блока разделяемой памяти и размер массива мощностей
+_TraceRef = Tuple[dict, Optional[bytes], Optional[str], int]
+
+
+def _warmup() -> int:
+    # импорт numpy и моделей выполнен при загрузке модуля, первая операция - инициализация numpy
+    RfSpectrumTrace.construct(
+        **dict.fromkeys(_TRACE_FIELDS, 0), y_val_dbm=b"\x00\x00"
+    ).max_dbm()
+    return os.getpid()
+
+
+def _with_trace(ref: _TraceRef, func: Callable, *args):
+    fields, y_val_dbm, shm_name, size = ref
+    if shm_name is None:
+        return func(RfSpectrumTrace.construct(**fields, y_val_dbm=y_val_dbm), *args)
+
+    # процессы пула (spawn) используют resource_tracker родительского процесса,
+    # блок удаляется родительским процессом после завершения операции
+    shm = SharedMemory(name=shm_name)
+    buffer = shm.buf[:size]
+    error = None
+    trace = RfSpectrumTrace.construct(**fields, y_val_dbm=buffer)
+    # блок разделяемой памяти создан для этой операции: массив мощностей изменяется в нем на месте, без копирования
+    trace._owned_buffer = buffer
+    try:
+        result = func(trace, *args)
+    except Exception as err:
+        # traceback удерживает спектрограмму (и массив поверх разделяемой памяти) до закрытия блока
+        error = err.with_traceback(None)
+    del trace
+    buffer.release()
+    shm.close()
+    if error is not None:
+        raise error
+    return result
+
+
+def _cut_signals(
+    trace: RfSpectrumTrace,
+    signals: List[RfSpectrumSignal],
+    signals_guid: Optional[List[UUID]],
+    min_fq_bandwidth_hz: int,
+) -> Dict[str, Optional[RfSpectrumTrace]]:
+    return RfTraceSignals(trace, signals).cut_signals(signals_guid, min_fq_bandwidth_hz)
+
+
+def _get_max_dbm(
+    trace: RfSpectrumTrace, signals: List[RfSpectrumSignal], signals_guid: List[UUID]
+) -> List[float]:
+    trace_signals = RfTraceSignals(trace, signals)
+    return [trace_signals.get_max_dbm(signal_guid) for signal_guid in signals_guid]
+
+
+def _apply_gain(trace: RfSpectrumTrace, gain_value: float) -> Tuple[float, Optional[bytes]]:
+    trace.apply_gain(gain_value)
+    # в разделяемой памяти массив изменен на месте, иначе возвращается новый массив
+    return trace.noise, None if isinstance(trace.y_val_dbm, memoryview) else bytes(trace.y_val_dbm)
+
+
+class SpectrumExecutor:
+    """
+    Выполнение операций над спектрограммами (выделение сигналов, мощность сигналов, усиление)
+    в пуле процессов, чтобы не блокировать цикл событий сервиса.
+
+    Процессы пула запускаются (spawn) и инициализируются при старте. Массивы мощностей спектрограмм
+    размером от shm_min_size байт передаются в процессы пула через разделяемую память, без сериализации.
+    При max_workers = 0 операции выполняются в текущем процессе.
+    """
+
+    def __init__(self, max_workers: int, shm_min_size: int):
+        self._max_workers = max_workers
+        self._shm_min_size = shm_min_size
+        self._pool = None  # type: Optional[ProcessPoolExecutor]
+
+    async def start(self) -> None:
+        if self._max_workers <= 0:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._pool, _warmup) for _ in range(self._max_workers))
+        )
+
+    async def stop(self) -> None:
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    async def _run(self, func: Callable, trace: RfSpectrumTrace, *args):
+        """
+        Выполнение операции в процессе пула
+        :return: результат операции и блок разделяемой памяти с массивом мощностей (освобождается вызывающим)
+        """
+        fields = {name: getattr(trace, name) for name in _TRACE_FIELDS}
+        size = len(trace.y_val_dbm)
+        loop = asyncio.get_running_loop()
+        if size < self._shm_min_size:
+            ref = (fields, bytes(trace.y_val_dbm), None, size)
+            return await loop.run_in_executor(self._pool, partial(_with_trace, ref, func, *args)), None
+
+        shm = SharedMemory(create=True, size=size)
+        try:
+            shm.buf[:size] = trace.y_val_dbm
+            ref = (fields, None, shm.name, size)
+            return await loop.run_in_executor(self._pool, partial(_with_trace, ref, func, *args)), shm
+        except BaseException:
+            self._release(shm)
+            raise
+
+    @staticmethod
+    def _release(shm: Optional[SharedMemory]) -> None:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    async def cut_signals(
+        self,
+        trace: RfSpectrumTrace,
+        signals: List[RfSpectrumSignal],
+        signals_guid: Optional[Iterable[UUID]] = None,
+        min_fq_bandwidth_hz: int = 0,
+    ) -> Dict[str, Optional[RfSpectrumTrace]]:
+        """
+        Выделение сигналов из спектрограммы (см. RfTraceSignals.cut_signals)
+        :param trace: спектрограмма
+        :param signals: сигналы спектрограммы
+        :param signals_guid: идентификаторы сигналов, если не заданы - все сигналы спектрограммы
+        :param min_fq_bandwidth_hz: минимальная полоса сигнала (дискретность обработки)
+        :return: спектрограммы по идентификаторам сигналов
+        """
+        if signals_guid is not None:
+            signals_guid = list(signals_guid)
+        if self._pool is None:
+            return _cut_signals(trace, signals, signals_guid, min_fq_bandwidth_hz)
+        result, shm = await self._run(
+            _cut_signals, trace, list(signals), signals_guid, min_fq_bandwidth_hz
+        )
+        self._release(shm)
+        return result
+
+    async def get_max_dbm(
+        self,
+        trace: RfSpectrumTrace,
+        signals: List[RfSpectrumSignal],
+        signals_guid: Iterable[UUID],
+    ) -> List[float]:
+        """
+        Максимальные значения мощности сигналов (см. RfTraceSignals.get_max_dbm)
+        :param trace: спектрограмма
+        :param signals: сигналы спектрограммы
+        :param signals_guid: идентификаторы сигналов
+        :return: значения мощности, дБм, в порядке signals_guid
+        """
+        if self._pool is None:
+            return _get_max_dbm(trace, signals, list(signals_guid))
+        result, shm = await self._run(_get_max_dbm, trace, list(signals), list(signals_guid))
+        self._release(shm)
+        return result
+
+    async def apply_gain(self, trace: RfSpectrumTrace, gain_value: float) -> None:
+        """
+        Применить коэффициент усиления ко всем точкам спектрограммы (см. RfSpectrumTrace.apply_gain)
+        :param trace: спектрограмма, изменяется на месте
+        :param gain_value: коэффициент усиления
+        """
+        if self._pool is None:
+            trace.apply_gain(gain_value)
+            return
+        (noise, y_val_dbm), shm = await self._run(_apply_gain, trace, gain_value)
+        try:
+            if shm is not None:
+                y_val_dbm = shm.buf[: len(trace.y_val_dbm)]
+            trace.writable_samples()[:] = dbm_array_from_bytes(y_val_dbm)
+            trace.noise = noise
+        finally:
+            if shm is not None:
+                y_val_dbm.release()
+            self._release(shm)
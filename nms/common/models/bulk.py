@@ -0,0 +1,63 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, root_validator
+
+from nms.common.models.commands import CommandsTocInCreate
+from nms.common.models.equipments import EquipmentInCreate
+
+
+class BulkMode(str, Enum):
+    # добавление: запись с существующим обозначением - ошибка
+    INSERT = "insert"
+    # добавление или изменение существующих записей (по обозначению)
+    UPSERT = "upsert"
+
+
+class BulkItemStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+
+
+class BulkTreeItem(BaseModel):
+    """
+    Элемент пакета записей дерева (оборудование, разделы каталога команд): родительская запись задается
+    идентификатором (parent_id) или ключом ref элемента того же пакета (parent_ref)
+    """
+
+    ref: Optional[str] = Field(
+        min_length=1, max_length=100, description="ключ элемента в пакете (для parent_ref других элементов)"
+    )
+    parent_ref: Optional[str] = Field(
+        min_length=1, max_length=100, description="ключ ref родительского элемента пакета, вместо parent_id"
+    )
+
+    @root_validator(skip_on_failure=True)
+    def check_parent(cls, values):
+        if values.get("parent_id") is not None and values.get("parent_ref") is not None:
+            raise ValueError("parent_id and parent_ref are mutually exclusive")
+        return values
+
+
+class EquipmentInBulk(EquipmentInCreate, BulkTreeItem):
+    pass
+
+
+class CommandsTocInBulk(CommandsTocInCreate, BulkTreeItem):
+    pass
+
+
+class BulkItemResult(BaseModel):
+    line: int = Field(description="номер элемента массива (строки NDJSON), начиная с 1")
+    id: Optional[int] = Field(description="идентификатор добавленной (существующей) записи")
+    status: Optional[BulkItemStatus] = Field(description="результат, отсутствует для отклоненного элемента")
+    errors: Optional[List[Dict[str, Any]]] = None
+
+
+class BulkImportResponse(BaseModel):
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    results: List[BulkItemResult] = []
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class ExportFormat(str, Enum):
+    """Формат выгрузки каталога"""
+
+    NDJSON = "ndjson"  # строка - объект JSON записи
+    CSV = "csv"  # строка заголовка (имена полей), значения JSON (объекты, массивы) - текст JSON
@@ -1,5 +1,7 @@
+import base64
+import json
 from collections.abc import Sequence
-from typing import Generic, TypeVar, Union
+from typing import Generic, Optional, Tuple, TypeVar, Union
 
 from pydantic import Field
 from pydantic.generics import GenericModel
@@ -8,11 +10,47 @@ T = TypeVar("T")
 
 
 class ResponsePage(GenericModel, Generic[T]):
-    page: int = Field(description="номер страницы")
+    page: Optional[int] = Field(description="номер страницы (null - страница запрошена по курсору)")
     limit: int = Field(description="максимальное количество записей на странице")
-    total: int = Field(description="всего записей")
+    total: Optional[int] = Field(description="всего записей (null - страница запрошена по курсору)")
+    total_exact: bool = Field(
+        default=True,
+        description="false - total является оценкой снизу (подсчет ограничен параметром count-limit)",
+    )
     params: dict[str, Union[int, str]] = Field(
         default=dict(),
         description="список параметров, принятых при формировании страницы",
     )
+    next: Optional[str] = Field(
+        default=None,
+        description="курсор следующей страницы (параметр cursor), null - страница последняя",
+    )
     content: Sequence[T]
+
+
+def encode_cursor(name: str, item_id: int) -> str:
+    """
+    Курсор страницы: ключ сортировки (name, id) последней записи предыдущей страницы
+    :param name: name последней записи
+    :param item_id: id последней записи
+    :return: непрозрачная для клиента строка
+    """
+    data = json.dumps([name, item_id], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Ключ сортировки (name, id) из курсора страницы (см. encode_cursor)
+    :param cursor: курсор
+    :return: name и id последней записи предыдущей страницы
+    """
+    try:
+        name, item_id = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"Invalid cursor: {cursor}") from err
+    if not isinstance(name, str) or not isinstance(item_id, int) or isinstance(item_id, bool):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return name, item_id
@@ -3,11 +3,12 @@
 """
 from datetime import datetime
 from math import ceil
-from typing import List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 from uuid import uuid4 as gen_uuid4
 
-from scipy import interpolate
+import numpy as np
+from pydantic import PrivateAttr
 
 from .gis import LocationPoint
 from .pydantic_patch import PropertyBaseModel
@@ -38,14 +39,40 @@ class RfSpectrumSignal(RfBandwidth):
         self.f0_freq_hz -= delta
 
 
+# значения мощности хранятся в виде int16 (little-endian) в сотых долях дБм
+DBM_ARRAY_DTYPE = np.dtype("<i2")
+DBM_ARRAY_SCALE = 100
+
+
+def dbm_array_from_bytes(dbm_array: bytes) -> np.ndarray:
+    """
+    Представление упакованного массива мощностей в виде int16 (сотые доли дБм), без копирования данных
+    :param dbm_array: упакованный массив мощностей
+    :return: массив int16 (только для чтения, если исходный буфер неизменяемый)
+    """
+    return np.frombuffer(dbm_array, dtype=DBM_ARRAY_DTYPE)
+
+
+def dbm_array_to_centi(dbm_array) -> np.ndarray:
+    """
+    Перевод значений мощности (дБм) в сотые доли дБм с округлением, совпадающим с round(y * 100)
+    (округление половины к четному, см. dbm_array_decoder)
+    :param dbm_array: значения мощности, дБм
+    :return: массив int16
+    """
+    centi = np.rint(np.asarray(dbm_array, dtype=np.float64) * DBM_ARRAY_SCALE)
+    if centi.size:
+        if np.isnan(centi).any():
+            raise ValueError("dBm value is NaN")
+        info = np.iinfo(DBM_ARRAY_DTYPE)
+        if centi.min() < info.min or centi.max() > info.max:
+            raise OverflowError("dBm value is out of int16 range")
+    return centi.astype(DBM_ARRAY_DTYPE)
+
+
 def dbm_array_encoder(dbm_array: bytes) -> list:
-    if isinstance(dbm_array, bytes):
-        return [
-            int.from_bytes(y, "little", signed=True) / 100
-            for y in [
-                dbm_array[offset : offset + 2] for offset in range(0, len(dbm_array), 2)
-            ]
-        ]
+    if isinstance(dbm_array, (bytes, bytearray)):
+        return (dbm_array_from_bytes(dbm_array) / DBM_ARRAY_SCALE).tolist()
 
 
 def dbm_array_decoder(dbm_array: list) -> bytes:
@@ -61,10 +88,10 @@ def dbm_array_decoder(dbm_array: list) -> bytes:
 
         int.to_bytes(int(-75.24 * 100), 2, 'little', signed=True)
         b'\x9d\xe2' <- НЕ СОВПАДАЕТ!!!  т.к. -75.24 * 100 = -7523.999999999999
+
+        np.rint() округляет так же, как round(): половину - к четному
         """
-        return b"".join(
-            [int.to_bytes(round(y * 100), 2, "little", signed=True) for y in dbm_array]
-        )
+        return dbm_array_to_centi(dbm_array).tobytes()
 
 
 class RfSpectrumTrace(RfBandwidth):
@@ -73,18 +100,81 @@ class RfSpectrumTrace(RfBandwidth):
     numpoints: int
     y_val_dbm: bytes
 
+    # int16-представление y_val_dbm (сотые доли дБм), разделяющее с ним память
+    _samples: Optional[np.ndarray] = PrivateAttr(default=None)
+    _samples_buffer: Any = PrivateAttr(default=None)
+    # копия y_val_dbm (bytearray), созданная этой спектрограммой для изменения на месте
+    _owned_buffer: Any = PrivateAttr(default=None)
+
     class Config:
-        json_encoders = {bytes: dbm_array_encoder}
+        json_encoders = {bytes: dbm_array_encoder, bytearray: dbm_array_encoder}
+
+    def samples(self) -> np.ndarray:
+        """
+        Значения мощности спектрограммы в сотых долях дБм (int16) поверх буфера y_val_dbm, без копирования.
+        Массив создается один раз и переиспользуется всеми операциями над спектрограммой
+        """
+        if self._samples_buffer is not self.y_val_dbm:
+            self._samples = dbm_array_from_bytes(self.y_val_dbm)
+            self._samples_buffer = self.y_val_dbm
+        return self._samples
+
+    def copy(self, *args, **kwargs) -> "RfSpectrumTrace":
+        result = super().copy(*args, **kwargs)
+        # копия (shallow) разделяет буфер y_val_dbm с исходной спектрограммой: обе изменяют его только после копирования
+        result._owned_buffer = None
+        if result.y_val_dbm is self.y_val_dbm:
+            self._owned_buffer = None
+        return result
+
+    def writable_samples(self) -> np.ndarray:
+        """
+        Значения мощности спектрограммы (int16, см. samples) для изменения на месте
+        """
+        if self._owned_buffer is None or self._owned_buffer is not self.y_val_dbm:
+            # буфер может разделяться с другими спектрограммами (copy, присваивание): единственная копия
+            # в bytearray при первом изменении, дальше все изменения выполняются на месте
+            self.y_val_dbm = bytearray(self.y_val_dbm)
+            self._owned_buffer = self.y_val_dbm
+        return self.samples()
+
+    def points_count(self) -> int:
+        """
+        Фактическое количество точек спектрограммы: сетка частот ограничена полосой и значением numpoints
+        """
+        return len(
+            range(self.start_freq_hz, self.stop_freq_hz + 1, self.step_freq_hz)[
+                : self.numpoints
+            ]
+        )
+
+    def point_index(self, freq_hz: int, round_up: bool = False) -> int:
+        """
+        Номер точки равномерной сетки частот спектрограммы для заданной частоты (без проверки границ)
+        :param freq_hz: частота, Гц
+        :param round_up: False - ближайшая точка с частотой <= freq_hz, True - ближайшая точка с частотой >= freq_hz
+        :return: номер точки
+        """
+        if round_up:
+            return -((self.start_freq_hz - freq_hz) // self.step_freq_hz)
+        return (freq_hz - self.start_freq_hz) // self.step_freq_hz
+
+    def max_dbm(self, start: int = 0, stop: Optional[int] = None) -> float:
+        """
+        Максимальное значение мощности на отрезке точек спектрограммы [start, stop)
+        :param start: номер первой точки
+        :param stop: номер точки, следующей за последней (None - до конца спектрограммы)
+        :return: значение мощности, дБм
+        """
+        return int(self.samples()[start:stop].max()) / DBM_ARRAY_SCALE
 
     def apply_gain(self, gain_value: float) -> None:
         """
-        Применить коэффициент усиления ко всем точкам спектрограммы
+        Применить коэффициент усиления ко всем точкам спектрограммы (буфер y_val_dbm изменяется на месте)
         :param gain_value: коэффициент усиления
         """
-        y_val_dbm_arr = dbm_array_encoder(self.y_val_dbm)
-        self.y_val_dbm = dbm_array_decoder(
-            list(map(lambda y: y + gain_value, y_val_dbm_arr))
-        )
+        samples = self.writable_samples()
+        samples[:] = dbm_array_to_centi(samples / DBM_ARRAY_SCALE + gain_value)
         self.noise += gain_value
 
     def blank(self) -> None:
@@ -105,6 +195,9 @@ class RfTraceSignals:
     def __init__(self, trace: RfSpectrumTrace, signals: List[RfSpectrumSignal]):
         self.trace = trace
         self.signals = signals
+        self._signals_index: Dict[str, RfSpectrumSignal] = dict()
+        for signal in signals:
+            self._signals_index.setdefault(signal.guid, signal)
 
     @property
     def trace_guid(self) -> str:
@@ -115,9 +208,7 @@ class RfTraceSignals:
         return tuple(signal.guid for signal in self.signals)
 
     def signal_by_guid(self, signal_guid: UUID) -> Optional[RfSpectrumSignal]:
-        return next(
-            (signal for signal in self.signals if signal.guid == signal_guid.hex), None
-        )
+        return self._signals_index.get(signal_guid.hex)
 
     def __getitem__(self, signal_guid: UUID) -> Optional[RfSpectrumSignal]:
         return self.signal_by_guid(signal_guid)
@@ -132,53 +223,72 @@ class RfTraceSignals:
         if signal is None:
             raise ValueError("Unknown signal GUID")
 
-        y_val_dbm = dbm_array_encoder(self.trace.y_val_dbm)
-
-        # дополнительный контроль за фактическим кол-вом точек в спектрограмме
-        x_val_hz = range(
-            self.trace.start_freq_hz,
-            self.trace.stop_freq_hz + 1,
-            self.trace.step_freq_hz,
-        )[: self.trace.numpoints]
-        last_point_n = min(
-            (n for n in enumerate(x_val_hz) if n[1] >= signal.stop_freq_hz),
-            key=lambda x: x[0],
-            default=(0, 0),
-        )[0]
-        return max(y_val_dbm[:last_point_n])
+        # первая точка спектрограммы с частотой >= частоты окончания сигнала (0, если такой точки нет)
+        last_point_n = max(self.trace.point_index(signal.stop_freq_hz, round_up=True), 0)
+        if last_point_n >= self.trace.points_count():
+            last_point_n = 0
+        return self.trace.max_dbm(stop=last_point_n)
+
+    def cut_signals(
+        self,
+        signals_guid: Optional[Iterable[UUID]] = None,
+        min_fq_bandwidth_hz: int = 0,
+    ) -> Dict[str, Optional[RfSpectrumTrace]]:
+        """
+        Выделяет из спектрограммы сигналы в виде новых спектрограмм за один проход по спектрограмме
+        (см. cut_signal_from_trace)
+        :param signals_guid: идентификаторы сигналов, если не заданы - все сигналы спектрограммы
+        :param min_fq_bandwidth_hz: минимальная полоса сигнала (дискретность обработки), если = 0 - игнорировать дискретность
+        :return: спектрограммы по идентификаторам сигналов (None - невозможно вырезать сигнал по заданным условиям)
+        """
+        if signals_guid is None:
+            signals = self.signals
+        else:
+            signals = list()
+            for signal_guid in signals_guid:
+                signal = self.signal_by_guid(signal_guid)
+                if signal is None:
+                    raise ValueError("Unknown signal GUID")
+                signals.append(signal)
+
+        result: Dict[str, Optional[RfSpectrumTrace]] = dict()
+        cut_ranges = list()
+        for signal in signals:
+            result[signal.guid] = None
+            cut_range = _calc_cut_range(self.trace, signal, min_fq_bandwidth_hz)
+            if cut_range is not None:
+                cut_ranges.append((signal, cut_range))
+        if not cut_ranges:
+            return result
+
+        # точки всех сигналов интерполируются одним вызовом по всей сетке частот спектрограммы
+        step_freq_hz = self.trace.step_freq_hz
+        points = self.trace.points_count()
+        x_val_hz = [
+            np.arange(cut_start_freq_hz, cut_stop_freq_hz + 1, step_freq_hz)
+            for _, (cut_start_freq_hz, cut_stop_freq_hz) in cut_ranges
+        ]
+        y_val_dbm = np.interp(
+            np.concatenate(x_val_hz),
+            self.trace.start_freq_hz + step_freq_hz * np.arange(points),
+            self.trace.samples()[:points] / DBM_ARRAY_SCALE,
+        )
+        offset = 0
+        for (signal, cut_range), x_signal_hz in zip(cut_ranges, x_val_hz):
+            result[signal.guid] = _build_cut_trace(
+                self.trace, cut_range, y_val_dbm[offset : offset + len(x_signal_hz)]
+            )
+            offset += len(x_signal_hz)
+        return result
 
 
-def cut_signal_from_trace(
-    src_trace: RfSpectrumTrace, signal: RfSpectrumSignal, min_fq_bandwidth_hz: int = 0
-) -> Optional[RfSpectrumTrace]:
+def _calc_cut_range(
+    src_trace: RfSpectrumTrace, signal: RfSpectrumSignal, min_fq_bandwidth_hz: int
+) -> Optional[Tuple[int, int]]:
     """
-    Выделяет из спектрограммы отдельный сигнал в виде новой спектрограммы
-    :param src_trace: исходная спектрограмма
-    :param signal: сигнал
-    :param min_fq_bandwidth_hz: минимальная полоса сигнала (дискретность обработки), если = 0 - игнорировать дискретность
-    :return: спектрограмма или None (невозможно вырезать сигнал по заданным условиям)
+    Границы выделяемого из спектрограммы сигнала
+    :return: (начальная частота, конечная частота) или None (невозможно вырезать сигнал по заданным условиям)
     """
-
-    def _calc_cut_range():
-        if (
-            len(x_val_hz) > 0
-            and cut_start_freq_hz >= x_val_hz[0]
-            and cut_stop_freq_hz <= x_val_hz[-1]
-        ):
-            _first = max(
-                (n for n in enumerate(x_val_hz) if n[1] <= cut_start_freq_hz),
-                key=lambda x: x[0],
-                default=None,
-            )
-            _last = min(
-                (n for n in enumerate(x_val_hz) if n[1] >= cut_stop_freq_hz),
-                key=lambda x: x[0],
-                default=None,
-            )
-            return _first, _last
-        else:
-            return None, None
-
     # начинаем вырезать всегда с частоты, заданной в сигнале
     cut_start_freq_hz = signal.start_freq_hz
     if min_fq_bandwidth_hz > 0:
@@ -191,31 +301,54 @@ def cut_signal_from_trace(
         cut_stop_freq_hz = signal.stop_freq_hz
 
     # дополнительный контроль за фактическим кол-вом точек в спектрограмме
-    x_val_hz = range(
-        src_trace.start_freq_hz, src_trace.stop_freq_hz + 1, src_trace.step_freq_hz
-    )[: src_trace.numpoints]
-
-    first, last = _calc_cut_range()
-    if first is None or last is None:
-        # невозможно вырезать сигнал по заданным условиям
+    points = src_trace.points_count()
+    if (
+        points == 0
+        or cut_start_freq_hz < src_trace.start_freq_hz
+        or cut_stop_freq_hz > src_trace.start_freq_hz + (points - 1) * src_trace.step_freq_hz
+    ):
         return None
-    src_y_val_dbm = dbm_array_encoder(src_trace.y_val_dbm)
-
-    y_base = src_y_val_dbm[first[0] : (last[0] + 1)]
-    x_base = [x for x in range(first[1], last[1] + 1, src_trace.step_freq_hz)]
-    f = interpolate.interp1d(x_base, y_base)
-    y_val_dbm = [
-        round(f(x).item(0), 2)
-        for x in range(cut_start_freq_hz, cut_stop_freq_hz + 1, src_trace.step_freq_hz)
-    ]
-    y_val_dbm_packed = dbm_array_decoder(y_val_dbm)
-    trace = RfSpectrumTrace(
+    return cut_start_freq_hz, cut_stop_freq_hz
+
+
+def _build_cut_trace(
+    src_trace: RfSpectrumTrace, cut_range: Tuple[int, int], y_val_dbm: np.ndarray
+) -> RfSpectrumTrace:
+    # round() - для совпадения с прежним округлением до 0.01 дБм
+    y_val_dbm = [round(y, 2) for y in y_val_dbm.tolist()]
+    cut_start_freq_hz, cut_stop_freq_hz = cut_range
+    return RfSpectrumTrace(
         guid=gen_uuid4().hex,
         start_freq_hz=cut_start_freq_hz,
         step_freq_hz=src_trace.step_freq_hz,
         stop_freq_hz=cut_stop_freq_hz,
         noise=src_trace.noise,
         numpoints=len(y_val_dbm),
-        y_val_dbm=y_val_dbm_packed,
+        y_val_dbm=dbm_array_decoder(y_val_dbm),
     )
-    return trace
+
+
+def cut_signal_from_trace(
+    src_trace: RfSpectrumTrace, signal: RfSpectrumSignal, min_fq_bandwidth_hz: int = 0
+) -> Optional[RfSpectrumTrace]:
+    """
+    Выделяет из спектрограммы отдельный сигнал в виде новой спектрограммы
+    :param src_trace: исходная спектрограмма
+    :param signal: сигнал
+    :param min_fq_bandwidth_hz: минимальная полоса сигнала (дискретность обработки), если = 0 - игнорировать дискретность
+    :return: спектрограмма или None (невозможно вырезать сигнал по заданным условиям)
+    """
+    cut_range = _calc_cut_range(src_trace, signal, min_fq_bandwidth_hz)
+    if cut_range is None:
+        # невозможно вырезать сигнал по заданным условиям
+        return None
+
+    # сетка частот равномерная: граничные точки вычисляются без перебора
+    cut_start_freq_hz, cut_stop_freq_hz = cut_range
+    first = src_trace.point_index(cut_start_freq_hz)
+    last = src_trace.point_index(cut_stop_freq_hz, round_up=True)
+    x_base = src_trace.start_freq_hz + src_trace.step_freq_hz * np.arange(first, last + 1)
+    y_base = src_trace.samples()[first : (last + 1)] / DBM_ARRAY_SCALE
+    x_val_hz = np.arange(cut_start_freq_hz, cut_stop_freq_hz + 1, src_trace.step_freq_hz)
+    # линейная интерполяция
+    return _build_cut_trace(src_trace, cut_range, np.interp(x_val_hz, x_base, y_base))
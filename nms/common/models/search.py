@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class NameMatch(str, Enum):
+    """Сравнение обозначения (name) с условием поиска, без учета регистра"""
+
+    EXACT = "exact"  # совпадение
+    PREFIX = "prefix"  # обозначение начинается с условия
@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Dict, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class CoreServiceInfo(BaseModel):
@@ -31,8 +32,25 @@ class UptimeResponse(BaseModel):
     seconds: int
 
 
+class PoolStats(BaseModel):
+    dsn_type: str
+    replica: bool = False
+    min_size: int
+    max_size: int
+    size: int = Field(description="открытых соединений")
+    in_use: int = Field(description="соединений, выданных обработчикам")
+    idle: int = Field(description="открытых свободных соединений")
+    waiters: int = Field(description="ожидающих получения соединения")
+    acquired: int = Field(description="всего получено соединений")
+    acquire_wait_ms: Dict[str, int] = Field(
+        description="время ожидания соединения: количество получений по интервалам (верхняя граница, мс)"
+    )
+    acquire_wait_max_ms: float
+
+
 class CtrlInfoResponse(BaseModel):
     timestamp: datetime
     uuid: str
     health_code: int
     uptime: UptimeResponse
+    pools: List[PoolStats] = []
@@ -25,6 +25,7 @@ class CoreService:
         self._startup_time = datetime.now().astimezone()
 
         self._connection_pool = dict()
+        self._replica_pools = dict()
 
     @staticmethod
     def get_instance(service_info: CoreServiceInfo = None):
@@ -58,12 +59,27 @@ class CoreService:
             # 0 - проблем в работе сервиса нет
             health_code=0,
             uptime=self.uptime,
+            pools=[
+                pool.stats(dsn_type)
+                for dsn_type, pool in self._connection_pool.items()
+                if hasattr(pool, "stats")
+            ]
+            + [
+                stats
+                for dsn_type, replicas in self._replica_pools.items()
+                for stats in replicas.stats(dsn_type)
+            ],
         )
 
     def register_connection_pool(self, dsn_type: DSNType, pool):
         self._connection_pool[dsn_type] = pool
 
+    def register_replica_pools(self, dsn_type: DSNType, replicas):
+        self._replica_pools[dsn_type] = replicas
+
     async def close_all_pools(self):
+        for replicas in self._replica_pools.values():
+            await replicas.close()
         for dsn_type, pool in self._connection_pool.items():
             if dsn_type in (DSNType.NMS, DSNType.ADMIN, DSNType.AUTH, DSNType.DWH):
                 await pool.close()
@@ -76,6 +92,10 @@ class CoreService:
             raise ValueError(f"The requested DSN Type is not supported: {dsn_type}")
         return pool
 
+    def get_replica_pools(self, dsn_type: DSNType):
+        """Пулы реплик (ReplicaPools), None - реплики не заданы"""
+        return self._replica_pools.get(dsn_type)
+
 
 def get_service(service_info: CoreServiceInfo = None) -> CoreService:
     return CoreService.get_instance(service_info)
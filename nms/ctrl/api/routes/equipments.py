@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
 
+from nms.common.api.conditional import conditional_response, entity_etag
 from nms.common.api.dependencies.equipment import get_equipment_by_id
 from nms.common.models.equipments import EquipmentInDb, EquipmentInResponse
 from nms.ctrl.models.equipments import Equipment
@@ -15,8 +16,15 @@ router = APIRouter(tags=["equipments"])
     response_model=EquipmentInResponse,
 )
 async def get_equipment(
+    request: Request,
+    response: Response,
     equipment: EquipmentInDb = Depends(get_equipment_by_id),
 ) -> EquipmentInResponse:
+    not_modified = conditional_response(
+        request, response, entity_etag("equipment", equipment), equipment.update_dt
+    )
+    if not_modified is not None:
+        return not_modified
     return EquipmentInResponse.from_orm(equipment)
 
 
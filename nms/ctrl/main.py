@@ -2,7 +2,8 @@ import logging
 
 from nms.common.api.app import create_application
 from nms.common.config import DSNType, get_settings
-from nms.common.db.events import connect_to_db
+from nms.common.db.events import connect_to_db, connect_to_replicas
+from nms.common.db.queries.nms import queries_nms
 
 from . import version
 from .api.routes import equipments
@@ -29,8 +30,15 @@ async def startup_event():
 
     settings = get_settings()
     log.debug(f"Connecting to {settings.db_nms_dsn}")
-    pool = await connect_to_db(repr(settings.db_nms_dsn))
+    pool = await connect_to_db(
+        repr(settings.db_nms_dsn),
+        settings.get_pool_settings(DSNType.NMS),
+        queries=queries_nms,
+    )
     app.state.core.register_connection_pool(DSNType.NMS, pool)
+    replicas = await connect_to_replicas(settings, DSNType.NMS, queries=queries_nms)
+    if replicas is not None:
+        app.state.core.register_replica_pools(DSNType.NMS, replicas)
     log.debug("Connection established")
 
 
@@ -0,0 +1,7 @@
+from fastapi import Request
+
+from nms.common.executor import SpectrumExecutor
+
+
+def get_spectrum_executor(request: Request) -> SpectrumExecutor:
+    return request.app.state.spectrum_executor
@@ -0,0 +1,40 @@
+from fastapi import HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+
+from nms.common.models.rfspectrumtrace import RfSpectrumTraceForLocation
+from nms.inbox.models.traces import (TRACE_BINARY_MEDIA_TYPE,
+                                     RfSpectrumTraceInRequest,
+                                     unpack_binary_trace)
+
+
+async def get_trace_from_request(request: Request) -> RfSpectrumTraceForLocation:
+    """
+    Спектрограмма из тела запроса: JSON (RfSpectrumTraceInRequest) или бинарный формат,
+    в зависимости от Content-Type
+    """
+    body = await request.body()
+    content_type = request.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type == TRACE_BINARY_MEDIA_TYPE:
+        try:
+            return unpack_binary_trace(body)
+        except ValueError as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+
+    try:
+        trace_unpacked = RfSpectrumTraceInRequest.parse_raw(body)
+    except ValidationError as err:
+        raise RequestValidationError([ErrorWrapper(err, loc=('body',))])
+    return packed_trace(trace_unpacked)
+
+
+def packed_trace(trace_unpacked: RfSpectrumTraceInRequest) -> RfSpectrumTraceForLocation:
+    """
+    Спектрограмма из JSON запроса с упакованным массивом мощностей
+    :raise HTTPException: 400, значения мощности вне диапазона int16 (сотые доли дБм) или NaN
+    """
+    try:
+        return trace_unpacked.as_packed_trace()
+    except (ValueError, OverflowError) as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
@@ -0,0 +1,15 @@
+from fastapi import HTTPException, Request, status
+
+from nms.inbox.services.writer import TraceWriter, WriterOverloaded
+
+
+def get_trace_writer(request: Request) -> TraceWriter:
+    return request.app.state.trace_writer
+
+
+def writer_overloaded_error(err: WriterOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(err),
+        headers={'Retry-After': '1'},
+    )
@@ -1,10 +1,20 @@
 from typing import List
 
-from fastapi import APIRouter, Body, Response, status
+from fastapi import (APIRouter, Body, Depends, HTTPException, Request,
+                     Response, status)
+from pydantic import ValidationError
 
 from nms.common.api.gzip_request import GzipRoute
-from nms.common.models.rfspectrumtrace import RfSpectrumSignal
-from nms.inbox.models.traces import RfSpectrumTraceInRequest
+from nms.common.api.ndjson import NDJSON_MEDIA_TYPE, iter_ndjson_lines
+from nms.common.models.rfspectrumtrace import (RfSpectrumSignal,
+                                               RfSpectrumTraceForLocation)
+from nms.inbox.api.dependencies.traces import get_trace_from_request
+from nms.inbox.api.dependencies.writer import (get_trace_writer,
+                                               writer_overloaded_error)
+from nms.inbox.config import InboxSettings, get_inbox_settings
+from nms.inbox.models.bulk import (BulkIngestResponse, BulkRecordInRequest,
+                                   BulkRecordResult)
+from nms.inbox.services.writer import TraceWriter, WriterOverloaded
 
 router = APIRouter(
     prefix='/inbox',
@@ -17,12 +27,22 @@ router = APIRouter(
     '/traces',
     name='inbox:post-trace-data',
     summary='Передать данные о новой спектрограмме',
+    description='Тело запроса: JSON (RfSpectrumTraceInRequest) или бинарная спектрограмма '
+                '(Content-Type: application/vnd.nms.trace, см. nms.inbox.models.traces), '
+                'допускается сжатие gzip (Content-Encoding: gzip). '
+                'Спектрограмма записывается в хранилище асинхронно, при перегрузке - ответ 503',
     status_code=status.HTTP_201_CREATED
 )
 async def post_trace_data(
-        trace_unpacked: RfSpectrumTraceInRequest = Body(...)
+        trace: RfSpectrumTraceForLocation = Depends(get_trace_from_request),
+        writer: TraceWriter = Depends(get_trace_writer)
 ):
-    trace = trace_unpacked.as_packed_trace()
+    try:
+        await writer.put(traces=[trace])
+    except WriterOverloaded as err:
+        raise writer_overloaded_error(err)
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
     return {"guid": trace.guid}
 
 
@@ -33,6 +53,67 @@ async def post_trace_data(
     status_code=status.HTTP_201_CREATED
 )
 async def post_trace_signals(
-        signals: List[RfSpectrumSignal] = Body(...)
+        signals: List[RfSpectrumSignal] = Body(...),
+        writer: TraceWriter = Depends(get_trace_writer)
 ):
+    try:
+        await writer.put(signals=signals)
+    except WriterOverloaded as err:
+        raise writer_overloaded_error(err)
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
     return [signal.guid for signal in signals]
+
+
+@router.post(
+    '/bulk',
+    name='inbox:post-bulk',
+    summary='Пакетная передача спектрограмм и сигналов',
+    description=f'Тело запроса: NDJSON ({NDJSON_MEDIA_TYPE}), каждая строка - запись BulkRecordInRequest '
+                '({"trace": {...}, "signals": [...]}), допускается сжатие (Content-Encoding). '
+                'Записи проверяются по мере поступления, результат возвращается для каждой записи. '
+                'При перегрузке записи хранилища обработка прекращается: запись получает ошибку '
+                'service_unavailable, следующие за ней строки не обрабатываются',
+    response_model=BulkIngestResponse
+)
+async def post_bulk(
+        request: Request,
+        settings: InboxSettings = Depends(get_inbox_settings),
+        writer: TraceWriter = Depends(get_trace_writer)
+) -> BulkIngestResponse:
+    response = BulkIngestResponse()
+    max_record_size = settings.inbox_bulk_max_record_size
+    async for line_no, line in iter_ndjson_lines(request.stream_decoded(), max_record_size):
+        result = BulkRecordResult(line=line_no)
+        overloaded = False
+        if line is None:
+            result.errors = [{'loc': ['body', line_no], 'msg': f'Record exceeds {max_record_size} bytes',
+                              'type': 'value_error.record_size'}]
+        else:
+            try:
+                record = BulkRecordInRequest.parse_raw(line)
+                traces = [record.trace.as_packed_trace()] if record.trace is not None else []
+                await writer.put(
+                    traces=traces,
+                    signals=record.signals,
+                    timestamp=traces[0].timestamp if traces else None,
+                )
+                result.guid = traces[0].guid if traces else None
+                result.signals = [signal.guid for signal in record.signals]
+            except ValidationError as err:
+                # ctx не возвращается: для ошибок разбора JSON он содержит всю строку записи
+                result.errors = [{'loc': ['body', line_no, *e['loc']], 'msg': e['msg'], 'type': e['type']}
+                                 for e in err.errors()]
+            except (ValueError, OverflowError) as err:
+                result.errors = [{'loc': ['body', line_no], 'msg': str(err), 'type': 'value_error'}]
+            except WriterOverloaded as err:
+                result.errors = [{'loc': ['body', line_no], 'msg': str(err), 'type': 'service_unavailable'}]
+                overloaded = True
+        if result.errors is None:
+            response.accepted += 1
+        else:
+            response.rejected += 1
+        response.results.append(result)
+        if overloaded:
+            break
+    return response
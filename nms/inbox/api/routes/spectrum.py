@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+
+from nms.common.api.gzip_request import GzipRoute
+from nms.common.executor import SpectrumExecutor
+from nms.common.models.rfspectrumtrace import (RfSpectrumTrace,
+                                               RfSpectrumTraceForLocation)
+from nms.inbox.api.dependencies.spectrum import get_spectrum_executor
+from nms.inbox.api.dependencies.traces import packed_trace
+from nms.inbox.models.spectrum import (CutSignalsInRequest, GainInRequest,
+                                       MaxDbmInRequest)
+
+# операции выполняются SpectrumExecutor (пул процессов, INBOX_SPECTRUM_WORKERS), не блокируя цикл событий
+router = APIRouter(
+    prefix='/spectrum',
+    tags=['spectrum'],
+    route_class=GzipRoute
+)
+
+
+def bad_request(err: Exception) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+
+
+@router.post(
+    '/cut-signals',
+    name='inbox:cut-signals',
+    summary='Выделить сигналы из спектрограммы в виде новых спектрограмм',
+    description='Ответ - спектрограммы по идентификаторам сигналов (null - сигнал невозможно выделить)',
+)
+async def cut_signals(
+        body: CutSignalsInRequest = Body(...),
+        executor: SpectrumExecutor = Depends(get_spectrum_executor)
+) -> Dict[str, Optional[RfSpectrumTrace]]:
+    trace = packed_trace(body.trace)
+    try:
+        return await executor.cut_signals(trace, body.signals, body.signals_guid, body.min_fq_bandwidth_hz)
+    except ValueError as err:
+        raise bad_request(err)
+
+
+@router.post(
+    '/max-dbm',
+    name='inbox:get-max-dbm',
+    summary='Максимальные значения мощности сигналов спектрограммы, дБм',
+    description='Ответ - значения в порядке signals_guid',
+    response_model=List[float],
+)
+async def get_max_dbm(
+        body: MaxDbmInRequest = Body(...),
+        executor: SpectrumExecutor = Depends(get_spectrum_executor)
+) -> List[float]:
+    trace = packed_trace(body.trace)
+    try:
+        return await executor.get_max_dbm(trace, body.signals, body.signals_guid)
+    except ValueError as err:
+        raise bad_request(err)
+
+
+@router.post(
+    '/gain',
+    name='inbox:apply-gain',
+    summary='Применить коэффициент усиления ко всем точкам спектрограммы',
+)
+async def apply_gain(
+        body: GainInRequest = Body(...),
+        executor: SpectrumExecutor = Depends(get_spectrum_executor)
+) -> RfSpectrumTraceForLocation:
+    trace = packed_trace(body.trace)
+    try:
+        await executor.apply_gain(trace, body.gain_value)
+    except (ValueError, OverflowError) as err:
+        # значения мощности после усиления вне диапазона int16 (сотые доли дБм)
+        raise bad_request(err)
+    return trace
@@ -0,0 +1,31 @@
+from functools import lru_cache
+
+from nms.common.config import Settings
+
+
+class InboxSettings(Settings):
+    # максимальный размер одной записи (строки) в пакетной передаче NDJSON, байт
+    inbox_bulk_max_record_size: int = 16 * 1024 * 1024
+    # отложенная запись в DWH: размер пакета (строк), максимальная задержка записи пакета (сек.),
+    # размер очереди (запросов) и время ожидания места в заполненной очереди (сек.)
+    inbox_writer_batch_size: int = 2000
+    inbox_writer_flush_interval: float = 1.0
+    inbox_writer_queue_size: int = 1000
+    inbox_writer_put_timeout: float = 2.0
+    # повторная запись пакета после ошибки: начальная и максимальная задержка (сек.)
+    inbox_writer_retry_delay: float = 0.5
+    inbox_writer_retry_max_delay: float = 30.0
+    # секции хранилища (сутки UTC): создаются заранее на inbox_partition_premake_days суток,
+    # удаляются старше inbox_retention_days суток (0 - хранить бессрочно), проверка раз в interval сек.
+    inbox_partition_premake_days: int = 7
+    inbox_retention_days: int = 90
+    inbox_partition_maintenance_interval: float = 3600.0
+    # пул процессов для операций над спектрограммами (0 - выполнять в процессе сервиса)
+    # и минимальный размер массива мощностей, передаваемого через разделяемую память, байт
+    inbox_spectrum_workers: int = 0
+    inbox_spectrum_shm_min_size: int = 64 * 1024
+
+
+@lru_cache()
+def get_inbox_settings() -> InboxSettings:
+    return InboxSettings()
@@ -1,11 +1,16 @@
 import logging
 
 from nms.common.api.app import create_application
-from nms.common.config import DSNType, get_settings
+from nms.common.config import DSNType
 from nms.common.db.events import connect_to_db
+from nms.common.db.queries.dwh import queries_dwh
+from nms.common.executor import SpectrumExecutor
 
 from . import version
-from .api.routes import inbox
+from .api.routes import inbox, spectrum
+from .config import get_inbox_settings
+from .services.partitions import PartitionMaintainer
+from .services.writer import TraceWriter
 
 log = logging.getLogger("app")
 api_prefix = '/api/v1'
@@ -22,23 +27,59 @@ app = create_application(
 )
 
 app.include_router(inbox.router, prefix=api_prefix)
+app.include_router(spectrum.router, prefix=api_prefix)
 
 
 @app.on_event("startup")
 async def startup_event():
     log.debug("Starting up...")
 
-    settings = get_settings()
+    settings = get_inbox_settings()
     log.debug(f"Connecting to {settings.db_dwh_dsn}")
-    pool = await connect_to_db(repr(settings.db_dwh_dsn))
+    pool = await connect_to_db(
+        repr(settings.db_dwh_dsn),
+        settings.get_pool_settings(DSNType.DWH),
+        queries=queries_dwh,
+    )
     app.state.core.register_connection_pool(DSNType.DWH, pool)
     log.debug("Connection established")
 
+    app.state.partition_maintainer = PartitionMaintainer(
+        pool,
+        premake_days=settings.inbox_partition_premake_days,
+        retention_days=settings.inbox_retention_days,
+        interval=settings.inbox_partition_maintenance_interval,
+    )
+    app.state.partition_maintainer.start()
+
+    app.state.trace_writer = TraceWriter(
+        pool,
+        batch_size=settings.inbox_writer_batch_size,
+        flush_interval=settings.inbox_writer_flush_interval,
+        queue_size=settings.inbox_writer_queue_size,
+        put_timeout=settings.inbox_writer_put_timeout,
+        retry_delay=settings.inbox_writer_retry_delay,
+        retry_max_delay=settings.inbox_writer_retry_max_delay,
+    )
+    app.state.trace_writer.start()
+
+    log.debug(f"Starting {settings.inbox_spectrum_workers} spectrum workers")
+    app.state.spectrum_executor = SpectrumExecutor(
+        max_workers=settings.inbox_spectrum_workers,
+        shm_min_size=settings.inbox_spectrum_shm_min_size,
+    )
+    await app.state.spectrum_executor.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     log.debug("Shutting down...")
 
+    log.debug("Writing queued traces to database")
+    await app.state.trace_writer.stop()
+    await app.state.partition_maintainer.stop()
+    await app.state.spectrum_executor.stop()
+
     log.debug("Closing connections to database")
     await app.state.core.close_all_pools()
     log.debug("Connection closed")
@@ -0,0 +1,36 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, root_validator
+
+from nms.common.models.rfspectrumtrace import RfSpectrumSignal
+from nms.inbox.models.traces import RfSpectrumTraceInRequest
+
+
+class BulkRecordInRequest(BaseModel):
+    """
+    Запись пакетной передачи (одна строка NDJSON): спектрограмма и/или сигналы спектрограммы
+    """
+    trace: Optional[RfSpectrumTraceInRequest] = None
+    signals: List[RfSpectrumSignal] = []
+
+    @root_validator(skip_on_failure=True)
+    def check_record(cls, values):
+        trace, signals = values.get('trace'), values.get('signals')
+        if trace is None and not signals:
+            raise ValueError('Record must contain a trace or signals')
+        if trace is not None and any(s.trace_guid != trace.guid for s in signals):
+            raise ValueError('Signal trace_guid does not match the trace guid')
+        return values
+
+
+class BulkRecordResult(BaseModel):
+    line: int
+    guid: Optional[str] = None
+    signals: List[str] = []
+    errors: Optional[List[Dict[str, Any]]] = None
+
+
+class BulkIngestResponse(BaseModel):
+    accepted: int = 0
+    rejected: int = 0
+    results: List[BulkRecordResult] = []
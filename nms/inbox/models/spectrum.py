@@ -0,0 +1,31 @@
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from nms.common.models.rfspectrumtrace import RfSpectrumSignal
+from nms.inbox.models.traces import RfSpectrumTraceInRequest
+
+
+class SpectrumSignalsInRequest(BaseModel):
+    """
+    Спектрограмма и ее сигналы для обработки (выделение сигналов, мощность сигналов)
+    """
+    trace: RfSpectrumTraceInRequest
+    signals: List[RfSpectrumSignal]
+
+
+class CutSignalsInRequest(SpectrumSignalsInRequest):
+    signals_guid: Optional[List[UUID]] = Field(
+        None, description='идентификаторы сигналов, если не заданы - все сигналы спектрограммы'
+    )
+    min_fq_bandwidth_hz: int = Field(0, ge=0, description='минимальная полоса сигнала (дискретность обработки)')
+
+
+class MaxDbmInRequest(SpectrumSignalsInRequest):
+    signals_guid: List[UUID]
+
+
+class GainInRequest(BaseModel):
+    trace: RfSpectrumTraceInRequest
+    gain_value: float
@@ -1,12 +1,41 @@
-from datetime import datetime
+"""
+Бинарный формат передачи спектрограммы (Content-Type: application/vnd.nms.trace)
+
+Заголовок (little-endian, 84 байта):
+    4s  сигнатура b'NMST'
+    B   версия формата (1)
+    3x  резерв
+    16s guid спектрограммы (UUID, 16 байт)
+    q   start_freq_hz
+    q   stop_freq_hz
+    q   step_freq_hz
+    d   noise, дБм
+    I   numpoints
+    q   timestamp, микросекунды от 1970-01-01T00:00:00Z
+    d   location: lat
+    d   location: lng
+Данные: numpoints значений int16 (little-endian), мощность в сотых долях дБм - в том же виде,
+в каком спектрограмма хранится в RfSpectrumTrace.y_val_dbm
+"""
+import struct
+from datetime import datetime, timedelta, timezone
 from typing import List
+from uuid import UUID
 
 from pydantic import BaseModel
 
 from nms.common.models.gis import LocationPoint
-from nms.common.models.rfspectrumtrace import (RfSpectrumTraceForLocation,
+from nms.common.models.rfspectrumtrace import (DBM_ARRAY_DTYPE,
+                                               RfSpectrumTraceForLocation,
                                                dbm_array_decoder)
 
+TRACE_BINARY_MEDIA_TYPE = 'application/vnd.nms.trace'
+TRACE_BINARY_MAGIC = b'NMST'
+TRACE_BINARY_VERSION = 1
+TRACE_BINARY_HEADER = struct.Struct('<4sB3x16sqqqdIqdd')
+
+_UNIX_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 class RfSpectrumTraceInRequest(BaseModel):
     guid: str
@@ -23,3 +52,62 @@ class RfSpectrumTraceInRequest(BaseModel):
         result = self.dict(exclude={'y_val_dbm'})
         result['y_val_dbm'] = dbm_array_decoder(self.y_val_dbm)
         return RfSpectrumTraceForLocation(**result)
+
+
+def unpack_binary_trace(data: bytes) -> RfSpectrumTraceForLocation:
+    """
+    Спектрограмма из бинарного представления (см. TRACE_BINARY_MEDIA_TYPE), без поэлементной проверки точек
+    :param data: заголовок и упакованный массив мощностей
+    :return: спектрограмма
+    :raise ValueError: неверный формат, заголовок или размер данных
+    """
+    if len(data) < TRACE_BINARY_HEADER.size:
+        raise ValueError('Binary trace is too short')
+    (magic, version, guid, start_freq_hz, stop_freq_hz, step_freq_hz, noise,
+     numpoints, timestamp_us, lat, lng) = TRACE_BINARY_HEADER.unpack_from(data)
+    if magic != TRACE_BINARY_MAGIC or version != TRACE_BINARY_VERSION:
+        raise ValueError('Unsupported binary trace format')
+    if numpoints <= 0:
+        raise ValueError('Binary trace has no points')
+    if step_freq_hz <= 0 or stop_freq_hz < start_freq_hz:
+        raise ValueError('Invalid binary trace frequency range')
+    y_val_dbm = data[TRACE_BINARY_HEADER.size:]
+    if len(y_val_dbm) != numpoints * DBM_ARRAY_DTYPE.itemsize:
+        raise ValueError('Binary trace payload size does not match numpoints')
+    try:
+        timestamp = _UNIX_EPOCH + timedelta(microseconds=timestamp_us)
+    except OverflowError:
+        raise ValueError('Binary trace timestamp is out of range')
+    return RfSpectrumTraceForLocation(
+        guid=UUID(bytes=guid).hex,
+        start_freq_hz=start_freq_hz,
+        stop_freq_hz=stop_freq_hz,
+        step_freq_hz=step_freq_hz,
+        noise=noise,
+        numpoints=numpoints,
+        y_val_dbm=y_val_dbm,
+        timestamp=timestamp,
+        location=LocationPoint(x=lng, y=lat),
+    )
+
+
+def pack_binary_trace(trace: RfSpectrumTraceForLocation) -> bytes:
+    """
+    Бинарное представление спектрограммы (см. TRACE_BINARY_MEDIA_TYPE)
+    :param trace: спектрограмма
+    :return: заголовок и упакованный массив мощностей
+    """
+    header = TRACE_BINARY_HEADER.pack(
+        TRACE_BINARY_MAGIC,
+        TRACE_BINARY_VERSION,
+        UUID(trace.guid).bytes,
+        trace.start_freq_hz,
+        trace.stop_freq_hz,
+        trace.step_freq_hz,
+        trace.noise,
+        trace.numpoints,
+        (trace.timestamp - _UNIX_EPOCH) // timedelta(microseconds=1),
+        trace.location.y,
+        trace.location.x,
+    )
+    return header + bytes(trace.y_val_dbm)
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from asyncpg.pool import Pool
+
+from nms.common.db.repositories.dwh.partitions import (PARTITIONED_TABLES,
+                                                       PartitionsRepository)
+
+log = logging.getLogger('app')
+
+
+class PartitionMaintainer:
+    """
+    Обслуживание секций таблиц хранилища (DWH): при запуске и далее каждые interval секунд
+    создаются секции на premake_days суток вперед (начиная со вчерашних суток) и удаляются
+    секции старше retention_days суток (retention_days = 0 - данные хранятся бессрочно).
+    """
+
+    def __init__(self, pool: Pool, premake_days: int, retention_days: int, interval: float):
+        self._pool = pool
+        self._premake_days = premake_days
+        self._retention_days = retention_days
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def maintain(self) -> None:
+        today = datetime.now(timezone.utc).date()
+        async with self._pool.acquire() as conn:
+            repo = PartitionsRepository(conn)
+            for table_name in PARTITIONED_TABLES:
+                created = await repo.create_daily_partitions(
+                    table_name, today - timedelta(days=1), self._premake_days + 1
+                )
+                if created:
+                    log.info(f'Created {created} partitions of {table_name}')
+                if self._retention_days > 0:
+                    dropped = await repo.drop_daily_partitions(
+                        table_name, today - timedelta(days=self._retention_days)
+                    )
+                    if dropped:
+                        log.info(f'Dropped {dropped} partitions of {table_name}')
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.maintain()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception('DWH partition maintenance failed')
+            await asyncio.sleep(self._interval)
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from asyncpg import (CannotConnectNowError, PostgresConnectionError,
+                     TooManyConnectionsError, TransactionRollbackError)
+from asyncpg.pool import Pool
+
+from nms.common.db.repositories.dwh.traces import TracesRepository
+from nms.common.models.rfspectrumtrace import (RfSpectrumSignal,
+                                               RfSpectrumTraceForLocation)
+
+log = logging.getLogger('app')
+
+_STOP = object()
+
+# ошибки записи, после которых пакет записывается повторно: хранилище недоступно или перегружено,
+# конфликт транзакций. Остальные ошибки (например, DataError - значение не соответствует типу столбца)
+# повторяются при каждой записи тех же строк
+TRANSIENT_ERRORS = (
+    PostgresConnectionError,
+    CannotConnectNowError,
+    TooManyConnectionsError,
+    TransactionRollbackError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+
+class WriterOverloaded(Exception):
+    """Raised when the write queue stays full longer than the put timeout or the writer is stopped."""
+
+
+def trace_record(trace: RfSpectrumTraceForLocation) -> Tuple:
+    """
+    Строка таблицы rf_trace (в порядке TRACE_COLUMNS)
+    :param trace: спектрограмма
+    :return: кортеж значений
+    """
+    return (
+        UUID(trace.guid),
+        trace.timestamp,
+        trace.start_freq_hz,
+        trace.stop_freq_hz,
+        trace.step_freq_hz,
+        trace.noise,
+        trace.numpoints,
+        bytes(trace.y_val_dbm),
+        trace.location.y,
+        trace.location.x,
+    )
+
+
+def signal_record(signal: RfSpectrumSignal, timestamp: datetime) -> Tuple:
+    """
+    Строка таблицы rf_signal (в порядке SIGNAL_COLUMNS)
+    :param signal: сигнал спектрограммы
+    :param timestamp: время получения спектрограммы
+    :return: кортеж значений
+    """
+    return (
+        UUID(signal.guid),
+        UUID(signal.trace_guid),
+        timestamp,
+        signal.start_freq_hz,
+        signal.stop_freq_hz,
+        signal.f0_freq_hz,
+    )
+
+
+class TraceWriter:
+    """
+    Отложенная запись спектрограмм и сигналов в хранилище (DWH).
+
+    Принятые данные накапливаются в очереди и записываются пакетами (COPY, в одной транзакции)
+    по достижении batch_size строк или через flush_interval секунд после поступления первой строки пакета.
+    Пакет, который не удалось записать из-за недоступности хранилища (TRANSIENT_ERRORS), сохраняется
+    и записывается повторно с задержкой от retry_delay до retry_max_delay секунд (удваивается после каждой ошибки);
+    пока пакет не записан, очередь не разбирается. При других ошибках пакет делится пополам и части
+    записываются отдельно: отбрасываются (с записью в журнал) только строки, которые не удалось записать.
+    Если очередь заполнена (в том числе при недоступности хранилища), put ожидает освобождения места
+    не дольше put_timeout секунд, после чего вызывает WriterOverloaded.
+    При остановке все накопленные данные записываются, пакет, не записанный с одной попытки, теряется.
+    """
+
+    def __init__(self, pool: Pool, batch_size: int, flush_interval: float,
+                 queue_size: int, put_timeout: float,
+                 retry_delay: float = 0.5, retry_max_delay: float = 30.0):
+        self._pool = pool
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._put_timeout = put_timeout
+        self._retry_delay = retry_delay
+        self._retry_max_delay = retry_max_delay
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._task = None  # type: Optional[asyncio.Task]
+        self._stopping = False
+        self._stop_event = None  # type: Optional[asyncio.Event]
+
+    def start(self) -> None:
+        self._stopping = False
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        # прерывает ожидание повторной записи: очередь разбирается, место для _STOP освобождается
+        self._stop_event.set()
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def put(self, traces: Iterable[RfSpectrumTraceForLocation] = (),
+                  signals: Iterable[RfSpectrumSignal] = (),
+                  timestamp: Optional[datetime] = None) -> None:
+        """
+        Постановка спектрограмм и сигналов в очередь на запись
+        :param traces: спектрограммы
+        :param signals: сигналы спектрограмм
+        :param timestamp: время получения спектрограммы для сигналов (по умолчанию - текущее время)
+        """
+        if self._stopping or self._task is None:
+            raise WriterOverloaded('Trace writer is not running')
+        timestamp = timestamp or datetime.now().astimezone()
+        item = ([trace_record(t) for t in traces], [signal_record(s, timestamp) for s in signals])
+        if not item[0] and not item[1]:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(item), self._put_timeout)
+            except asyncio.TimeoutError:
+                raise WriterOverloaded('Trace write queue is full')
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            traces, signals = list(), list()  # type: List[Tuple], List[Tuple]
+            item = await self._queue.get()
+            deadline = loop.time() + self._flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                traces.extend(item[0])
+                signals.extend(item[1])
+                if len(traces) + len(signals) >= self._batch_size:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if traces or signals:
+                await self._write(traces, signals)
+
+    async def _write(self, traces: List[Tuple], signals: List[Tuple]) -> None:
+        """
+        Запись пакета, при ошибке данных - по частям, пока ошибочные строки не будут отделены
+        """
+        try:
+            await self._write_retrying(traces, signals)
+        except TRANSIENT_ERRORS:
+            # только при остановке: данные потеряны (см. _write_retrying)
+            return
+        except Exception:
+            if len(traces) + len(signals) == 1:
+                # первое значение строки - guid спектрограммы или сигнала
+                kind, row = ('trace', traces[0]) if traces else ('signal', signals[0])
+                log.exception(f'Failed to write {kind} {row[0]} to DWH: the row is dropped')
+                return
+            log.exception(f'Failed to write {len(traces)} traces and {len(signals)} signals to DWH, '
+                          f'writing the batch in parts')
+            # строки спектрограмм - перед строками сигналов (сигналы записываются после своих спектрограмм)
+            half = (len(traces) + len(signals)) // 2
+            parts = (
+                (traces[:half], signals[:max(half - len(traces), 0)]),
+                (traces[half:], signals[max(half - len(traces), 0):]),
+            )
+            for part_traces, part_signals in parts:
+                if part_traces or part_signals:
+                    await self._write(part_traces, part_signals)
+
+    async def _write_retrying(self, traces: List[Tuple], signals: List[Tuple]) -> None:
+        """
+        Запись пакета с повторами при недоступности хранилища (TRANSIENT_ERRORS).
+        Другие ошибки передаются вызывающему без повтора
+        """
+        delay = self._retry_delay
+        while True:
+            try:
+                await self._flush(traces, signals)
+                return
+            except TRANSIENT_ERRORS:
+                if self._stopping:
+                    log.exception(f'Failed to write {len(traces)} traces and {len(signals)} signals to DWH, '
+                                  f'writer is stopping: data is lost')
+                    raise
+                log.exception(f'Failed to write {len(traces)} traces and {len(signals)} signals to DWH, '
+                              f'retry in {delay:.1f} s')
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self._retry_max_delay)
+
+    async def _flush(self, traces: List[Tuple], signals: List[Tuple]) -> None:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                repo = TracesRepository(conn)
+                if traces:
+                    await repo.copy_traces(traces)
+                if signals:
+                    await repo.copy_signals(signals)
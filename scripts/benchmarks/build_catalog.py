@@ -0,0 +1,151 @@
+"""
+Построение дерева каталога (оборудование, разделы команд) из записей с parent_path:
+исходный вариант (поиск предка просмотром списков content каждого уровня) и build_catalog
+(индекс узлов по id).
+
+Совпадение результатов проверяют тесты tests/test_build_catalog.py.
+Замеряется построение дерева из --nodes записей для случайных деревьев разной формы и неслучайного
+широкого и глубокого дерева: цепочка из --wide-depth узлов, у каждого узла цепочки --wide-width потомков,
+следующий узел цепочки - последний потомок (исходный вариант просматривает все content на каждом уровне).
+
+Запуск из корня проекта:
+    PYTHONPATH=. python scripts/benchmarks/build_catalog.py --nodes 100000
+"""
+import argparse
+import random
+import time
+from collections import namedtuple
+from typing import List, Optional
+
+from nms.common.db.repositories.cfg.utils import build_catalog
+
+Record = namedtuple("Record", "id parent_id parent_path name")
+
+
+def legacy_search_item_parent(tree, path) -> Optional[dict]:
+    nodes = path.split(".")
+    parent = dict(content=tree)
+    fl = False
+    for k in nodes[1:]:
+        if parent.get("content"):
+            for i in parent["content"]:
+                if i["id"] == int(k):
+                    parent = i
+                    fl = True
+                    break
+    return parent if fl else None
+
+
+def legacy_build_catalog(items, func) -> list:
+    result = list()
+    for item in items:
+        if item.parent_id is None:
+            result.append(func(item))
+        else:
+            parent = legacy_search_item_parent(result, item.parent_path)
+            if parent:
+                content = parent.get("content")
+                if not content:
+                    content = parent["content"] = list()
+                content.append(func(item))
+            else:
+                result.append(func(item))
+    return result
+
+
+def sort_by_path(records: List[Record]) -> List[Record]:
+    """Записи по порядку parent_path (ltree: сравнение меток по порядку) и id"""
+    # записи с общим родителем разделяют строку parent_path: метки разбираются один раз для пути
+    labels = dict()
+    for record in records:
+        if record.parent_path not in labels:
+            labels[record.parent_path] = tuple(int(label) for label in record.parent_path.split("."))
+    return sorted(records, key=lambda r: (labels[r.parent_path], r.id))
+
+
+def make_tree(rnd: random.Random, count: int, max_children: int, roots: int) -> List[Record]:
+    """Записи дерева по порядку parent_path (как get_equipments_all): не более max_children потомков у узла"""
+    records = [Record(n + 1, None, "0", f"root {n + 1}") for n in range(min(roots, count))]
+    # parent_path потомков узла: строится один раз при добавлении узла и передается всем его потомкам
+    child_paths = {record.id: f"0.{record.id}" for record in records}
+    open_parents = list(records)
+    children = dict()
+    while len(records) < count:
+        index = rnd.randrange(len(open_parents))
+        parent = open_parents[index]
+        children[parent.id] = children.get(parent.id, 0) + 1
+        if children[parent.id] >= max_children:
+            open_parents[index] = open_parents[-1]
+            open_parents.pop()
+        path = child_paths[parent.id]
+        record = Record(len(records) + 1, parent.id, path, f"node {len(records) + 1}")
+        child_paths[record.id] = f"{path}.{record.id}"
+        records.append(record)
+        open_parents.append(record)
+    return sort_by_path(records)
+
+
+def make_wide_deep_tree(depth: int, width: int) -> List[Record]:
+    """
+    Цепочка из depth узлов, у каждого узла цепочки width потомков (листья и следующий узел цепочки -
+    последним, с наибольшим id), записи по порядку parent_path
+    """
+    records = [Record(1, None, "0", "node 1")]
+    parent, path = records[0], "0.1"
+    for _ in range(depth - 1):
+        for _ in range(width):
+            records.append(Record(len(records) + 1, parent.id, path, f"node {len(records) + 1}"))
+        parent = records[-1]
+        path = f"{path}.{parent.id}"
+    return sort_by_path(records)
+
+
+def to_node(record: Record) -> dict:
+    return {"id": record.id, "parent_id": record.parent_id, "name": record.name}
+
+
+def to_node_with_content(record: Record) -> dict:
+    node = to_node(record)
+    # content, заполненный func: узлы с id, которые могут встретиться в parent_path других записей
+    if record.id % 7 == 0:
+        node["content"] = [{"id": record.id * 3}, {"id": record.id + 1, "content": [{"id": 2}]}]
+    elif record.id % 5 == 0:
+        node["content"] = []
+    return node
+
+
+def measure(title: str, records: List[Record], with_legacy: bool) -> None:
+    started = time.perf_counter()
+    build_catalog(records, to_node)
+    elapsed = time.perf_counter() - started
+    line = f"{title:>28}: build_catalog {elapsed * 1000:8.1f} ms"
+    if with_legacy:
+        started = time.perf_counter()
+        legacy_build_catalog(records, to_node)
+        legacy_elapsed = time.perf_counter() - started
+        line += f", legacy {legacy_elapsed * 1000:9.1f} ms ({legacy_elapsed / elapsed:.0f}x)"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--wide-depth", type=int, default=10)
+    parser.add_argument("--wide-width", type=int, default=1000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    for title, max_children, roots in (
+        ("deep (2 children)", 2, 1),
+        ("balanced (10 children)", 10, 10),
+        ("wide (1000 children)", 1000, 100),
+    ):
+        records = make_tree(rnd, args.nodes, max_children, roots)
+        measure(title, records, not args.skip_legacy)
+    records = make_wide_deep_tree(args.wide_depth, args.wide_width)
+    measure(f"wide and deep ({len(records)} nodes)", records, not args.skip_legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Сравнение выделения сигналов из спектрограммы (cut_signal_from_trace, RfTraceSignals.cut_signals,
+RfTraceSignals.get_max_dbm): исходная реализация (перебор сетки частот + scipy.interpolate.interp1d)
+и текущая реализация.
+
+Совпадение результатов (после округления до 0.01 дБм) проверяют тесты tests/test_cut_signal.py.
+Для замера исходной реализации требуется scipy.
+
+Запуск из корня проекта:
+    PYTHONPATH=. python scripts/benchmarks/cut_signal.py --points 50000 --signals 200
+"""
+import argparse
+import random
+import time
+from math import ceil
+from uuid import uuid4
+
+from scipy import interpolate
+
+from nms.common.models.rfspectrumtrace import (
+    RfSpectrumSignal,
+    RfSpectrumTrace,
+    RfTraceSignals,
+    cut_signal_from_trace,
+    dbm_array_decoder,
+    dbm_array_encoder,
+)
+
+
+def legacy_cut_signal_from_trace(src_trace, signal, min_fq_bandwidth_hz=0):
+    cut_start_freq_hz = signal.start_freq_hz
+    if min_fq_bandwidth_hz > 0:
+        _bandwidth = ceil(signal.bandwidth_hz / min_fq_bandwidth_hz) * min_fq_bandwidth_hz
+        cut_stop_freq_hz = signal.start_freq_hz + _bandwidth
+    else:
+        cut_stop_freq_hz = signal.stop_freq_hz
+
+    x_val_hz = range(
+        src_trace.start_freq_hz, src_trace.stop_freq_hz + 1, src_trace.step_freq_hz
+    )[: src_trace.numpoints]
+    if not (
+        len(x_val_hz) > 0
+        and cut_start_freq_hz >= x_val_hz[0]
+        and cut_stop_freq_hz <= x_val_hz[-1]
+    ):
+        return None
+    first = max(
+        (n for n in enumerate(x_val_hz) if n[1] <= cut_start_freq_hz), key=lambda x: x[0]
+    )
+    last = min(
+        (n for n in enumerate(x_val_hz) if n[1] >= cut_stop_freq_hz), key=lambda x: x[0]
+    )
+    src_y_val_dbm = dbm_array_encoder(bytes(src_trace.y_val_dbm))
+    y_base = src_y_val_dbm[first[0] : (last[0] + 1)]
+    x_base = [x for x in range(first[1], last[1] + 1, src_trace.step_freq_hz)]
+    f = interpolate.interp1d(x_base, y_base)
+    y_val_dbm = [
+        round(f(x).item(0), 2)
+        for x in range(cut_start_freq_hz, cut_stop_freq_hz + 1, src_trace.step_freq_hz)
+    ]
+    return cut_start_freq_hz, cut_stop_freq_hz, dbm_array_decoder(y_val_dbm)
+
+
+def legacy_get_max_dbm(trace, signal):
+    y_val_dbm = dbm_array_encoder(bytes(trace.y_val_dbm))
+    x_val_hz = range(trace.start_freq_hz, trace.stop_freq_hz + 1, trace.step_freq_hz)[
+        : trace.numpoints
+    ]
+    last_point_n = min(
+        (n for n in enumerate(x_val_hz) if n[1] >= signal.stop_freq_hz),
+        key=lambda x: x[0],
+        default=(0, 0),
+    )[0]
+    return max(y_val_dbm[:last_point_n])
+
+
+def make_trace(rnd: random.Random, points: int) -> RfSpectrumTrace:
+    start = rnd.randint(10 ** 8, 10 ** 9)
+    step = rnd.randint(100, 25000)
+    return RfSpectrumTrace(
+        guid=uuid4().hex,
+        start_freq_hz=start,
+        stop_freq_hz=start + step * (points - 1) + rnd.randint(0, step - 1),
+        step_freq_hz=step,
+        noise=-110.0,
+        numpoints=points,
+        y_val_dbm=dbm_array_decoder(
+            [round(rnd.uniform(-150, 20), 2) for _ in range(points)]
+        ),
+    )
+
+
+def make_signals(rnd: random.Random, trace: RfSpectrumTrace, count: int):
+    signals = list()
+    for _ in range(count):
+        start = rnd.randint(
+            trace.start_freq_hz - trace.step_freq_hz, trace.stop_freq_hz
+        )
+        stop = start + rnd.randint(0, trace.step_freq_hz * 200)
+        signals.append(
+            RfSpectrumSignal(
+                guid=uuid4().hex,
+                trace_guid=trace.guid,
+                start_freq_hz=start,
+                stop_freq_hz=stop,
+                f0_freq_hz=(start + stop) // 2,
+            )
+        )
+    return signals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--signals", type=int, default=200)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+
+    trace = make_trace(rnd, args.points)
+    signals = make_signals(rnd, trace, args.signals)
+
+    started = time.perf_counter()
+    for signal in signals:
+        legacy_cut_signal_from_trace(trace, signal)
+    t_legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for signal in signals:
+        cut_signal_from_trace(trace, signal)
+    t_current = time.perf_counter() - started
+
+    started = time.perf_counter()
+    RfTraceSignals(trace, signals).cut_signals()
+    t_batch = time.perf_counter() - started
+
+    print(
+        f"cut_signal_from_trace: {args.points} points, {args.signals} signals, "
+        f"legacy {t_legacy * 1000:.1f} ms, current {t_current * 1000:.1f} ms, x{t_legacy / t_current:.1f}"
+    )
+    print(
+        f"RfTraceSignals.cut_signals: {t_batch * 1000:.1f} ms, x{t_legacy / t_batch:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
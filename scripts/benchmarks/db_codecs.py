@@ -0,0 +1,124 @@
+"""
+Сравнение кодеков timestamptz и json/jsonb соединений asyncpg (nms.common.db.events.init_connection):
+исходные (datetime.astimezone() для каждого значения, json) и текущие (nms.common.db.codecs).
+
+Перед замером проверяется совпадение результатов на случайных значениях, в том числе вблизи переходов
+на летнее время местного часового пояса (для проверки задайте часовой пояс, например TZ=Europe/Berlin).
+Замеряется декодирование --rows строк каталога (create_dt, update_dt, value_validator jsonb)
+и кодирование тех же значений.
+
+Запуск из корня проекта:
+    TZ=Europe/Berlin PYTHONPATH=. python scripts/benchmarks/db_codecs.py --rows 100000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from nms.common.db import codecs
+
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def legacy_tstz_encoder(tstz):
+    return [(tstz.astimezone() - PG_EPOCH).total_seconds() * 1000000]
+
+
+def legacy_tstz_decoder(tup):
+    return (PG_EPOCH + timedelta(microseconds=tup[0])).astimezone()
+
+
+LEGACY = (legacy_tstz_encoder, legacy_tstz_decoder, json.dumps, json.loads)
+CURRENT = (
+    codecs.tstz_encoder,
+    codecs.tstz_decoder,
+    codecs.json_encoder,
+    codecs.json_decoder,
+)
+
+
+def make_rows(rnd: random.Random, count: int) -> list:
+    rows = list()
+    for n in range(count):
+        create_us = rnd.randint(0, 30 * 365 * 86400 * 1000000)
+        validator = {
+            "length": rnd.randint(1, 64),
+            "parser": "TmCommonParser",
+            "limits": [rnd.uniform(-1000, 1000) for _ in range(rnd.randint(0, 4))],
+            "name": f"параметр {n}",
+        }
+        rows.append(
+            (
+                (create_us,),
+                (create_us + rnd.randint(0, 10 ** 12),),
+                json.dumps(validator),
+            )
+        )
+    return rows
+
+
+def check_compatibility(rnd: random.Random, rows: list) -> None:
+    # значения вблизи переходов на летнее время: каждые 15 минут за 10 лет
+    values = [(n * 15 * 60 * 1000000,) for n in range(10 * 365 * 96)]
+    values += [row[0] for row in rows] + [row[1] for row in rows]
+    values += [(rnd.randint(-(10 ** 15), 10 ** 15),) for _ in range(10000)]
+    for value in values:
+        expected = legacy_tstz_decoder(value)
+        result = codecs.tstz_decoder(value)
+        assert (result, result.utcoffset(), result.tzname()) == (
+            expected,
+            expected.utcoffset(),
+            expected.tzname(),
+        ), value
+        # исходный кодек возвращает float: совпадение с точностью до округления
+        assert abs(codecs.tstz_encoder(result)[0] - legacy_tstz_encoder(expected)[0]) < 1
+        assert codecs.tstz_encoder(result)[0] == value[0]
+        naive = result.replace(tzinfo=None)
+        assert abs(codecs.tstz_encoder(naive)[0] - legacy_tstz_encoder(naive)[0]) < 1
+    for row in rows:
+        assert codecs.json_decoder(row[2]) == json.loads(row[2])
+        value = json.loads(row[2])
+        assert json.loads(codecs.json_encoder(value)) == value
+    for data in ('{"n": 123456789012345678901234567890}', '[1e400]', '"\\ud800"', "{}"):
+        assert codecs.json_decoder(data) == json.loads(data), data
+    for value in ({1: "a", None: 2}, 10 ** 30, {"a": [1.5, True, None]}):
+        assert json.loads(codecs.json_encoder(value)) == json.loads(json.dumps(value)), value
+
+
+def measure(title: str, codec_set, rows: list) -> None:
+    tstz_encoder, tstz_decoder, json_encoder, json_decoder = codec_set
+    started = time.perf_counter()
+    decoded = [
+        (tstz_decoder(create_dt), tstz_decoder(update_dt), json_decoder(validator))
+        for create_dt, update_dt, validator in rows
+    ]
+    t_decode = time.perf_counter() - started
+    started = time.perf_counter()
+    for create_dt, update_dt, validator in decoded:
+        tstz_encoder(create_dt)
+        tstz_encoder(update_dt)
+        json_encoder(validator)
+    t_encode = time.perf_counter() - started
+    print(
+        f"{title:>8}: decode {len(rows)} rows {t_decode * 1000:8.1f} ms, "
+        f"encode {t_encode * 1000:8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    rows = make_rows(rnd, args.rows)
+    check_compatibility(rnd, rows[:20000])
+    print(f"compatibility: OK (orjson: {'yes' if codecs.orjson else 'no'})")
+
+    measure("legacy", LEGACY, rows)
+    measure("current", CURRENT, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Сравнение упаковки/распаковки массивов мощностей спектрограммы (y_val_dbm):
+исходная реализация на int.from_bytes/int.to_bytes и реализация на numpy.
+
+Совместимость реализаций проверяют тесты tests/test_dbm_codec.py.
+
+Запуск из корня проекта:
+    PYTHONPATH=. python scripts/benchmarks/dbm_codec.py --points 50000
+"""
+import argparse
+import random
+import timeit
+
+from nms.common.models.rfspectrumtrace import dbm_array_decoder, dbm_array_encoder
+
+
+def legacy_encoder(dbm_array: bytes) -> list:
+    return [
+        int.from_bytes(y, "little", signed=True) / 100
+        for y in [
+            dbm_array[offset : offset + 2] for offset in range(0, len(dbm_array), 2)
+        ]
+    ]
+
+
+def legacy_decoder(dbm_array: list) -> bytes:
+    return b"".join(
+        [int.to_bytes(round(y * 100), 2, "little", signed=True) for y in dbm_array]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    values = [round(rnd.uniform(-150, 50), 2) for _ in range(args.points)]
+    packed = legacy_decoder(values)
+
+    cases = (
+        ("encoder (bytes -> list)", legacy_encoder, dbm_array_encoder, packed),
+        ("decoder (list -> bytes)", legacy_decoder, dbm_array_decoder, values),
+    )
+    for title, legacy, current, arg in cases:
+        t_legacy = min(timeit.repeat(lambda: legacy(arg), number=1, repeat=args.repeat))
+        t_current = min(timeit.repeat(lambda: current(arg), number=1, repeat=args.repeat))
+        print(
+            f"{title}: {args.points} points, legacy {t_legacy * 1000:.2f} ms, "
+            f"numpy {t_current * 1000:.2f} ms, x{t_legacy / t_current:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
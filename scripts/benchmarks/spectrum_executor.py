@@ -0,0 +1,115 @@
+"""
+Задержка обработки "легких" запросов при одновременной обработке "тяжелых" операций над спектрограммами:
+выполнение операций в цикле событий сервиса и в пуле процессов (SpectrumExecutor).
+
+"Тяжелые" запросы (выделение сигналов, мощность сигналов, усиление) выполняются непрерывно в --heavy
+параллельных задачах, "легкий" запрос моделируется задачей, которая просыпается каждые --probe-ms
+миллисекунд: задержка пробуждения - время ожидания легкого запроса в цикле событий. В отчет выводятся
+перцентили задержки и количество выполненных тяжелых запросов в секунду.
+
+Запуск из корня проекта:
+    PYTHONPATH=. python scripts/benchmarks/spectrum_executor.py --points 200000 --signals 500 --workers 4
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from uuid import UUID, uuid4
+
+from nms.common.executor import SpectrumExecutor
+from nms.common.models.rfspectrumtrace import (RfSpectrumSignal,
+                                               RfSpectrumTrace,
+                                               dbm_array_decoder)
+
+
+def make_trace(rnd: random.Random, points: int, signals: int):
+    trace = RfSpectrumTrace(
+        guid=uuid4().hex,
+        start_freq_hz=100_000_000,
+        stop_freq_hz=100_000_000 + 1000 * (points - 1),
+        step_freq_hz=1000,
+        noise=-110.0,
+        numpoints=points,
+        y_val_dbm=dbm_array_decoder([round(rnd.uniform(-150, 20), 2) for _ in range(points)]),
+    )
+    trace_signals = list()
+    for _ in range(signals):
+        start = rnd.randint(trace.start_freq_hz, trace.stop_freq_hz - 200_000)
+        stop = start + rnd.randint(1000, 200_000)
+        trace_signals.append(
+            RfSpectrumSignal(
+                guid=uuid4().hex,
+                trace_guid=trace.guid,
+                start_freq_hz=start,
+                stop_freq_hz=stop,
+                f0_freq_hz=(start + stop) // 2,
+            )
+        )
+    return trace, trace_signals
+
+
+async def heavy_requests(executor: SpectrumExecutor, trace, signals, deadline: float, done: list) -> None:
+    signals_guid = [UUID(signal.guid) for signal in signals]
+    while time.perf_counter() < deadline:
+        await executor.cut_signals(trace, signals, min_fq_bandwidth_hz=trace.step_freq_hz)
+        await executor.get_max_dbm(trace, signals, signals_guid)
+        await executor.apply_gain(trace, 0.01)
+        done.append(1)
+        # даже при выполнении в цикле событий легкие запросы получают управление между тяжелыми
+        await asyncio.sleep(0)
+
+
+async def probe(interval: float, deadline: float, latencies: list) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        latencies.append(time.perf_counter() - started - interval)
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(title: str, workers: int, args, traces) -> None:
+    executor = SpectrumExecutor(max_workers=workers, shm_min_size=args.shm_min_size)
+    await executor.start()
+    try:
+        deadline = time.perf_counter() + args.duration
+        latencies, done = list(), list()
+        await asyncio.gather(
+            probe(args.probe_ms / 1000, deadline, latencies),
+            *(
+                heavy_requests(executor, trace, signals, deadline, done)
+                for trace, signals in traces
+            ),
+        )
+    finally:
+        await executor.stop()
+    print(
+        f"{title:>16}: light request latency p50 {statistics.median(latencies) * 1000:7.2f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms, max {max(latencies) * 1000:7.2f} ms; "
+        f"heavy requests {len(done) / args.duration:6.1f}/s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--signals", type=int, default=500)
+    parser.add_argument("--heavy", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--shm-min-size", type=int, default=64 * 1024)
+    parser.add_argument("--probe-ms", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    traces = [make_trace(rnd, args.points, args.signals) for _ in range(args.heavy)]
+    await run("event loop", 0, args, traces)
+    await run(f"{args.workers} workers", args.workers, args, traces)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Сравнение приема спектрограмм в POST /inbox/traces: JSON (RfSpectrumTraceInRequest) и бинарный формат
+(application/vnd.nms.trace), с gzip-сжатием и без.
+
+Замеряется разбор тела запроса в RfSpectrumTraceForLocation так, как это делает зависимость
+get_trace_from_request: процессорное время на одну спектрограмму и пропускная способность
+одного процесса (спектрограмм в секунду), а также размер тела запроса.
+
+Запуск из корня проекта:
+    PYTHONPATH=. python scripts/benchmarks/trace_ingest.py --points 30000 --traces 200
+"""
+import argparse
+import gzip
+import random
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from nms.common.models.gis import LocationPoint
+from nms.common.models.rfspectrumtrace import (
+    RfSpectrumTraceForLocation,
+    dbm_array_decoder,
+)
+from nms.inbox.models.traces import (
+    RfSpectrumTraceInRequest,
+    pack_binary_trace,
+    unpack_binary_trace,
+)
+
+
+def make_trace(rnd: random.Random, points: int) -> RfSpectrumTraceForLocation:
+    return RfSpectrumTraceForLocation(
+        guid=uuid4().hex,
+        start_freq_hz=100_000_000,
+        stop_freq_hz=100_000_000 + 1000 * (points - 1),
+        step_freq_hz=1000,
+        noise=-110.0,
+        numpoints=points,
+        y_val_dbm=dbm_array_decoder(
+            [round(rnd.uniform(-150, 20), 2) for _ in range(points)]
+        ),
+        timestamp=datetime.now().astimezone(),
+        location=LocationPoint(lat=55.75, lng=37.62),
+    )
+
+
+def parse_json(body: bytes) -> RfSpectrumTraceForLocation:
+    return RfSpectrumTraceInRequest.parse_raw(body).as_packed_trace()
+
+
+def measure(title: str, bodies: list, parse, decompress: bool) -> None:
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    for body in bodies:
+        parse(gzip.decompress(body) if decompress else body)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - started_cpu
+    size = sum(len(b) for b in bodies) / len(bodies)
+    print(
+        f"{title:>12}: {size / 1024:8.1f} KB/trace, cpu {cpu / len(bodies) * 1000:7.2f} ms/trace, "
+        f"{len(bodies) / elapsed:8.1f} traces/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=30000)
+    parser.add_argument("--traces", type=int, default=200)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    traces = [make_trace(rnd, args.points) for _ in range(args.traces)]
+    json_bodies = [t.json(by_alias=True).encode() for t in traces]
+    binary_bodies = [pack_binary_trace(t) for t in traces]
+
+    # разбор обоих форматов дает одну и ту же спектрограмму
+    for json_body, binary_body in zip(json_bodies[:10], binary_bodies[:10]):
+        assert parse_json(json_body) == unpack_binary_trace(binary_body)
+
+    measure("json", json_bodies, parse_json, False)
+    measure("json+gzip", [gzip.compress(b) for b in json_bodies], parse_json, True)
+    measure("binary", binary_bodies, unpack_binary_trace, False)
+    measure(
+        "binary+gzip",
+        [gzip.compress(b) for b in binary_bodies],
+        unpack_binary_trace,
+        True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from fastapi import HTTPException, Request
+
+from nms.inbox.api.dependencies.traces import get_trace_from_request
+from nms.inbox.models.traces import (TRACE_BINARY_HEADER, TRACE_BINARY_MAGIC,
+                                     TRACE_BINARY_VERSION, pack_binary_trace,
+                                     unpack_binary_trace)
+
+
+def binary_trace(start_freq_hz=1000, stop_freq_hz=1090, step_freq_hz=10, numpoints=10,
+                 timestamp_us=1_600_000_000_000_000, points=None) -> bytes:
+    points = np.arange(numpoints if points is None else points, dtype='<i2') * -100
+    header = TRACE_BINARY_HEADER.pack(
+        TRACE_BINARY_MAGIC, TRACE_BINARY_VERSION, uuid4().bytes, start_freq_hz, stop_freq_hz, step_freq_hz,
+        -90.0, numpoints, timestamp_us, 55.75, 37.62,
+    )
+    return header + points.tobytes()
+
+
+def test_round_trip():
+    data = binary_trace()
+    trace = unpack_binary_trace(data)
+    assert trace.numpoints == 10
+    assert trace.timestamp.year == 2020
+    assert pack_binary_trace(trace) == data
+
+
+@pytest.mark.parametrize('data', [
+    binary_trace()[:TRACE_BINARY_HEADER.size - 1],
+    b'XXXX' + binary_trace()[4:],
+    binary_trace(points=9),
+    binary_trace(numpoints=0),
+    binary_trace(step_freq_hz=0),
+    binary_trace(step_freq_hz=-10),
+    binary_trace(start_freq_hz=2000),
+    binary_trace(timestamp_us=2 ** 63 - 1),
+    binary_trace(timestamp_us=-2 ** 63),
+])
+def test_invalid_trace_is_rejected(data):
+    with pytest.raises(ValueError):
+        unpack_binary_trace(data)
+
+
+def json_request(y_val_dbm) -> Request:
+    body = json.dumps({
+        'guid': str(uuid4()), 'start_freq_hz': 1000, 'stop_freq_hz': 1020, 'step_freq_hz': 10, 'noise': -90.0,
+        'numpoints': len(y_val_dbm), 'y_val_dbm': y_val_dbm, 'timestamp': '2020-09-13T12:26:40+00:00',
+        'location': {'lat': 55.75, 'lng': 37.62},
+    }).encode()
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/trace', 'headers': [(b'content-type', b'application/json')]}
+    return Request(scope, receive)
+
+
+def test_json_trace():
+    trace = asyncio.run(get_trace_from_request(json_request([-80.0, -75.5, -60.25])))
+    assert np.array_equal(np.frombuffer(trace.y_val_dbm, dtype='<i2'), [-8000, -7550, -6025])
+
+
+@pytest.mark.parametrize('y_val_dbm', [[-80.0, 400.0, -60.0], [-80.0, -400.0, -60.0]])
+def test_json_trace_out_of_range_is_rejected(y_val_dbm):
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(get_trace_from_request(json_request(y_val_dbm)))
+    assert err.value.status_code == 400
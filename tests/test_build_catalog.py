@@ -0,0 +1,132 @@
+"""
+Построение дерева каталога (build_catalog): совпадение с исходной реализацией (поиск предка просмотром
+списков content каждого уровня) на случайных деревьях и широком глубоком дереве
+"""
+import random
+from collections import namedtuple
+from typing import List, Optional
+
+import pytest
+
+from nms.common.db.repositories.cfg.utils import build_catalog
+
+Record = namedtuple("Record", "id parent_id parent_path name")
+
+
+def legacy_search_item_parent(tree, path) -> Optional[dict]:
+    nodes = path.split(".")
+    parent = dict(content=tree)
+    fl = False
+    for k in nodes[1:]:
+        if parent.get("content"):
+            for i in parent["content"]:
+                if i["id"] == int(k):
+                    parent = i
+                    fl = True
+                    break
+    return parent if fl else None
+
+
+def legacy_build_catalog(items, func) -> list:
+    result = list()
+    for item in items:
+        if item.parent_id is None:
+            result.append(func(item))
+        else:
+            parent = legacy_search_item_parent(result, item.parent_path)
+            if parent:
+                content = parent.get("content")
+                if not content:
+                    content = parent["content"] = list()
+                content.append(func(item))
+            else:
+                result.append(func(item))
+    return result
+
+
+def sort_by_path(records: List[Record]) -> List[Record]:
+    # ltree: сравнение меток по порядку
+    return sorted(records, key=lambda r: (tuple(int(label) for label in r.parent_path.split(".")), r.id))
+
+
+def make_tree(rnd: random.Random, count: int, max_children: int, roots: int) -> List[Record]:
+    records = [Record(n + 1, None, "0", f"root {n + 1}") for n in range(min(roots, count))]
+    child_paths = {record.id: f"0.{record.id}" for record in records}
+    open_parents = list(records)
+    children = dict()
+    while len(records) < count:
+        index = rnd.randrange(len(open_parents))
+        parent = open_parents[index]
+        children[parent.id] = children.get(parent.id, 0) + 1
+        if children[parent.id] >= max_children:
+            open_parents[index] = open_parents[-1]
+            open_parents.pop()
+        path = child_paths[parent.id]
+        record = Record(len(records) + 1, parent.id, path, f"node {len(records) + 1}")
+        child_paths[record.id] = f"{path}.{record.id}"
+        records.append(record)
+        open_parents.append(record)
+    return sort_by_path(records)
+
+
+def make_wide_deep_tree(depth: int, width: int) -> List[Record]:
+    # цепочка из depth узлов, у каждого узла цепочки width потомков, следующий узел цепочки - последний
+    records = [Record(1, None, "0", "node 1")]
+    parent, path = records[0], "0.1"
+    for _ in range(depth - 1):
+        for _ in range(width):
+            records.append(Record(len(records) + 1, parent.id, path, f"node {len(records) + 1}"))
+        parent = records[-1]
+        path = f"{path}.{parent.id}"
+    return sort_by_path(records)
+
+
+def to_node(record: Record) -> dict:
+    return {"id": record.id, "parent_id": record.parent_id, "name": record.name}
+
+
+def to_node_with_content(record: Record) -> dict:
+    node = to_node(record)
+    # content, заполненный func: узлы с id, которые могут встретиться в parent_path других записей
+    if record.id % 7 == 0:
+        node["content"] = [{"id": record.id * 3}, {"id": record.id + 1, "content": [{"id": 2}]}]
+    elif record.id % 5 == 0:
+        node["content"] = []
+    return node
+
+
+def variants(rnd: random.Random, records: List[Record]):
+    subset = [r for r in records if rnd.random() < 0.7]
+    return {
+        "ordered": records,
+        "shuffled": rnd.sample(records, len(records)),
+        "missing ancestors": subset,
+        "missing ancestors, shuffled": rnd.sample(subset, len(subset)),
+        "duplicates": sorted(records + rnd.sample(records, len(records) // 5), key=records.index),
+    }
+
+
+@pytest.mark.parametrize("func", [to_node, to_node_with_content])
+@pytest.mark.parametrize("seed", range(100))
+def test_random_trees_match_legacy(seed, func):
+    rnd = random.Random(seed)
+    records = make_tree(rnd, rnd.randint(0, 300), rnd.randint(1, 6), rnd.randint(1, 4))
+    for title, variant in variants(rnd, records).items():
+        assert build_catalog(variant, func) == legacy_build_catalog(variant, func), title
+
+
+@pytest.mark.parametrize("func", [to_node, to_node_with_content])
+def test_wide_deep_tree_matches_legacy(func):
+    rnd = random.Random(0)
+    records = make_wide_deep_tree(depth=6, width=200)
+    for title, variant in variants(rnd, records).items():
+        assert build_catalog(variant, func) == legacy_build_catalog(variant, func), title
+
+
+def test_wide_deep_tree_structure():
+    tree = build_catalog(make_wide_deep_tree(depth=4, width=1000), to_node)
+    depth, node = 1, tree[0]
+    while node.get("content"):
+        assert len(node["content"]) == 1000
+        depth, node = depth + 1, node["content"][-1]
+    assert depth == 4
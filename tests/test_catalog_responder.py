@@ -0,0 +1,106 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+from starlette.requests import Request
+
+from nms.common.api.catalog_cache import CatalogCache, CatalogResponder
+from nms.common.config import PoolSettings
+from nms.common.db.pool import ObservedPool, RepositoryConnections
+from nms.common.db.repositories.base import BaseNmsRepository, read_only
+from nms.common.db.repositories.cfg.catalog import CatalogVersionsRepository
+
+TAGS = ("telemetry",)
+
+
+class FakeConnection:
+    def __init__(self, server: str):
+        self.server = server
+        self.transactions = list()
+        self._in_transaction = False
+
+    def is_in_transaction(self) -> bool:
+        return self._in_transaction
+
+    @asynccontextmanager
+    async def transaction(self, **options):
+        self.transactions.append(options)
+        self._in_transaction = True
+        try:
+            yield
+        finally:
+            self._in_transaction = False
+
+    async def fetch(self, sql, *args):
+        # get_catalog_versions
+        return [{"table_name": "telemetry", "version": 1, "update_dt": datetime(2026, 1, 1, tzinfo=timezone.utc)}]
+
+
+class FakePool:
+    def __init__(self, server: str):
+        self.server = server
+        self.connections = list()
+
+    async def acquire(self, timeout=None) -> FakeConnection:
+        conn = FakeConnection(self.server)
+        self.connections.append(conn)
+        return conn
+
+    async def release(self, conn: FakeConnection) -> None:
+        pass
+
+
+class Replicas:
+    def __init__(self):
+        self.pool = FakePool("replica")
+
+    async def acquire(self, stack):
+        return await stack.enter_async_context(ObservedPool(self.pool, PoolSettings()).acquire())
+
+
+class CatalogRepository(BaseNmsRepository):
+    @read_only
+    async def get_catalog(self) -> list:
+        return [{"server": self.connection.server}]
+
+
+def connections(primary: FakePool, replicas: Replicas) -> RepositoryConnections:
+    return RepositoryConnections(ObservedPool(primary, PoolSettings()), replicas)
+
+
+def respond(cache):
+    primary, replicas = FakePool("primary"), Replicas()
+    repo = CatalogRepository(connections(primary, replicas))
+    versions = CatalogVersionsRepository(connections(primary, replicas))
+    request = Request({"type": "http", "method": "GET", "path": "/telemetry", "headers": []})
+    responder = CatalogResponder(request, cache, versions)
+
+    async def run():
+        return await responder.respond(("telemetry", ()), TAGS, repo.get_catalog, repo)
+
+    return asyncio.run(run()), primary, replicas.pool
+
+
+@pytest.mark.parametrize("enabled", [None, False])
+def test_uncached_catalog_is_read_on_replica(enabled):
+    cache = None
+    if enabled is not None:
+        cache = CatalogCache()
+        cache.set_enabled(enabled)
+    response, primary, replica = respond(cache)
+    assert response.body == b'[{"server":"replica"}]'
+    assert response.headers["etag"]
+    assert not primary.connections
+    # версии таблиц и каталог - в одной транзакции только для чтения
+    assert len(replica.connections) == 1
+    assert replica.connections[0].transactions == [dict(isolation="repeatable_read", readonly=True)]
+
+
+def test_cached_catalog_is_built_on_primary():
+    cache = CatalogCache()
+    cache.set_enabled(True)
+    response, primary, replica = respond(cache)
+    assert response.body == b'[{"server":"primary"}]'
+    assert response.headers["etag"]
+    assert not replica.connections
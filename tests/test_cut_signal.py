@@ -0,0 +1,140 @@
+"""
+Выделение сигналов из спектрограммы (cut_signal_from_trace, RfTraceSignals): совпадение с исходной реализацией
+(перебор сетки частот + линейная интерполяция scipy.interpolate.interp1d, здесь - та же формула без scipy)
+после округления до 0.01 дБм
+"""
+import random
+from bisect import bisect_left
+from math import ceil
+from uuid import UUID, uuid4
+
+import pytest
+
+from nms.common.models.rfspectrumtrace import (RfSpectrumSignal,
+                                               RfSpectrumTrace,
+                                               RfTraceSignals,
+                                               cut_signal_from_trace,
+                                               dbm_array_decoder,
+                                               dbm_array_encoder)
+
+
+def interp1d(x_base: list, y_base: list, x: int) -> float:
+    # scipy.interpolate.interp1d(kind="linear"): отрезок по searchsorted(x_base, x), наклон от левой точки
+    hi = min(max(bisect_left(x_base, x), 1), len(x_base) - 1)
+    lo = hi - 1
+    slope = (y_base[hi] - y_base[lo]) / (x_base[hi] - x_base[lo])
+    return slope * (x - x_base[lo]) + y_base[lo]
+
+
+def legacy_cut_signal_from_trace(src_trace, signal, min_fq_bandwidth_hz=0):
+    cut_start_freq_hz = signal.start_freq_hz
+    if min_fq_bandwidth_hz > 0:
+        _bandwidth = ceil(signal.bandwidth_hz / min_fq_bandwidth_hz) * min_fq_bandwidth_hz
+        cut_stop_freq_hz = signal.start_freq_hz + _bandwidth
+    else:
+        cut_stop_freq_hz = signal.stop_freq_hz
+
+    x_val_hz = range(src_trace.start_freq_hz, src_trace.stop_freq_hz + 1, src_trace.step_freq_hz)[: src_trace.numpoints]
+    if not (len(x_val_hz) > 0 and cut_start_freq_hz >= x_val_hz[0] and cut_stop_freq_hz <= x_val_hz[-1]):
+        return None
+    first = max((n for n in enumerate(x_val_hz) if n[1] <= cut_start_freq_hz), key=lambda x: x[0])
+    last = min((n for n in enumerate(x_val_hz) if n[1] >= cut_stop_freq_hz), key=lambda x: x[0])
+    src_y_val_dbm = dbm_array_encoder(bytes(src_trace.y_val_dbm))
+    y_base = src_y_val_dbm[first[0]: (last[0] + 1)]
+    x_base = [x for x in range(first[1], last[1] + 1, src_trace.step_freq_hz)]
+    y_val_dbm = [
+        round(interp1d(x_base, y_base, x), 2)
+        for x in range(cut_start_freq_hz, cut_stop_freq_hz + 1, src_trace.step_freq_hz)
+    ]
+    return cut_start_freq_hz, cut_stop_freq_hz, dbm_array_decoder(y_val_dbm)
+
+
+def legacy_get_max_dbm(trace, signal):
+    y_val_dbm = dbm_array_encoder(bytes(trace.y_val_dbm))
+    x_val_hz = range(trace.start_freq_hz, trace.stop_freq_hz + 1, trace.step_freq_hz)[: trace.numpoints]
+    last_point_n = min(
+        (n for n in enumerate(x_val_hz) if n[1] >= signal.stop_freq_hz), key=lambda x: x[0], default=(0, 0)
+    )[0]
+    return max(y_val_dbm[:last_point_n])
+
+
+def make_trace(rnd: random.Random, points: int) -> RfSpectrumTrace:
+    start = rnd.randint(10 ** 8, 10 ** 9)
+    step = rnd.randint(100, 25000)
+    return RfSpectrumTrace(
+        guid=uuid4().hex,
+        start_freq_hz=start,
+        stop_freq_hz=start + step * (points - 1) + rnd.randint(0, step - 1),
+        step_freq_hz=step,
+        noise=-110.0,
+        numpoints=points,
+        y_val_dbm=dbm_array_decoder([round(rnd.uniform(-150, 20), 2) for _ in range(points)]),
+    )
+
+
+def make_signals(rnd: random.Random, trace: RfSpectrumTrace, count: int):
+    signals = list()
+    for _ in range(count):
+        start = rnd.randint(trace.start_freq_hz - trace.step_freq_hz, trace.stop_freq_hz)
+        stop = start + rnd.randint(0, trace.step_freq_hz * 200)
+        signals.append(
+            RfSpectrumSignal(
+                guid=uuid4().hex, trace_guid=trace.guid, start_freq_hz=start, stop_freq_hz=stop,
+                f0_freq_hz=(start + stop) // 2,
+            )
+        )
+    return signals
+
+
+def cut_result(trace):
+    if trace is None:
+        return None
+    return trace.start_freq_hz, trace.stop_freq_hz, bytes(trace.y_val_dbm)
+
+
+def max_dbm_result(func, *args):
+    try:
+        return func(*args)
+    except ValueError:
+        return ValueError
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_cut_signals_match_legacy(seed):
+    rnd = random.Random(seed)
+    trace = make_trace(rnd, rnd.randint(2, 3000))
+    signals = make_signals(rnd, trace, 20)
+    trace_signals = RfTraceSignals(trace, signals)
+    for min_bw in (0, trace.step_freq_hz, 3 * trace.step_freq_hz + 7):
+        batch = trace_signals.cut_signals(min_fq_bandwidth_hz=min_bw)
+        for signal in signals:
+            expected = legacy_cut_signal_from_trace(trace, signal, min_bw)
+            assert cut_result(cut_signal_from_trace(trace, signal, min_bw)) == expected, (signal, min_bw)
+            assert cut_result(batch[signal.guid]) == expected, (signal, min_bw)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_get_max_dbm_matches_legacy(seed):
+    rnd = random.Random(seed)
+    trace = make_trace(rnd, rnd.randint(2, 3000))
+    signals = make_signals(rnd, trace, 20)
+    trace_signals = RfTraceSignals(trace, signals)
+    for signal in signals:
+        assert max_dbm_result(trace_signals.get_max_dbm, UUID(signal.guid)) == max_dbm_result(
+            legacy_get_max_dbm, trace, signal
+        ), signal
+
+
+def test_cut_signal_on_grid_points():
+    trace = RfSpectrumTrace(
+        guid=uuid4().hex, start_freq_hz=1000, stop_freq_hz=1040, step_freq_hz=10, noise=-110.0, numpoints=5,
+        y_val_dbm=dbm_array_decoder([-80.0, -70.0, -60.0, -50.0, -40.0]),
+    )
+    signal = RfSpectrumSignal(
+        guid=uuid4().hex, trace_guid=trace.guid, start_freq_hz=1005, stop_freq_hz=1035, f0_freq_hz=1020
+    )
+    result = cut_signal_from_trace(trace, signal)
+    assert (result.start_freq_hz, result.stop_freq_hz) == (1005, 1035)
+    assert dbm_array_encoder(result.y_val_dbm) == [-75.0, -65.0, -55.0, -45.0]
+    signal.stop_freq_hz = 1045
+    assert cut_signal_from_trace(trace, signal) is None
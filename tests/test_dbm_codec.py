@@ -0,0 +1,55 @@
+"""
+Совместимость упаковки/распаковки массивов мощностей (y_val_dbm) на numpy
+с исходной реализацией на int.from_bytes/int.to_bytes
+"""
+import random
+
+import pytest
+
+from nms.common.models.rfspectrumtrace import dbm_array_decoder, dbm_array_encoder
+
+
+def legacy_encoder(dbm_array: bytes) -> list:
+    return [
+        int.from_bytes(y, "little", signed=True) / 100
+        for y in [dbm_array[offset: offset + 2] for offset in range(0, len(dbm_array), 2)]
+    ]
+
+
+def legacy_decoder(dbm_array: list) -> bytes:
+    return b"".join([int.to_bytes(round(y * 100), 2, "little", signed=True) for y in dbm_array])
+
+
+def test_encoder_all_int16_values():
+    packed = legacy_decoder([v / 100 for v in range(-32768, 32768)])
+    assert dbm_array_encoder(packed) == legacy_encoder(packed)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_decoder_matches_legacy(seed):
+    rnd = random.Random(seed)
+    samples = [
+        # "неудобные" для округления значения
+        -75.24, -0.005, 0.005, 0.015, -0.015, 327.67, -327.68,
+        *(rnd.uniform(-327.68, 327.67) for _ in range(10000)),
+        *(round(rnd.uniform(-150, 50), 2) for _ in range(10000)),
+        *(rnd.randint(-32768, 32767) / 100 for _ in range(10000)),
+    ]
+    assert dbm_array_decoder(samples) == legacy_decoder(samples)
+
+
+def test_empty_array():
+    assert dbm_array_decoder([]) == legacy_decoder([]) == b""
+    assert dbm_array_encoder(b"") == legacy_encoder(b"") == []
+
+
+@pytest.mark.parametrize("decoder", [dbm_array_decoder, legacy_decoder])
+@pytest.mark.parametrize("value", [327.68 + 0.01, -327.69])
+def test_decoder_overflow(decoder, value):
+    with pytest.raises(OverflowError):
+        decoder([value])
+
+
+def test_decoder_nan():
+    with pytest.raises(ValueError):
+        dbm_array_decoder([float("nan")])
@@ -0,0 +1,161 @@
+import asyncio
+import json
+from typing import List, Optional
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+
+from nms.common.api.dependencies.export import get_export_limiter
+from nms.common.api.export import ExportLimiter, export_response, iter_export
+from nms.common.models.export import ExportFormat
+
+COLUMNS = ("id", "name")
+
+
+class Rows:
+    """Записи выгрузки: асинхронный генератор, как курсор репозитория, соединение занято до закрытия"""
+
+    def __init__(self, count: int):
+        self.count = count
+        self.started = False
+        self.closed = False
+
+    async def generate(self):
+        self.started = True
+        try:
+            for number in range(self.count):
+                yield {"id": number, "name": f"N{number}"}
+        finally:
+            self.closed = True
+
+
+def make_app(rows: List[Rows], max_concurrent: int) -> FastAPI:
+    app = FastAPI()
+    app.state.export_limiter = ExportLimiter(max_concurrent)
+
+    @app.get("/export", response_class=StreamingResponse)
+    async def export(limiter: Optional[ExportLimiter] = Depends(get_export_limiter)):
+        source = Rows(100000)
+        rows.append(source)
+        return await export_response(source.generate(), COLUMNS, ExportFormat.NDJSON, "items", limiter)
+
+    return app
+
+
+async def request(app: FastAPI, disconnect_after: Optional[int] = None):
+    """
+    GET /export
+    :param disconnect_after: клиент разрывает соединение после получения указанного количества фрагментов тела
+    :return: статус, заголовки, фрагменты тела
+    """
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/export",
+        "raw_path": b"/export",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    disconnected = asyncio.Event()
+    response = dict(status=None, headers=None, chunks=list())
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {name.decode(): value.decode() for name, value in message["headers"]}
+            return
+        if message.get("body"):
+            response["chunks"].append(message["body"])
+        if disconnect_after is not None and len(response["chunks"]) >= disconnect_after:
+            disconnected.set()
+            # передача фрагмента ожидает клиента, пока задача передачи не будет отменена
+            await asyncio.sleep(3600)
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["chunks"]
+
+
+def test_iter_export_csv():
+    rows = Rows(3)
+
+    async def collect():
+        return [chunk async for chunk in iter_export(rows.generate(), COLUMNS, ExportFormat.CSV, chunk_size=10)]
+
+    chunks = asyncio.run(collect())
+    assert b"".join(chunks).decode().splitlines() == ["id,name", "0,N0", "1,N1", "2,N2"]
+    assert rows.closed
+
+
+def test_export_completed():
+    rows = list()
+    app = make_app(rows, 2)
+
+    status, headers, chunks = asyncio.run(request(app))
+    assert status == 200
+    assert headers["content-disposition"] == 'attachment; filename="items.ndjson"'
+    lines = b"".join(chunks).decode().splitlines()
+    assert len(lines) == 100000
+    assert json.loads(lines[-1]) == {"id": 99999, "name": "N99999"}
+    assert rows[0].closed
+    assert app.state.export_limiter.active == 0
+
+
+def test_export_client_disconnected():
+    rows = list()
+    app = make_app(rows, 2)
+
+    async def run():
+        status, _, chunks = await request(app, disconnect_after=2)
+        # до завершения цикла событий: генератор не закрыт сборщиком мусора (asyncio.run)
+        return status, chunks, rows[0].closed
+
+    status, chunks, closed = asyncio.run(run())
+    assert status == 200
+    assert len(chunks) == 2
+    # курсор (соединение) освобожден при разрыве соединения клиентом, выгрузка завершена
+    assert closed
+    assert app.state.export_limiter.active == 0
+
+
+def test_export_limit():
+    limiter = ExportLimiter(1)
+    rows = Rows(10)
+
+    async def run():
+        first = await export_response(Rows(10).generate(), COLUMNS, ExportFormat.NDJSON, "items", limiter)
+        with pytest.raises(HTTPException) as err:
+            await export_response(rows.generate(), COLUMNS, ExportFormat.NDJSON, "items", limiter)
+        await first.body_iterator.aclose()
+        return err.value
+
+    err = asyncio.run(run())
+    assert err.status_code == 503
+    assert err.headers["Retry-After"]
+    # соединение для отклоненной выгрузки не получено
+    assert not rows.started
+    assert limiter.active == 1
+
+
+def test_export_first_chunk_failed():
+    limiter = ExportLimiter(1)
+
+    async def failed():
+        raise ConnectionError("no connection")
+        yield
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            await export_response(failed(), COLUMNS, ExportFormat.NDJSON, "items", limiter)
+
+    asyncio.run(run())
+    assert limiter.active == 0
@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiosql
+
+from nms.common.db.events import PREPARED_QUERIES, prepare_statements, queries_statements
+from nms.common.db.queries.nms import queries_nms
+
+QUERIES = """
+-- name: create_bulk_items#
+create temporary table bulk_items (id bigint, name text) on commit drop;
+
+-- name: get_bulk_items
+select id, name from bulk_items order by id;
+
+-- name: get_item_by_id^
+select id, name from items where id = :item_id;
+
+-- name: get_item_by_name^
+select id, name from items where name = :name and kind = :kind;
+"""
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = list()
+
+    async def fetch(self, sql, *args):
+        self.executed.append((sql, args))
+        return []
+
+
+def test_scripts_and_temp_tables_are_not_prepared():
+    queries = aiosql.from_str(QUERIES, "asyncpg")
+    statements = queries_statements(
+        queries, ["create_bulk_items", "get_bulk_items", "get_item_by_id", "get_item_by_name", "get_unknown"]
+    )
+    assert statements == [queries.get_item_by_id.sql, queries.get_item_by_name.sql]
+
+
+def test_queries_without_operation_type():
+    # aiosql < 3.3: функции запросов без атрибута operation
+    loaded = aiosql.from_str(QUERIES, "asyncpg")
+    queries = SimpleNamespace(
+        available_queries=loaded.available_queries,
+        **{name: SimpleNamespace(sql=getattr(loaded, name).sql) for name in loaded.available_queries},
+    )
+    statements = queries_statements(queries, ["create_bulk_items", "get_bulk_items", "get_item_by_id"])
+    assert statements == [loaded.get_item_by_id.sql]
+
+
+def test_statements_are_executed_with_null_parameters():
+    queries = aiosql.from_str(QUERIES, "asyncpg")
+    conn = FakeConnection()
+    asyncio.run(prepare_statements(conn, queries_statements(queries, ["get_item_by_id", "get_item_by_name"])))
+    assert conn.executed == [(queries.get_item_by_id.sql, (None,)), (queries.get_item_by_name.sql, (None, None))]
+
+
+def test_prepared_queries_exist():
+    assert len(queries_statements(queries_nms)) == len(PREPARED_QUERIES)
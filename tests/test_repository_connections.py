@@ -0,0 +1,102 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from nms.common.config import PoolSettings
+from nms.common.db.pool import ObservedPool, RepositoryConnections
+from nms.common.db.repositories.base import BaseNmsRepository, read_only
+
+
+class FakeConnection:
+    def __init__(self, number: int):
+        self.number = number
+        self.in_use = False
+        self._in_transaction = False
+
+    def is_in_transaction(self) -> bool:
+        return self._in_transaction
+
+    @asynccontextmanager
+    async def transaction(self, **options):
+        self._in_transaction = True
+        try:
+            yield
+        finally:
+            self._in_transaction = False
+
+
+class FakePool:
+    def __init__(self):
+        self.acquired = 0
+        self.released = 0
+
+    async def acquire(self, timeout=None) -> FakeConnection:
+        self.acquired += 1
+        conn = FakeConnection(self.acquired)
+        conn.in_use = True
+        return conn
+
+    async def release(self, conn: FakeConnection) -> None:
+        conn.in_use = False
+        self.released += 1
+
+
+class Replicas:
+    """Пулы реплик: получение соединения только для методов, только читающих данные"""
+
+    def __init__(self):
+        self.pool = FakePool()
+
+    async def acquire(self, stack):
+        return await stack.enter_async_context(ObservedPool(self.pool, PoolSettings()).acquire())
+
+
+class ValuesRepository(BaseNmsRepository):
+    @read_only
+    async def read_value(self, delay: float) -> int:
+        conn = self.connection
+        await asyncio.sleep(delay)
+        assert conn.in_use and self.connection is conn
+        return conn.number
+
+    async def get_value(self) -> int:
+        return self.connection.number
+
+
+def repository(replicas: Replicas = None):
+    pool = FakePool()
+    return ValuesRepository(RepositoryConnections(ObservedPool(pool, PoolSettings()), replicas)), pool
+
+
+def test_concurrent_calls_use_own_connections():
+    repo, pool = repository()
+
+    async def run():
+        return await asyncio.gather(repo.read_value(0.02), repo.read_value(0.01), repo.read_value(0))
+
+    assert sorted(asyncio.run(run())) == [1, 2, 3]
+    assert pool.acquired == pool.released == 3
+
+
+def test_transaction_pins_connection():
+    repo, pool = repository()
+
+    async def run():
+        async with repo.transaction():
+            return [await repo.read_value(0), await repo.get_value()]
+
+    assert asyncio.run(run()) == [1, 1]
+    assert pool.acquired == pool.released == 1
+
+
+def test_read_only_is_explicit():
+    replicas = Replicas()
+    repo, pool = repository(replicas)
+
+    async def run():
+        # метод без @read_only (независимо от имени) выполняется на основном сервере
+        await repo.read_value(0)
+        await repo.get_value()
+
+    asyncio.run(run())
+    assert replicas.pool.acquired == 1
+    assert pool.acquired == 1
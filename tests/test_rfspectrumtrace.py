@@ -0,0 +1,72 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from nms.common.executor import SpectrumExecutor
+from nms.common.models.rfspectrumtrace import (RfSpectrumTrace,
+                                               dbm_array_decoder,
+                                               dbm_array_encoder)
+
+
+def trace() -> RfSpectrumTrace:
+    return RfSpectrumTrace(
+        guid='trace', start_freq_hz=1000, stop_freq_hz=1040, step_freq_hz=10, noise=-90.0, numpoints=5,
+        y_val_dbm=dbm_array_decoder([-80.0, -75.5, -60.25, -70.0, -85.75]),
+    )
+
+
+def test_apply_gain_on_copy_keeps_original():
+    original = trace()
+    original.apply_gain(1.0)
+    copy = original.copy()
+    copy.apply_gain(2.5)
+    assert dbm_array_encoder(original.y_val_dbm) == [-79.0, -74.5, -59.25, -69.0, -84.75]
+    assert dbm_array_encoder(copy.y_val_dbm) == [-76.5, -72.0, -56.75, -66.5, -82.25]
+    assert original.noise == -89.0
+
+
+def test_apply_gain_on_original_keeps_copy():
+    original = trace()
+    original.apply_gain(1.0)
+    copy = original.copy()
+    original.apply_gain(2.5)
+    assert dbm_array_encoder(copy.y_val_dbm) == [-79.0, -74.5, -59.25, -69.0, -84.75]
+    assert dbm_array_encoder(original.y_val_dbm) == [-76.5, -72.0, -56.75, -66.5, -82.25]
+    assert copy.noise == -89.0
+
+
+def test_apply_gain_copies_buffer_once():
+    value = trace()
+    value.apply_gain(1.0)
+    buffer = value.y_val_dbm
+    value.apply_gain(1.0)
+    assert value.y_val_dbm is buffer
+    assert np.array_equal(value.samples(), [-7800, -7350, -5825, -6800, -8375])
+
+
+def test_shared_buffer_is_not_changed():
+    first, second = trace(), trace()
+    first.apply_gain(1.0)
+    second.y_val_dbm = first.y_val_dbm
+    second.apply_gain(1.0)
+    assert dbm_array_encoder(first.y_val_dbm) == [-79.0, -74.5, -59.25, -69.0, -84.75]
+
+
+@pytest.mark.parametrize('shm_min_size', [0, 1024])
+def test_executor_apply_gain_on_copy_keeps_original(shm_min_size):
+    async def run():
+        executor = SpectrumExecutor(max_workers=1, shm_min_size=shm_min_size)
+        await executor.start()
+        try:
+            original = trace()
+            await executor.apply_gain(original, 1.0)
+            copy = original.copy()
+            await executor.apply_gain(copy, 2.5)
+            return original, copy
+        finally:
+            await executor.stop()
+
+    original, copy = asyncio.run(run())
+    assert dbm_array_encoder(original.y_val_dbm) == [-79.0, -74.5, -59.25, -69.0, -84.75]
+    assert dbm_array_encoder(copy.y_val_dbm) == [-76.5, -72.0, -56.75, -66.5, -82.25]
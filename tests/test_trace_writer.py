@@ -0,0 +1,103 @@
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+from asyncpg.exceptions import DataError
+
+from nms.common.models.rfspectrumtrace import RfSpectrumSignal
+from nms.inbox.services.writer import TraceWriter, WriterOverloaded
+
+
+class FakeConnection:
+    def __init__(self, pool: "FakePool"):
+        self._pool = pool
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self._pool.failures > 0:
+            self._pool.failures -= 1
+            raise ConnectionError('DWH is not available')
+        if any(record in self._pool.poison for record in records):
+            raise DataError('value out of range for type integer')
+        self._pool.written.setdefault(table, []).extend(records)
+
+
+class FakePool:
+    def __init__(self, failures: int = 0, poison=()):
+        self.failures = failures
+        self.poison = set(poison)
+        self.written = dict()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+
+def writer(pool: FakePool, queue_size: int = 10) -> TraceWriter:
+    return TraceWriter(pool, batch_size=1, flush_interval=0.01, queue_size=queue_size,
+                       put_timeout=0.05, retry_delay=0.01, retry_max_delay=0.02)
+
+
+def signal_rows(count: int):
+    return [('signal', n) for n in range(count)]
+
+
+def signal() -> RfSpectrumSignal:
+    return RfSpectrumSignal(guid=str(uuid4()), trace_guid=str(uuid4()),
+                            start_freq_hz=100, stop_freq_hz=200, f0_freq_hz=150)
+
+
+def test_failed_batch_is_retried():
+    async def run():
+        pool = FakePool(failures=3)
+        trace_writer = writer(pool)
+        trace_writer.start()
+        await trace_writer._queue.put(([], signal_rows(1)))
+        await asyncio.sleep(0.2)
+        await trace_writer.stop()
+        return pool
+
+    pool = asyncio.run(run())
+    assert pool.failures == 0
+    assert pool.written == {'rf_signal': signal_rows(1)}
+
+
+def test_put_is_rejected_while_dwh_is_down():
+    async def run():
+        pool = FakePool(failures=10 ** 6)
+        trace_writer = writer(pool, queue_size=2)
+        trace_writer.start()
+        # первый пакет записывается повторно, пока хранилище недоступно, следующие остаются в очереди
+        for _ in range(3):
+            await trace_writer.put(signals=[signal()])
+            await asyncio.sleep(0.01)
+        with pytest.raises(WriterOverloaded):
+            await trace_writer.put(signals=[signal()])
+        pool.failures = 0
+        await asyncio.sleep(0.1)
+        await trace_writer.stop()
+        return pool
+
+    pool = asyncio.run(run())
+    assert len(pool.written['rf_signal']) == 3
+
+
+def test_poison_rows_are_dropped():
+    async def run():
+        rows = signal_rows(5)
+        pool = FakePool(poison=[rows[1], rows[4]])
+        trace_writer = writer(pool)
+        trace_writer.start()
+        await trace_writer._queue.put(([], rows))
+        # следующие пакеты записываются: ошибочный пакет не останавливает разбор очереди
+        await trace_writer._queue.put(([], [('signal', 5)]))
+        await asyncio.sleep(0.1)
+        await trace_writer.stop()
+        return pool
+
+    pool = asyncio.run(run())
+    assert pool.written == {'rf_signal': [('signal', 0), ('signal', 2), ('signal', 3), ('signal', 5)]}